@@ -7,16 +7,18 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from app.db.session import SessionLocal
-from app.models.user import User
-from app.core.security import verify_password
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_crud import get_user_by_username, update_user_password_hash
+from app.db.session import get_async_db
+from app.core.config import AUTH_STATELESS
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.schemas.user import Principal
+from app.services.principal_cache import get_principal, set_principal
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-db = SessionLocal()
-
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
@@ -38,40 +40,61 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 @router.post("/token")
-def token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate a user and provide an access token.
     
     This endpoint is used for user login. It validates the provided credentials
     and returns a JWT token if authentication is successful.
     
+    The password is verified on the bounded password hashing executor. When its
+    queue is full the login is rejected at once, and a hash made with another
+    bcrypt cost is replaced by a hash with the current one.
+    
     Args:
         form_data (OAuth2PasswordRequestForm): The form data containing username (email) and password.
+        db (AsyncSession): The database session dependency.
         
     Returns:
         dict: A dictionary containing the access token and token type.
         
     Raises:
-        HTTPException: If the credentials are invalid.
+        HTTPException: If the credentials are invalid (400) or too many logins are
+            in progress (503).
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await get_user_by_username(db, form_data.username)
+    if not user:
+        raise HTTPException(status_code=400, detail="Invalid email or password")
+    # Return the connection to the pool before the deliberately slow bcrypt check
+    await db.commit()
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Too many logins in progress", headers={"Retry-After": "1"})
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid email or password")
-    access_token = create_access_token({"sub": user.email})
+    if new_hash:
+        await update_user_password_hash(db, user.id, new_hash)
+    access_token = create_access_token({"sub": user.email, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
     """
     Get the current authenticated user from the provided token.
     
     This function is used as a dependency in protected endpoints to validate
     the JWT token and retrieve the corresponding user.
     
+    Users are looked up once and then served from the principal cache until its
+    TTL expires. With AUTH_STATELESS, the signed token claims are trusted and no
+    lookup is made at all.
+    
     Args:
         token (str): The JWT token from the Authorization header.
+        db (AsyncSession): The database session dependency.
         
     Returns:
-        User: The authenticated user object.
+        Principal: The authenticated user.
         
     Raises:
         HTTPException: If the token is invalid or the user doesn't exist.
@@ -88,7 +111,13 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    if AUTH_STATELESS:
+        return Principal(id=payload.get("uid"), email=email)
+    principal = get_principal(email)
+    if principal is None:
+        user = await get_user_by_username(db, email)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.model_validate(user)
+        set_principal(principal)
+    return principal
@@ -0,0 +1,67 @@
+"""
+Health API module for the incident management system.
+This module exposes liveness and readiness probes for orchestrators and load balancers.
+"""
+
+from fastapi import APIRouter, Response
+from app.core.security import password_hasher
+from app.db.session import pool_metrics
+from app.services.classification_queue import classification_queue
+
+router = APIRouter()
+
+@router.get("/live")
+def live():
+    """
+    Report that the API process is up.
+
+    This endpoint answers as soon as the application has started, without
+    waiting for the classification model.
+
+    Returns:
+        dict: The liveness status.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready")
+def ready(response: Response):
+    """
+    Report whether the classification model is loaded.
+
+    The model is warmed up in the background after startup, either in the API
+    process or in the classification worker processes. Until it is ready,
+    this endpoint answers with HTTP 503 so that traffic depending on classification
+    can be held back, while incidents can still be created with a pending category.
+
+    Args:
+        response (Response): The outgoing response, used to set the status code.
+
+    Returns:
+        dict: The state of the classification model.
+    """
+    if not classification_queue.is_ready:
+        response.status_code = 503
+    return classification_queue.status()
+
+@router.get("/pool")
+def pool():
+    """
+    Report the state and checkout metrics of the database connection pools.
+
+    The peak number of connections in use and the mean time a connection is held
+    indicate how DB_POOL_SIZE and DB_MAX_OVERFLOW should be sized for the traffic.
+
+    Returns:
+        dict: The metrics of each engine's pool, keyed by engine name.
+    """
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
+
+@router.get("/password-hashing")
+def password_hashing():
+    """
+    Report the load and timing of the password hashing executor.
+
+    Returns:
+        dict: Completed, rejected and in-flight operations and their durations.
+    """
+    return password_hasher.stats()
@@ -3,80 +3,559 @@ Incidents API module for the incident management system.
 This module handles CRUD operations for incidents, including automatic classification.
 """
 
-from fastapi import APIRouter, Depends, BackgroundTasks
-from app.db.session import SessionLocal
-from app.schemas.incident import IncidentCreate, IncidentUpdate, IncidentOut
-from app.db.crud import create_incident, get_incident, update_incident
-from app.services.classifier import classify_category
+from datetime import datetime
+from typing import Any, Literal, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import ReplicaSessionLocal, get_async_db, get_async_replica_db
+from app.schemas.incident import (
+    BulkIncidentResponse,
+    BulkIncidentResult,
+    IncidentCreate,
+    IncidentCreated,
+    IncidentOut,
+    IncidentScores,
+    IncidentStats,
+    IncidentUpdate,
+    SimilarIncident,
+)
+from app.db.async_crud import (
+    create_incident,
+    create_incidents,
+    get_incident,
+    get_incident_embedding,
+    get_incident_scores,
+    get_incident_stats,
+    get_incidents,
+    list_incidents,
+    search_incidents,
+    update_incident,
+)
+from app.db.crud import iter_incidents
+from app.core.config import BULK_MAX_ITEMS, EXPORT_CHUNK_SIZE, INCIDENT_EMBEDDINGS, SIMILARITY_DUPLICATE_THRESHOLD
+from app.core.pagination import decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
+from app.services.incident_export import EXPORT_FORMATS, to_csv, to_ndjson
+from app.services.classification_cache import classification_cache
+from app.services.classification_queue import classification_queue
+from app.services.classifier import MODEL_NAME, embed_descriptions, model
+from app.services.similarity_index import dequantize, quantize, similarity_index
+from app.models.incident import Incident, PENDING_CATEGORY
 from app.api.endpoints.authentication import get_current_user
 
 router = APIRouter()
 
-def get_db():
+DUPLICATES_LIMIT = 5
+"""Maximum number of likely duplicates returned when creating an incident."""
+
+async def _similar_incidents(
+    db: AsyncSession, vector, limit: int, min_score: float, exclude: Optional[int] = None
+) -> list[SimilarIncident]:
     """
-    Create and yield a database session.
+    Find the existing incidents most similar to an embedding.
     
-    This dependency ensures proper database connection management by creating
-    a new session for each request and closing it after the request is completed.
+    The similarity index first loads the embeddings stored since the last lookup,
+    including those stored by other processes.
     
-    Yields:
-        SessionLocal: A SQLAlchemy database session.
+    Args:
+        db (AsyncSession): The database session.
+        vector: The query embedding.
+        limit (int): Maximum number of incidents to return.
+        min_score (float): Minimum similarity of a returned incident.
+        exclude (int, optional): ID of an incident to leave out.
+        
+    Returns:
+        list[SimilarIncident]: The similar incidents, most similar first.
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    await db.run_sync(similarity_index.sync, MODEL_NAME)
+    matches = await run_in_threadpool(similarity_index.search, vector, limit, min_score, exclude)
+    incidents = await get_incidents(db, [incident_id for incident_id, _ in matches])
+    return [
+        SimilarIncident(
+            id=incident_id,
+            title=incidents[incident_id].title,
+            status=incidents[incident_id].status,
+            category=incidents[incident_id].category,
+            created_at=incidents[incident_id].created_at,
+            score=score,
+        )
+        for incident_id, score in matches
+        if incident_id in incidents
+    ]
+
+def _cached_categories(descriptions: list[str]) -> list[Optional[str]]:
+    """
+    Look up the cached categories of descriptions.
+    
+    The persistent tier of the cache is a SQLite file, so call it through
+    `run_in_threadpool` to keep the disk reads off the event loop.
+    
+    Args:
+        descriptions (list[str]): The incident descriptions.
+        
+    Returns:
+        list[Optional[str]]: The cached category of each description, or None on a miss.
+    """
+    return [classification_cache.get(description) for description in descriptions]
 
-@router.post("/incidents/", response_model=IncidentOut)
-def create(data: IncidentCreate, background_tasks: BackgroundTasks, db: SessionLocal = Depends(get_db), user: str = Depends(get_current_user)):
+@router.post("/incidents/", response_model=IncidentCreated)
+async def create(
+    data: IncidentCreate,
+    find_duplicates: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    user: str = Depends(get_current_user),
+):
     """
     Create a new incident.
     
-    This endpoint creates a new incident and schedules a background task to classify
-    the incident based on its description.
+    This endpoint creates a new incident together with a classification job, in the
+    same transaction, so that no pending classification is lost on a restart. The
+    classification workers are then notified and assign the category asynchronously.
+    While the classification model is still loading, the incident is created with
+    the "pending" category.
+    
+    When the same description has already been classified, the cached category is
+    stored right away and no classification is run; with INCIDENT_EMBEDDINGS, an
+    embedding-only job is queued instead, so the incident can be found by the
+    similar-incident lookups.
+    
+    With `find_duplicates`, the description is embedded before the incident is created
+    and the existing incidents at least SIMILARITY_DUPLICATE_THRESHOLD similar to it are
+    returned as likely duplicates. This runs the encoder on the request path, and only
+    when the model is loaded in the API process: with classification worker processes,
+    or while the model is loading, no duplicates are returned and the incident is
+    embedded by the workers instead.
     
     Args:
         data (IncidentCreate): The incident data to create.
-        background_tasks (BackgroundTasks): FastAPI background tasks handler.
-        db (SessionLocal): The database session dependency.
+        find_duplicates (bool): Whether to return the likely duplicates of the incident.
+            Defaults to False.
+        db (AsyncSession): The database session dependency.
         user (str): The authenticated user dependency.
         
     Returns:
-        IncidentOut: The created incident.
+        IncidentCreated: The created incident and its likely duplicates.
     """
-    incident = create_incident(db, data)
-    background_tasks.add_task(_classify, db, incident.id, incident.description)
-    return incident
+    duplicates, embedding = [], None
+    if find_duplicates and INCIDENT_EMBEDDINGS and model.is_ready:
+        vectors = await run_in_threadpool(embed_descriptions, [data.description])
+        if vectors is not None:
+            duplicates = await _similar_incidents(db, vectors[0], DUPLICATES_LIMIT, SIMILARITY_DUPLICATE_THRESHOLD)
+            embedding = (MODEL_NAME, quantize(vectors)[0])
 
-def _classify(db: SessionLocal, incident_id: int, description: str):
+    [category] = await run_in_threadpool(_cached_categories, [data.description])
+    if category is not None:
+        embed = INCIDENT_EMBEDDINGS and embedding is None
+        incident = await create_incident(db, data, category=category, embedding=embedding, embed=embed)
+        if embed:
+            classification_queue.notify()
+    else:
+        category = None if classification_queue.is_ready else PENDING_CATEGORY
+        incident = await create_incident(db, data, category=category, classify=True, embedding=embedding)
+        classification_queue.notify()
+    return IncidentCreated(**IncidentOut.model_validate(incident).model_dump(), duplicates=duplicates)
+
+def _format_errors(exc: ValidationError) -> str:
+    """
+    Format the errors of a validation failure as a single message.
+    
+    Args:
+        exc (ValidationError): The validation failure.
+        
+    Returns:
+        str: One "field: message" entry per error, separated by semicolons.
+    """
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" if error["loc"] else error["msg"]
+        for error in exc.errors()
+    )
+
+@router.post("/incidents/bulk", response_model=BulkIncidentResponse)
+async def create_bulk(items: list[Any] = Body(...), db: AsyncSession = Depends(get_async_db), user: str = Depends(get_current_user)):
     """
-    Classify an incident based on its description.
+    Create many incidents in one request.
     
-    This internal function is called as a background task to determine the category
-    of an incident based on keywords in its description.
+    Each item is validated on its own: invalid items are reported in the response
+    and do not prevent the valid ones from being created. Valid incidents are inserted
+    in a single transaction together with their classification jobs, and the
+    classification workers are notified once for the whole batch. Descriptions that
+    have already been classified get their cached category right away, and an
+    embedding-only job when INCIDENT_EMBEDDINGS is enabled.
     
     Args:
-        db (SessionLocal): The database session.
-        incident_id (int): The ID of the incident to classify.
-        description (str): The incident description text.
+        items (list): The incidents to create, with the fields of IncidentCreate.
+        db (AsyncSession): The database session dependency.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        BulkIncidentResponse: The number of created and rejected items and the result of each item.
+        
+    Raises:
+        HTTPException: If the request holds more than BULK_MAX_ITEMS items.
     """
-    category = classify_category(description)
-    update_incident(db, incident_id, IncidentUpdate(category=category))
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} incidents per request")
+
+    results = [None] * len(items)
+    indexes, incidents = [], []
+    for index, item in enumerate(items):
+        try:
+            incident = IncidentCreate.model_validate(item)
+        except ValidationError as exc:
+            results[index] = BulkIncidentResult(index=index, error=_format_errors(exc))
+            continue
+        indexes.append(index)
+        incidents.append(incident)
+
+    cached = await run_in_threadpool(_cached_categories, [incident.description for incident in incidents])
+    default_category = None if classification_queue.is_ready else PENDING_CATEGORY
+    categories = [category if category is not None else default_category for category in cached]
+    classify = [category is None for category in cached]
+
+    embed = [INCIDENT_EMBEDDINGS and not classified for classified in classify]
+    incident_ids = await create_incidents(db, incidents, categories, classify, embed)
+    for index, incident_id, category in zip(indexes, incident_ids, categories):
+        results[index] = BulkIncidentResult(index=index, id=incident_id, category=category)
+    if any(classify) or any(embed):
+        classification_queue.notify(sum(classify) + sum(embed))
+    return BulkIncidentResponse(
+        created=len(incident_ids),
+        failed=len(items) - len(incident_ids),
+        results=results,
+    )
+
+@router.get("/classification/stats")
+def classification_stats(user: str = Depends(get_current_user)):
+    """
+    Report the batching counters of the classification queue.
+    
+    Args:
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        dict: Queue depth, batch counts, and per-batch latency and throughput figures.
+    """
+    return classification_queue.stats()
+
+@router.get("/classification/cache/stats")
+def classification_cache_stats(user: str = Depends(get_current_user)):
+    """
+    Report the hit/miss statistics of the classification result cache.
+    
+    Args:
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        dict: The statistics of the in-process and persistent cache tiers.
+    """
+    return classification_cache.stats()
 
 @router.get("/", response_model=list[IncidentOut])
-def list_all(db: SessionLocal = Depends(get_db), user: str = Depends(get_current_user)):
+async def list_all(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_replica_db),
+    user: str = Depends(get_current_user),
+):
     """
-    List all incidents.
+    List incidents, most recent first.
     
-    This endpoint retrieves all incidents from the database.
+    This endpoint returns one page of incidents, filtered in the database, and is
+    served by a read replica when replicas are configured.
     Authentication is required to access this endpoint.
     
+    Pages are read with keyset pagination: when more incidents are available,
+    the `X-Next-Cursor` response header holds an opaque token to pass as the
+    `cursor` parameter of the next request, together with the same filters.
+    
+    Args:
+        response (Response): The outgoing response, used to set the next-cursor header.
+        limit (int): Maximum number of incidents per page, between 1 and 1000. Defaults to 100.
+        cursor (str, optional): The next-cursor token of the previous page.
+        status (str, optional): Only return incidents with this status.
+        category (str, optional): Only return incidents with this category.
+        created_from (datetime, optional): Only return incidents created at or after this time.
+        created_to (datetime, optional): Only return incidents created before this time.
+        db (AsyncSession): The database session dependency.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        list[IncidentOut]: The incidents of the page.
+        
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    incidents = await list_incidents(
+        db,
+        limit=limit + 1,
+        after=after,
+        status=status,
+        category=category,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    if len(incidents) > limit:
+        incidents = incidents[:limit]
+        last = incidents[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return incidents
+
+@router.get("/export")
+def export(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    user: str = Depends(get_current_user),
+):
+    """
+    Export incidents as NDJSON or CSV.
+    
+    The export is streamed: incidents are read from a server-side cursor in chunks of
+    EXPORT_CHUNK_SIZE rows and each chunk is serialized and sent before the next one is
+    fetched, so memory usage does not grow with the number of incidents. It accepts
+    the same filters as the incident listing and is served by a read replica when
+    replicas are configured.
+    
+    Args:
+        format (str): "ndjson" (one JSON object per line) or "csv". Defaults to "ndjson".
+        status (str, optional): Only export incidents with this status.
+        category (str, optional): Only export incidents with this category.
+        created_from (datetime, optional): Only export incidents created at or after this time.
+        created_to (datetime, optional): Only export incidents created before this time.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        StreamingResponse: The incidents, in ID order.
+    """
+    def chunks():
+        # The session is owned by the stream, which outlives the request handler
+        db = ReplicaSessionLocal()
+        try:
+            yield from iter_incidents(
+                db,
+                chunk_size=EXPORT_CHUNK_SIZE,
+                status=status,
+                category=category,
+                created_from=created_from,
+                created_to=created_to,
+            )
+        finally:
+            db.close()
+
+    if format == "csv":
+        body = to_csv(chunks(), list(Incident.__table__.columns.keys()))
+    else:
+        body = to_ndjson(chunks())
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="incidents.{format}"'},
+    )
+
+@router.get("/search", response_model=list[IncidentOut])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_replica_db),
+    user: str = Depends(get_current_user),
+):
+    """
+    Search incidents by the words of their title and description, best match first.
+    
+    Every word of the query must match; words are stemmed, so "database" also finds
+    "databases". The search uses a full-text index and is served by a read replica
+    when replicas are configured.
+    
+    Like the listing, results are paginated with the `X-Next-Cursor` response header,
+    to pass as the `cursor` parameter of the next request with the same query.
+    
     Args:
-        db (SessionLocal): The database session dependency.
+        response (Response): The outgoing response, used to set the next-cursor header.
+        q (str): The words to search for.
+        limit (int): Maximum number of incidents per page, between 1 and 100. Defaults to 20.
+        cursor (str, optional): The next-cursor token of the previous page.
+        status (str, optional): Only return incidents with this status.
+        category (str, optional): Only return incidents with this category.
+        db (AsyncSession): The database session dependency.
         user (str): The authenticated user dependency.
         
     Returns:
-        list[IncidentOut]: A list of all incidents.
+        list[IncidentOut]: The matching incidents of the page.
+        
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        after = decode_rank_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    matches = await search_incidents(db, q, limit=limit + 1, after=after, status=status, category=category)
+    if len(matches) > limit:
+        matches = matches[:limit]
+        last, rank = matches[-1]
+        response.headers["X-Next-Cursor"] = encode_rank_cursor(rank, last.id)
+    return [incident for incident, _ in matches]
+
+@router.get("/stats", response_model=IncidentStats)
+async def stats(
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_replica_db),
+    user: str = Depends(get_current_user),
+):
+    """
+    Count incidents by status, by category and per creation hour.
+    
+    The counts are read from counters maintained in the same transactions as the
+    incident writes, so the cost of this endpoint does not grow with the number of
+    incidents. It is served by a read replica when replicas are configured.
+    
+    Args:
+        created_from (datetime, optional): Only count incidents created at or after this hour.
+            Rounded down to the start of the hour.
+        created_to (datetime, optional): Only count incidents created in hours starting before this time.
+        db (AsyncSession): The database session dependency.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        IncidentStats: The total and the counts by status, by category and per hour.
+    """
+    return await get_incident_stats(db, created_from, created_to)
+
+@router.get("/{incident_id}", response_model=IncidentOut)
+async def read(incident_id: int, db: AsyncSession = Depends(get_async_replica_db), user: str = Depends(get_current_user)):
+    """
+    Retrieve a single incident.
+    
+    This endpoint is served by a read replica when replicas are configured.
+    
+    Args:
+        incident_id (int): The ID of the incident.
+        db (AsyncSession): The database session dependency.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        IncidentOut: The incident.
+        
+    Raises:
+        HTTPException: If the incident does not exist.
+    """
+    incident = await get_incident(db, incident_id)
+    if incident is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return incident
+
+@router.patch("/{incident_id}", response_model=IncidentOut)
+async def patch(
+    incident_id: int,
+    data: IncidentUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    user: str = Depends(get_current_user),
+):
+    """
+    Partially update an incident.
+    
+    Only the fields present in the request are changed, with an UPDATE statement
+    returning the updated incident, without reading it first. To avoid overwriting a concurrent change, send the
+    `version` of the incident the update is based on: the update is then rejected if the
+    incident has been modified since, including by a classification.
+    
+    Args:
+        incident_id (int): The ID of the incident.
+        data (IncidentUpdate): The fields to change, and optionally the expected version.
+        db (AsyncSession): The database session dependency.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        IncidentOut: The updated incident, with its new version.
+        
+    Raises:
+        HTTPException: If the incident does not exist, or no longer has the expected version.
+    """
+    row = await update_incident(db, incident_id, data)
+    if row is None:
+        if await get_incident(db, incident_id) is None:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        raise HTTPException(status_code=409, detail="Incident was modified concurrently")
+    return IncidentOut.model_validate(row)
+
+@router.get("/{incident_id}/similar", response_model=list[SimilarIncident])
+async def similar(
+    incident_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(0.0, ge=-1.0, le=1.0),
+    db: AsyncSession = Depends(get_async_replica_db),
+    user: str = Depends(get_current_user),
+):
+    """
+    Find the incidents most similar to an incident.
+    
+    Incidents are compared by the cosine similarity of the embeddings of their
+    descriptions, computed once per incident when it is classified. Lookups use an
+    in-process index whose cost grows sub-linearly with the number of incidents.
+    This endpoint is served by a read replica when replicas are configured.
+    
+    Args:
+        incident_id (int): The ID of the incident.
+        limit (int): Maximum number of incidents to return, between 1 and 100. Defaults to 10.
+        min_score (float): Minimum similarity of a returned incident, between -1 and 1. Defaults to 0.
+        db (AsyncSession): The database session dependency.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        list[SimilarIncident]: The similar incidents, most similar first.
+        
+    Raises:
+        HTTPException: If the incident does not exist, or has not been embedded yet.
+    """
+    vector = await get_incident_embedding(db, incident_id, MODEL_NAME)
+    if vector is None:
+        if await get_incident(db, incident_id) is None:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        raise HTTPException(status_code=409, detail="Incident not embedded yet")
+    return await _similar_incidents(db, dequantize(vector), limit, min_score, exclude=incident_id)
+
+@router.get("/{incident_id}/classification", response_model=IncidentScores)
+async def classification(
+    incident_id: int, db: AsyncSession = Depends(get_async_replica_db), user: str = Depends(get_current_user)
+):
+    """
+    Retrieve the scores behind the category of an incident.
+    
+    This endpoint is served by a read replica when replicas are configured.
+    
+    Args:
+        incident_id (int): The ID of the incident.
+        db (AsyncSession): The database session dependency.
+        user (str): The authenticated user dependency.
+        
+    Returns:
+        IncidentScores: The probability of each label, the model and the inference time.
+        
+    Raises:
+        HTTPException: If the incident does not exist, or has no stored scores, for
+            instance because its category came from the classification cache.
     """
-    return get_incident(db)
\ No newline at end of file
+    scores = await get_incident_scores(db, incident_id)
+    if scores is None:
+        if await get_incident(db, incident_id) is None:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        raise HTTPException(status_code=409, detail="Incident has no classification scores")
+    return IncidentScores(incident_id=incident_id, **scores)
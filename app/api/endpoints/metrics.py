@@ -0,0 +1,28 @@
+"""
+Metrics API module for the incident management system.
+This module exposes the application metrics to Prometheus.
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def scrape():
+    """
+    Render the application metrics in the Prometheus text exposition format.
+
+    Request latencies per route, database statement counts and durations, pool
+    usage, classification queue depth, batch sizes and classifier timings.
+
+    Returns:
+        PlainTextResponse: The metrics.
+
+    Raises:
+        HTTPException: If metrics are disabled with METRICS_ENABLED.
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
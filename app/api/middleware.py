@@ -0,0 +1,77 @@
+"""
+API middleware module.
+
+This module provides the ASGI middleware timing every HTTP request of the application.
+"""
+
+import time
+from app.core.metrics import metrics
+
+request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests, until the response is fully sent.",
+    ("method", "route", "status"),
+)
+"""Latency histogram of the HTTP requests, per route template and status code."""
+
+def _route_template(scope) -> str:
+    """
+    Return the path template of the route that handled a request.
+
+    Args:
+        scope: The ASGI scope of the request, after routing.
+
+    Returns:
+        str: The template, e.g. "/incidents/{incident_id}", or "unmatched".
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    # Depending on the FastAPI version, routes of included routers only know their
+    # path relative to the router prefix: take the prefix from the request path
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[:len(segments) - template.count("/")])
+    return prefix + template
+
+class TimingMiddleware:
+    """
+    ASGI middleware recording the duration of each HTTP request.
+
+    Requests are labelled with the path template of the matched route (e.g.
+    "/incidents/{incident_id}") rather than the raw path, so that the number of
+    series stays bounded. Being a plain ASGI middleware, it does not buffer
+    streaming responses.
+    """
+
+    def __init__(self, app):
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: The ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=_route_template(scope),
+                status=status,
+            )
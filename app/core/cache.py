@@ -0,0 +1,125 @@
+"""
+In-process cache module.
+
+This module provides a thread-safe, size-bounded LRU cache whose entries can expire
+after a time-to-live. It keeps hit/miss statistics so cache efficiency can be monitored.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with optional per-entry time-to-live.
+
+    When the cache is full, the least recently used entry is evicted. Expired
+    entries are dropped lazily, when they are looked up or reach the LRU end.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, timer: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept in the cache.
+            ttl (float, optional): Lifetime of an entry in seconds. None disables expiration.
+            timer (Callable): Clock used to compute expiration times.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value cached for a key, marking it as recently used.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any, optional): Value returned when the key is missing or expired.
+
+        Returns:
+            Any: The cached value, or `default`.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self.timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to cache.
+            ttl (float, optional): Lifetime of this entry, overriding the cache default.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.timer() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove a key from the cache.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any, optional): Value returned when the key is missing.
+
+        Returns:
+            Any: The removed value, or `default`.
+        """
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """
+        Return the usage statistics of the cache.
+
+        Returns:
+            dict: Size, bounds, hit/miss counts and hit ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,264 @@
+"""
+Metrics module.
+
+This module provides a small, thread-safe metrics registry rendered in the Prometheus
+text exposition format: counters and histograms with labels, and gauges whose values
+are read from a callback when the metrics are scraped. When the registry is disabled,
+recording a metric returns immediately.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Union
+from app.core.config import METRICS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Upper bounds, in seconds, of the buckets of duration histograms."""
+
+def _escape(value) -> str:
+    """Escape a label value for the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    """Render a label set, e.g. '{method="GET",route="/"}'."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    """Base class of the labelled metrics."""
+
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        """
+        Render the metric in the text exposition format.
+
+        Returns:
+            list[str]: The HELP and TYPE lines followed by one line per sample.
+        """
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        Increase the counter of a label set.
+
+        Args:
+            amount (float, optional): The increment. Defaults to 1.
+            **labels: The value of each label of the counter.
+        """
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values.items()]
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, with their count and sum."""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        """
+        Record an observation.
+
+        Args:
+            value (float): The observed value.
+            **labels: The value of each label of the histogram.
+        """
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, plus +Inf, then the sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, **labels):
+        """
+        Time a block of code and observe its duration in seconds.
+
+        Args:
+            **labels: The value of each label of the histogram.
+
+        Returns:
+            A context manager.
+        """
+        if not self.registry.enabled:
+            return nullcontext()
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels: dict):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        lines = []
+        for key, counts in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Gauge(_Metric):
+    """
+    Gauge read from a callback when the metrics are rendered.
+
+    The callback returns either a single value or, for a labelled gauge, a dict
+    mapping tuples of label values to values.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, registry, name, documentation, labelnames, callback: Callable[[], Union[float, dict]]):
+        super().__init__(registry, name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> list[str]:
+        try:
+            values = self.callback()
+        except Exception:
+            logger.exception("Failed to read the %s gauge", self.name)
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values.items()
+            if value is not None
+        ]
+
+class MetricsRegistry:
+    """Collection of the metrics exposed by the process."""
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize an empty registry.
+
+        Args:
+            enabled (bool, optional): Whether metrics are recorded. Defaults to True.
+        """
+        self.enabled = enabled
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """
+        Register a counter, or return the one already registered under that name.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The HELP text.
+            labelnames (tuple[str, ...], optional): The label names.
+
+        Returns:
+            Counter: The counter.
+        """
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Register a histogram, or return the one already registered under that name.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The HELP text.
+            labelnames (tuple[str, ...], optional): The label names.
+            buckets (tuple[float, ...], optional): Upper bounds of the buckets. Defaults to DEFAULT_BUCKETS.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def gauge(
+        self, name: str, documentation: str, callback: Callable[[], Union[float, dict]], labelnames: tuple[str, ...] = ()
+    ) -> Gauge:
+        """
+        Register a gauge read from a callback.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The HELP text.
+            callback (Callable): Function returning the value(s) of the gauge.
+            labelnames (tuple[str, ...], optional): The label names.
+
+        Returns:
+            Gauge: The gauge.
+        """
+        return self._register(Gauge(self, name, documentation, labelnames, callback))
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+"""Application-wide metrics registry."""
@@ -0,0 +1,78 @@
+"""
+Pagination module for the incident management system.
+
+This module encodes and decodes the opaque cursors used for keyset pagination.
+A cursor holds the sort key of the last row of a page, so that the next page can
+be read with an index range scan instead of skipping rows with OFFSET.
+"""
+
+import base64
+from datetime import datetime
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the position of a row into an opaque cursor.
+
+    Args:
+        created_at (datetime): The creation timestamp of the row.
+        row_id (int): The ID of the row.
+
+    Returns:
+        str: A URL-safe cursor token.
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor token.
+
+    Returns:
+        tuple[datetime, int]: The creation timestamp and ID of the row.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+def encode_rank_cursor(rank: float, row_id: int) -> str:
+    """
+    Encode the position of a row in ranked search results into an opaque cursor.
+
+    Args:
+        rank (float): The search rank of the row.
+        row_id (int): The ID of the row.
+
+    Returns:
+        str: A URL-safe cursor token.
+    """
+    raw = f"{rank!r}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    """
+    Decode a cursor produced by `encode_rank_cursor`.
+
+    Args:
+        cursor (str): The cursor token.
+
+    Returns:
+        tuple[float, int]: The search rank and ID of the row.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        rank, row_id = raw.split("|")
+        return float(rank), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
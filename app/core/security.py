@@ -2,9 +2,15 @@
 Security module for the incident management system.
 This module provides password hashing and verification functionality.
 """
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 from passlib.context import CryptContext
+from app.core.config import BCRYPT_ROUNDS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_WORKERS
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
     """
@@ -29,4 +35,127 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if the password matches, False otherwise.
     """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+class PasswordHasher:
+    """
+    Bounded executor for password hashing and verification.
+    
+    bcrypt is deliberately slow, so password operations run on a small dedicated
+    thread pool instead of the request threadpool. At most `workers + max_queue`
+    operations are admitted at a time; further operations are rejected right away
+    with PasswordHasherBusy. The duration of every operation is recorded.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE, context: CryptContext = pwd_context):
+        """
+        Initialize the executor.
+        
+        Args:
+            workers (int): Number of hashing threads.
+            max_queue (int): Number of operations that may wait for a thread.
+            context (CryptContext): The passlib context doing the hashing.
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self._context = context
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._counters = {"operations": 0, "rejected": 0, "in_flight": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+
+    def _timed(self, function: Callable, *args):
+        """Run a password operation and record its duration."""
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._counters["operations"] += 1
+                self._counters["total_seconds"] += elapsed
+                self._counters["max_seconds"] = max(self._counters["max_seconds"], elapsed)
+
+    def _release(self, future):
+        """Free the slot of a finished operation."""
+        with self._lock:
+            self._counters["in_flight"] -= 1
+        self._slots.release()
+
+    async def _run(self, function: Callable, *args):
+        """
+        Run a password operation on the executor.
+        
+        Raises:
+            PasswordHasherBusy: If the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise PasswordHasherBusy("Too many password operations in progress")
+        with self._lock:
+            self._counters["in_flight"] += 1
+        future = self._executor.submit(self._timed, function, *args)
+        # The slot is freed when the hash completes, even if the request is cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a plain text password.
+        
+        Args:
+            password (str): The plain text password to hash.
+            
+        Returns:
+            str: The hashed password string.
+            
+        Raises:
+            PasswordHasherBusy: If the queue is full.
+        """
+        return await self._run(self._context.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """
+        Verify a password and rehash it if its hash uses outdated settings.
+        
+        Args:
+            plain_password (str): The plain text password to verify.
+            hashed_password (str): The stored hash.
+            
+        Returns:
+            tuple[bool, Optional[str]]: Whether the password matches, and the new hash
+                to store when the stored one was made with another bcrypt cost.
+                
+        Raises:
+            PasswordHasherBusy: If the queue is full.
+        """
+        return await self._run(self._context.verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """
+        Report the hashing counters.
+        
+        Returns:
+            dict: Completed, rejected and in-flight operations and their durations in milliseconds.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+        operations = counters.pop("operations")
+        total_seconds = counters.pop("total_seconds")
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "rounds": BCRYPT_ROUNDS,
+            "operations": operations,
+            "rejected": counters["rejected"],
+            "in_flight": counters["in_flight"],
+            "mean_ms": total_seconds / operations * 1000 if operations else 0.0,
+            "max_ms": counters["max_seconds"] * 1000,
+        }
+
+password_hasher = PasswordHasher()
+"""Shared password hashing executor of the API."""
@@ -0,0 +1,272 @@
+"""
+Async database CRUD operations module.
+
+This module exposes the CRUD operations used on the request path to async code.
+Each function runs the corresponding function of `app.db.crud` on the sync view of
+an AsyncSession with `AsyncSession.run_sync`: the statements are the same, but every
+database round-trip goes through the async driver and yields to the event loop.
+
+Operations used by background workers and scripts stay in `app.db.crud` only.
+"""
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import crud
+from app.models.incident import Incident
+from app.models.user import User
+from app.schemas.incident import IncidentCreate, IncidentStats, IncidentUpdate
+
+async def create_incident(
+    db: AsyncSession,
+    incident: IncidentCreate,
+    category: str = None,
+    classify: bool = False,
+    embedding: Optional[tuple[str, bytes]] = None,
+    embed: bool = False,
+) -> Incident:
+    """
+    Create a new incident in the database.
+
+    See `app.db.crud.create_incident`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incident (IncidentCreate): The incident data to create.
+        category (str, optional): The initial category of the incident. Defaults to None.
+        classify (bool, optional): Whether to queue a classification job for the incident
+            in the same transaction. Defaults to False.
+        embedding (tuple[str, bytes], optional): The model name and quantized embedding
+            of the description, stored in the same transaction. Defaults to None.
+        embed (bool, optional): Whether to queue an embedding-only job for the incident when
+            no classification job is queued. Defaults to False.
+
+    Returns:
+        Incident: The created incident object with database-populated fields.
+    """
+    return await db.run_sync(crud.create_incident, incident, category, classify, embedding, embed)
+
+async def create_incidents(
+    db: AsyncSession,
+    incidents: list[IncidentCreate],
+    categories: Optional[list[Optional[str]]] = None,
+    classify: Optional[list[bool]] = None,
+    embed: Optional[list[bool]] = None,
+) -> list[int]:
+    """
+    Create several incidents in a single transaction.
+
+    See `app.db.crud.create_incidents`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incidents (list[IncidentCreate]): The incident data to create.
+        categories (list[Optional[str]], optional): The initial category of each incident.
+        classify (list[bool], optional): Whether to queue a classification job for each incident.
+        embed (list[bool], optional): Whether to queue an embedding-only job for each incident
+            without a classification job.
+
+    Returns:
+        list[int]: The IDs of the created incidents, in the order of `incidents`.
+    """
+    return await db.run_sync(crud.create_incidents, incidents, categories, classify, embed)
+
+async def get_incident(db: AsyncSession, incident_id: int = None, skip: int = 0, limit: int = 100):
+    """
+    Retrieve incident(s) from the database.
+
+    See `app.db.crud.get_incident`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incident_id (int, optional): The ID of a specific incident to retrieve.
+        skip (int, optional): Number of records to skip for pagination. Defaults to 0.
+        limit (int, optional): Maximum number of records to return. Defaults to 100.
+
+    Returns:
+        Union[Incident, List[Incident]]: A single incident or list of incidents.
+    """
+    return await db.run_sync(crud.get_incident, incident_id, skip, limit)
+
+async def get_incidents(db: AsyncSession, incident_ids: list[int]) -> dict[int, Incident]:
+    """
+    Retrieve several incidents with a single query.
+
+    See `app.db.crud.get_incidents`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incident_ids (list[int]): The IDs of the incidents.
+
+    Returns:
+        dict[int, Incident]: The existing incidents, keyed by incident ID.
+    """
+    return await db.run_sync(crud.get_incidents, incident_ids)
+
+async def get_incident_embedding(db: AsyncSession, incident_id: int, model: str) -> Optional[bytes]:
+    """
+    Retrieve the embedding of an incident.
+
+    See `app.db.crud.get_incident_embedding`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incident_id (int): The ID of the incident.
+        model (str): Only return an embedding computed by this model.
+
+    Returns:
+        bytes: The quantized embedding, or None if the incident has none.
+    """
+    return await db.run_sync(crud.get_incident_embedding, incident_id, model)
+
+async def get_incident_scores(db: AsyncSession, incident_id: int) -> Optional[dict]:
+    """
+    Retrieve the stored classification scores of an incident.
+
+    See `app.db.crud.get_incident_scores`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incident_id (int): The ID of the incident.
+
+    Returns:
+        dict: The model, the probability of each label, the top score, the inference
+            time and the classification time, or None if the incident has no stored scores.
+    """
+    return await db.run_sync(crud.get_incident_scores, incident_id)
+
+async def list_incidents(
+    db: AsyncSession,
+    limit: int = 100,
+    after: Optional[tuple[datetime, int]] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> list[Incident]:
+    """
+    Retrieve a page of incidents, most recent first, using keyset pagination.
+
+    See `app.db.crud.list_incidents`.
+
+    Args:
+        db (AsyncSession): The database session.
+        limit (int, optional): Maximum number of incidents to return. Defaults to 100.
+        after (tuple[datetime, int], optional): The (created_at, id) of the last incident
+            of the previous page. Defaults to None for the first page.
+        status (str, optional): Only return incidents with this status.
+        category (str, optional): Only return incidents with this category.
+        created_from (datetime, optional): Only return incidents created at or after this time.
+        created_to (datetime, optional): Only return incidents created before this time.
+
+    Returns:
+        list[Incident]: The incidents of the page.
+    """
+    return await db.run_sync(
+        crud.list_incidents, limit, after, status, category, created_from, created_to
+    )
+
+async def search_incidents(
+    db: AsyncSession,
+    text: str,
+    limit: int = 100,
+    after: Optional[tuple[float, int]] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+) -> list[tuple[Incident, float]]:
+    """
+    Retrieve a page of the incidents matching a text, best match first.
+
+    See `app.db.crud.search_incidents`.
+
+    Args:
+        db (AsyncSession): The database session.
+        text (str): The words to search for. Every word must match.
+        limit (int, optional): Maximum number of incidents to return. Defaults to 100.
+        after (tuple[float, int], optional): The (rank, id) of the last incident of the previous page.
+        status (str, optional): Only return incidents with this status.
+        category (str, optional): Only return incidents with this category.
+
+    Returns:
+        list[tuple[Incident, float]]: The incidents of the page with their rank, lower being better.
+    """
+    return await db.run_sync(crud.search_incidents, text, limit, after, status, category)
+
+async def update_incident(db: AsyncSession, incident_id: int, incident: IncidentUpdate) -> Optional[Row]:
+    """
+    Update the fields of an incident that were set, without reading it first.
+
+    See `app.db.crud.update_incident`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incident_id (int): The ID of the incident to update.
+        incident (IncidentUpdate): The updated incident data, with the expected version if any.
+
+    Returns:
+        Row: The updated incident row, or None if the incident does not exist or no
+            longer has the expected version.
+    """
+    return await db.run_sync(crud.update_incident, incident_id, incident)
+
+async def delete_incident(db: AsyncSession, incident_id: int) -> Incident:
+    """
+    Delete an incident from the database.
+
+    See `app.db.crud.delete_incident`.
+
+    Args:
+        db (AsyncSession): The database session.
+        incident_id (int): The ID of the incident to delete.
+
+    Returns:
+        Incident: The deleted incident object.
+    """
+    return await db.run_sync(crud.delete_incident, incident_id)
+
+async def get_incident_stats(
+    db: AsyncSession, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None
+) -> IncidentStats:
+    """
+    Count incidents by status, by category and per creation hour.
+
+    See `app.db.crud.get_incident_stats`.
+
+    Args:
+        db (AsyncSession): The database session.
+        created_from (datetime, optional): Only count incidents created at or after this hour.
+        created_to (datetime, optional): Only count incidents created in hours starting before this time.
+
+    Returns:
+        IncidentStats: The total and the counts by status, by category and per hour.
+    """
+    return await db.run_sync(crud.get_incident_stats, created_from, created_to)
+
+async def get_user_by_username(db: AsyncSession, email: str) -> Optional[User]:
+    """
+    Retrieve a user by their email address.
+
+    See `app.db.crud.get_user_by_username`.
+
+    Args:
+        db (AsyncSession): The database session.
+        email (str): The email address of the user to retrieve.
+
+    Returns:
+        User: The user object if found, None otherwise.
+    """
+    return await db.run_sync(crud.get_user_by_username, email)
+
+async def update_user_password_hash(db: AsyncSession, user_id: int, hashed_password: str):
+    """
+    Replace the stored password hash of a user.
+
+    See `app.db.crud.update_user_password_hash`.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (int): The ID of the user.
+        hashed_password (str): The new password hash.
+    """
+    await db.run_sync(crud.update_user_password_hash, user_id, hashed_password)
@@ -5,29 +5,110 @@ This module provides Create, Read, Update, and Delete operations for the applica
 database models, including incidents and users.
 """
 
+import json
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+import numpy as np
+from sqlalchemy import Row, and_, case, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.models.incident import Incident
-from app.schemas.incident import IncidentCreate, IncidentUpdate
+from app.models.incident import Incident, PENDING_CATEGORY
+from app.models.classification_job import ClassificationJob
+from app.models.classification_label_set import ClassificationLabelSet
+from app.models.incident_classification import IncidentClassification
+from app.models.incident_embedding import IncidentEmbedding
+from app.schemas.incident import IncidentCreate, IncidentStats, IncidentUpdate
+from app.db.incident_counters import count_incidents, get_counters, move_incident, rebuild_counters
+from app.db.search import search_statement
 from app.models.user import User
 from app.core.security import hash_password
+from app.services.principal_cache import invalidate_principal
 
-def create_incident(db: Session, incident: IncidentCreate):
+def create_incident(
+    db: Session,
+    incident: IncidentCreate,
+    category: str = None,
+    classify: bool = False,
+    embedding: Optional[tuple[str, bytes]] = None,
+    embed: bool = False,
+):
     """
     Create a new incident in the database.
     
     Args:
         db (Session): The database session.
         incident (IncidentCreate): The incident data to create.
+        category (str, optional): The initial category of the incident. Defaults to None.
+        classify (bool, optional): Whether to queue a classification job for the incident
+            in the same transaction. Defaults to False.
+        embedding (tuple[str, bytes], optional): The model name and quantized embedding
+            of the description, stored in the same transaction. Defaults to None.
+        embed (bool, optional): Whether to queue an embedding-only job for the incident when
+            no classification job is queued. Defaults to False.
         
     Returns:
         Incident: The created incident object with database-populated fields.
     """
-    db_incident = Incident(**incident.dict())
+    db_incident = Incident(**incident.model_dump(), category=category)
     db.add(db_incident)
+    db.flush()
+    count_incidents(db, [db_incident.id], 1)
+    if embedding is not None:
+        _store_incident_embeddings(db, embedding[0], {db_incident.id: embedding[1]})
+    if classify or embed:
+        kind = ClassificationJob.CLASSIFY if classify else ClassificationJob.EMBED
+        db.add(ClassificationJob(incident_id=db_incident.id, kind=kind))
     db.commit()
     db.refresh(db_incident)
     return db_incident
 
+def create_incidents(
+    db: Session,
+    incidents: list[IncidentCreate],
+    categories: Optional[list[Optional[str]]] = None,
+    classify: Optional[list[bool]] = None,
+    embed: Optional[list[bool]] = None,
+) -> list[int]:
+    """
+    Create several incidents in a single transaction.
+    
+    The incidents are inserted with one multi-row INSERT ... RETURNING statement and
+    their classification jobs with a second one, so a batch costs one commit instead
+    of one per incident.
+    
+    Args:
+        db (Session): The database session.
+        incidents (list[IncidentCreate]): The incident data to create.
+        categories (list[Optional[str]], optional): The initial category of each incident.
+            Defaults to None for every incident.
+        classify (list[bool], optional): Whether to queue a classification job for each
+            incident. Defaults to False for every incident.
+        embed (list[bool], optional): Whether to queue an embedding-only job for each incident
+            without a classification job. Defaults to False for every incident.
+        
+    Returns:
+        list[int]: The IDs of the created incidents, in the order of `incidents`.
+    """
+    if not incidents:
+        return []
+    categories = categories or [None] * len(incidents)
+    classify = classify or [False] * len(incidents)
+    embed = embed or [False] * len(incidents)
+    incident_ids = list(db.scalars(
+        insert(Incident).returning(Incident.id, sort_by_parameter_order=True),
+        [{**incident.model_dump(), "category": category} for incident, category in zip(incidents, categories)],
+    ))
+    count_incidents(db, incident_ids, 1)
+    jobs = [
+        {"incident_id": incident_id, "kind": ClassificationJob.CLASSIFY if classified else ClassificationJob.EMBED}
+        for incident_id, classified, embedded in zip(incident_ids, classify, embed)
+        if classified or embedded
+    ]
+    if jobs:
+        db.execute(insert(ClassificationJob), jobs)
+    db.commit()
+    return incident_ids
+
 def get_incident(db: Session, incident_id: int = None, skip: int = 0, limit: int = 100):
     """
     Retrieve incident(s) from the database.
@@ -48,24 +129,711 @@ def get_incident(db: Session, incident_id: int = None, skip: int = 0, limit: int
         return db.query(Incident).filter(Incident.id == incident_id).first()
     return db.query(Incident).offset(skip).limit(limit).all()
 
-def update_incident(db: Session, incident_id: int, incident: IncidentUpdate):
+def get_incidents(db: Session, incident_ids: list[int]) -> dict[int, Incident]:
+    """
+    Retrieve several incidents with a single query.
+    
+    Args:
+        db (Session): The database session.
+        incident_ids (list[int]): The IDs of the incidents.
+        
+    Returns:
+        dict[int, Incident]: The existing incidents, keyed by incident ID.
+    """
+    if not incident_ids:
+        return {}
+    return {incident.id: incident for incident in db.scalars(select(Incident).where(Incident.id.in_(incident_ids)))}
+
+def _filter_incidents(
+    query,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """
+    Apply the incident listing filters to a query.
+    
+    Args:
+        query (Select): The query to filter.
+        status (str, optional): Only keep incidents with this status.
+        category (str, optional): Only keep incidents with this category.
+        created_from (datetime, optional): Only keep incidents created at or after this time.
+        created_to (datetime, optional): Only keep incidents created before this time.
+        
+    Returns:
+        Select: The filtered query.
+    """
+    if status is not None:
+        query = query.where(Incident.status == status)
+    if category is not None:
+        query = query.where(Incident.category == category)
+    if created_from is not None:
+        query = query.where(Incident.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Incident.created_at < created_to)
+    return query
+
+def list_incidents(
+    db: Session,
+    limit: int = 100,
+    after: Optional[tuple[datetime, int]] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> list[Incident]:
+    """
+    Retrieve a page of incidents, most recent first, using keyset pagination.
+    
+    Incidents are ordered by (created_at, id) descending. Instead of skipping rows
+    with OFFSET, the next page starts right after the sort key of the last incident
+    of the previous page, so reading a deep page costs the same as the first one.
+    
+    Args:
+        db (Session): The database session.
+        limit (int, optional): Maximum number of incidents to return. Defaults to 100.
+        after (tuple[datetime, int], optional): The (created_at, id) of the last incident
+            of the previous page. Defaults to None for the first page.
+        status (str, optional): Only return incidents with this status.
+        category (str, optional): Only return incidents with this category.
+        created_from (datetime, optional): Only return incidents created at or after this time.
+        created_to (datetime, optional): Only return incidents created before this time.
+        
+    Returns:
+        list[Incident]: The incidents of the page.
+    """
+    query = _filter_incidents(select(Incident), status, category, created_from, created_to)
+    if after is not None:
+        query = query.where(tuple_(Incident.created_at, Incident.id) < tuple_(*after))
+    query = query.order_by(Incident.created_at.desc(), Incident.id.desc()).limit(limit)
+    return list(db.scalars(query))
+
+def search_incidents(
+    db: Session,
+    text: str,
+    limit: int = 100,
+    after: Optional[tuple[float, int]] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+) -> list[tuple[Incident, float]]:
+    """
+    Retrieve a page of the incidents whose title or description matches a text, best match first.
+    
+    Matches are found with the full-text index of `app.db.search`, so the cost depends
+    on the number of matching incidents rather than on the size of the table. Pages
+    are read with keyset pagination on (rank, id).
+    
+    Args:
+        db (Session): The database session.
+        text (str): The words to search for. Every word must match.
+        limit (int, optional): Maximum number of incidents to return. Defaults to 100.
+        after (tuple[float, int], optional): The (rank, id) of the last incident of the
+            previous page. Defaults to None for the first page.
+        status (str, optional): Only return incidents with this status.
+        category (str, optional): Only return incidents with this category.
+        
+    Returns:
+        list[tuple[Incident, float]]: The incidents of the page with their rank, lower being better.
+    """
+    query = search_statement(db.get_bind().dialect.name, text, after)
+    if query is None:
+        return []
+    query = _filter_incidents(query, status, category).limit(limit)
+    return [(incident, rank) for incident, rank in db.execute(query)]
+
+def iter_incidents(
+    db: Session,
+    chunk_size: int = 1000,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Iterator[list[Row]]:
+    """
+    Stream the incidents matching the listing filters, in ID order, chunk by chunk.
+    
+    Rows are read from a server-side cursor and are plain column tuples rather than
+    ORM objects, so memory usage is bounded by one chunk whatever the table size.
+    
+    Args:
+        db (Session): The database session. It must stay open while the chunks are consumed.
+        chunk_size (int, optional): Number of rows fetched per chunk. Defaults to 1000.
+        status (str, optional): Only return incidents with this status.
+        category (str, optional): Only return incidents with this category.
+        created_from (datetime, optional): Only return incidents created at or after this time.
+        created_to (datetime, optional): Only return incidents created before this time.
+        
+    Yields:
+        list[Row]: Chunks of rows with the columns of the incidents table.
+    """
+    query = _filter_incidents(select(*Incident.__table__.columns), status, category, created_from, created_to)
+    result = db.execute(query.order_by(Incident.id).execution_options(yield_per=chunk_size))
+    yield from result.partitions()
+
+def get_incident_descriptions(db: Session, incident_ids: list[int]) -> dict[int, str]:
     """
-    Update an existing incident in the database.
+    Retrieve the descriptions of several incidents with a single query.
+    
+    Args:
+        db (Session): The database session.
+        incident_ids (list[int]): The IDs of the incidents.
+        
+    Returns:
+        dict[int, str]: The description of each existing incident, keyed by incident ID.
+    """
+    rows = db.execute(
+        select(Incident.id, Incident.description).where(Incident.id.in_(incident_ids))
+    )
+    return {incident_id: description for incident_id, description in rows}
+
+def _store_incident_embeddings(db: Session, model: str, embeddings: dict[int, bytes]):
+    """
+    Insert the embeddings of several incidents with a single INSERT, without committing.
+    
+    Args:
+        db (Session): The database session.
+        model (str): The name of the model that computed the embeddings.
+        embeddings (dict[int, bytes]): The quantized embedding of each incident, keyed by incident ID.
+    """
+    if not embeddings:
+        return
+    db.execute(
+        insert(IncidentEmbedding),
+        [{"incident_id": incident_id, "model": model, "vector": vector} for incident_id, vector in embeddings.items()],
+    )
+
+def get_embedded_incident_ids(db: Session, incident_ids: list[int]) -> set[int]:
+    """
+    Tell which of several incidents already have an embedding.
+    
+    Args:
+        db (Session): The database session.
+        incident_ids (list[int]): The IDs of the incidents.
+        
+    Returns:
+        set[int]: The IDs of the incidents that have an embedding.
+    """
+    return set(db.scalars(
+        select(IncidentEmbedding.incident_id).where(IncidentEmbedding.incident_id.in_(incident_ids))
+    ))
+
+def get_incident_embedding(db: Session, incident_id: int, model: str) -> Optional[bytes]:
+    """
+    Retrieve the embedding of an incident.
+    
+    Args:
+        db (Session): The database session.
+        incident_id (int): The ID of the incident.
+        model (str): Only return an embedding computed by this model.
+        
+    Returns:
+        bytes: The quantized embedding, or None if the incident has none.
+    """
+    return db.scalar(
+        select(IncidentEmbedding.vector)
+        .where(IncidentEmbedding.incident_id == incident_id, IncidentEmbedding.model == model)
+    )
+
+def get_incident_embeddings(db: Session, model: str, after_id: int = 0, limit: int = 10000) -> list[tuple[int, int, bytes]]:
+    """
+    Retrieve a chunk of the stored embeddings, in storage order.
+    
+    Args:
+        db (Session): The database session.
+        model (str): Only return embeddings computed by this model.
+        after_id (int, optional): Only return embeddings stored after the one with this ID. Defaults to 0.
+        limit (int, optional): Maximum number of embeddings to return. Defaults to 10000.
+        
+    Returns:
+        list[tuple[int, int, bytes]]: The (embedding ID, incident ID, quantized embedding) of each embedding.
+    """
+    rows = db.execute(
+        select(IncidentEmbedding.id, IncidentEmbedding.incident_id, IncidentEmbedding.vector)
+        .where(IncidentEmbedding.id > after_id, IncidentEmbedding.model == model)
+        .order_by(IncidentEmbedding.id)
+        .limit(limit)
+    )
+    return [(row_id, incident_id, vector) for row_id, incident_id, vector in rows]
+
+def update_incident(db: Session, incident_id: int, incident: IncidentUpdate) -> Optional[Row]:
+    """
+    Update the fields of an incident that were set, without reading it first.
+    
+    The UPDATE increments the version of the incident and returns the updated row.
+    When the update carries the version it was based on, it is only applied if the
+    incident still has that version. The incident counters are only touched when the
+    status or category is set:
+    
+    - On PostgreSQL the UPDATE also returns the old status and category, read from
+      the same row locked in a subquery, and a single upsert moves the incident
+      between buckets if they changed: one or two statements.
+    - SQLite cannot return columns of another table from an UPDATE, so the incident
+      is removed from its bucket before the UPDATE and added back after it: three
+      statements.
     
     Args:
         db (Session): The database session.
         incident_id (int): The ID of the incident to update.
-        incident (IncidentUpdate): The updated incident data.
+        incident (IncidentUpdate): The updated incident data. Fields that were not set
+            keep their current value.
         
     Returns:
-        Incident: The updated incident object.
+        Row: The updated incident row, or None if the incident does not exist or no
+            longer has the expected version.
     """
-    db_incident = db.query(Incident).filter(Incident.id == incident_id).first()
-    for key, value in incident.dict().items():
-        setattr(db_incident, key, value)
+    changes = incident.model_dump(exclude_unset=True)
+    expected_version = changes.pop("version", None)
+    condition = [Incident.id == incident_id]
+    if expected_version is not None:
+        condition.append(Incident.version == expected_version)
+    if not changes:
+        return db.execute(select(*Incident.__table__.columns).where(*condition)).first()
+
+    statement = (
+        update(Incident)
+        .values(**changes, version=Incident.version + 1)
+        .returning(*Incident.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    if "status" not in changes and "category" not in changes:
+        row = db.execute(statement.where(*condition)).first()
+    elif db.get_bind().dialect.name == "postgresql":
+        old = (
+            select(Incident.id, Incident.status, Incident.category)
+            .where(Incident.id == incident_id)
+            .with_for_update()
+            .subquery("old")
+        )
+        row = db.execute(
+            statement.where(*condition, Incident.id == old.c.id)
+            .returning(old.c.status.label("old_status"), old.c.category.label("old_category"))
+        ).first()
+        if row is not None:
+            move_incident(db, row.created_at, (row.old_status, row.old_category), (row.status, row.category))
+    else:
+        count_incidents(db, [incident_id], -1)
+        row = db.execute(statement.where(*condition)).first()
+        count_incidents(db, [incident_id], 1)
     db.commit()
-    db.refresh(db_incident)
-    return db_incident
+    return row
+
+def _set_incident_categories(db: Session, categories: dict[int, str]) -> int:
+    """
+    Issue the single UPDATE setting the category of several incidents, without committing.
+    
+    Args:
+        db (Session): The database session.
+        categories (dict[int, str]): The new category of each incident, keyed by incident ID.
+        
+    Returns:
+        int: The number of updated incidents.
+    """
+    if not categories:
+        return 0
+    count_incidents(db, list(categories), -1)
+    result = db.execute(
+        update(Incident)
+        .where(Incident.id.in_(categories))
+        .values(category=case(categories, value=Incident.id), version=Incident.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    count_incidents(db, list(categories), 1)
+    return result.rowcount
+
+def update_incident_categories(
+    db: Session,
+    categories: dict[int, str],
+    scores: Optional[dict[int, tuple[str, dict[str, float], Optional[float]]]] = None,
+    labels: Optional[list[str]] = None,
+):
+    """
+    Set the category of several incidents with a single UPDATE statement.
+    
+    The new categories are applied through a CASE expression keyed on the incident ID,
+    so a whole classification batch costs one round trip and one commit.
+    
+    Args:
+        db (Session): The database session.
+        categories (dict[int, str]): The new category of each incident, keyed by incident ID.
+        scores (dict, optional): The classification scores of the incidents, stored in the same
+            transaction. See `_store_incident_scores`.
+        labels (list[str], optional): The candidate labels the scores refer to.
+        
+    Returns:
+        int: The number of updated incidents.
+    """
+    updated = _set_incident_categories(db, categories)
+    if scores:
+        _store_incident_scores(db, labels, scores)
+    db.commit()
+    return updated
+
+def _label_set_id(db: Session, labels: list[str]) -> int:
+    """
+    Return the ID of a label set, storing the label set first if needed.
+    
+    Args:
+        db (Session): The database session.
+        labels (list[str]): The candidate labels, in score order.
+        
+    Returns:
+        int: The ID of the label set.
+    """
+    encoded = json.dumps(list(labels))
+    query = select(ClassificationLabelSet.id).where(ClassificationLabelSet.labels == encoded)
+    label_set_id = db.scalar(query)
+    if label_set_id is None:
+        try:
+            # Another worker may store the same label set concurrently
+            with db.begin_nested():
+                db.execute(insert(ClassificationLabelSet).values(labels=encoded))
+        except IntegrityError:
+            pass
+        label_set_id = db.scalar(query)
+    return label_set_id
+
+def _store_incident_scores(
+    db: Session, labels: list[str], scores: dict[int, tuple[str, dict[str, float], Optional[float]]]
+):
+    """
+    Store the classification scores of several incidents, without committing.
+    
+    The scores replace the ones previously stored for the incidents. They are stored as
+    float16 values in the order of `labels`; labels missing from the scores of an
+    incident, such as labels a model was not trained on, get a score of 0.
+    
+    Args:
+        db (Session): The database session.
+        labels (list[str]): The candidate labels the scores refer to.
+        scores (dict[int, tuple[str, dict[str, float], Optional[float]]]): The (model identifier,
+            probability of each label, inference time in milliseconds) of each incident,
+            keyed by incident ID.
+    """
+    if not scores:
+        return
+    label_set_id = _label_set_id(db, labels)
+    db.execute(
+        delete(IncidentClassification)
+        .where(IncidentClassification.incident_id.in_(scores))
+        .execution_options(synchronize_session=False)
+    )
+    rows = []
+    for incident_id, (model, probabilities, inference_ms) in scores.items():
+        vector = np.array([probabilities.get(label, 0.0) for label in labels], dtype=np.float16)
+        rows.append({
+            "incident_id": incident_id,
+            "label_set_id": label_set_id,
+            "model": model,
+            "scores": vector.tobytes(),
+            "top_score": max(probabilities.values()),
+            "inference_ms": inference_ms,
+            "classified_at": datetime.utcnow(),
+        })
+    db.execute(insert(IncidentClassification), rows)
+
+def get_incident_scores(db: Session, incident_id: int) -> Optional[dict]:
+    """
+    Retrieve the stored classification scores of an incident.
+    
+    Args:
+        db (Session): The database session.
+        incident_id (int): The ID of the incident.
+        
+    Returns:
+        dict: The model identifier, the probability of each label, the top score, the
+            inference time in milliseconds and the classification time, or None if the
+            incident has no stored scores.
+    """
+    row = db.execute(
+        select(IncidentClassification, ClassificationLabelSet.labels)
+        .join(ClassificationLabelSet, ClassificationLabelSet.id == IncidentClassification.label_set_id)
+        .where(IncidentClassification.incident_id == incident_id)
+    ).first()
+    if row is None:
+        return None
+    classification, labels = row
+    values = np.frombuffer(classification.scores, dtype=np.float16).tolist()
+    return {
+        "model": classification.model,
+        "scores": dict(zip(json.loads(labels), values)),
+        "top_score": classification.top_score,
+        "inference_ms": classification.inference_ms,
+        "classified_at": classification.classified_at,
+    }
+
+def get_rescore_incident_ids(
+    db: Session,
+    labels: list[str],
+    margin: float,
+    after_id: int = 0,
+    limit: int = 1000,
+    include_unscored: bool = False,
+) -> list[int]:
+    """
+    Retrieve a chunk of the incidents to reclassify after the label set changed, in ID order.
+    
+    An incident is reclassified if its category is not one of the labels anymore, or
+    if its stored scores refer to another label set and its top score is below the
+    margin. Incidents with an active classification job are skipped.
+    
+    Args:
+        db (Session): The database session.
+        labels (list[str]): The current candidate labels.
+        margin (float): Top score below which an incident is reclassified.
+        after_id (int, optional): Only return incidents with a greater ID. Defaults to 0.
+        limit (int, optional): Maximum number of IDs to return. Defaults to 1000.
+        include_unscored (bool, optional): Also reclassify the categorized incidents that
+            have no stored scores. Defaults to False.
+        
+    Returns:
+        list[int]: The IDs of the incidents to reclassify.
+    """
+    uncertain = (
+        select(IncidentClassification.incident_id)
+        .join(ClassificationLabelSet, ClassificationLabelSet.id == IncidentClassification.label_set_id)
+        .where(IncidentClassification.incident_id == Incident.id)
+        .where(ClassificationLabelSet.labels != json.dumps(list(labels)))
+        .where(IncidentClassification.top_score < margin)
+        .exists()
+    )
+    conditions = [Incident.category.not_in(labels), uncertain]
+    if include_unscored:
+        conditions.append(
+            ~select(IncidentClassification.incident_id)
+            .where(IncidentClassification.incident_id == Incident.id)
+            .exists()
+        )
+    query = (
+        select(Incident.id)
+        .where(Incident.id > after_id)
+        .where(Incident.category.is_not(None), Incident.category != PENDING_CATEGORY)
+        .where(or_(*conditions))
+        .where(
+            ~select(ClassificationJob.id)
+            .where(ClassificationJob.incident_id == Incident.id)
+            .where(ClassificationJob.state.in_([ClassificationJob.QUEUED, ClassificationJob.RUNNING]))
+            .exists()
+        )
+        .order_by(Incident.id)
+        .limit(limit)
+    )
+    return list(db.scalars(query))
+
+def enqueue_classification_jobs(db: Session, incident_ids: list[int]):
+    """
+    Queue classification jobs for several incidents with a single INSERT.
+    
+    Args:
+        db (Session): The database session.
+        incident_ids (list[int]): The IDs of the incidents to classify.
+    """
+    if not incident_ids:
+        return
+    db.execute(insert(ClassificationJob), [{"incident_id": incident_id} for incident_id in incident_ids])
+    db.commit()
+
+def claim_classification_jobs(db: Session, limit: int, lease_seconds: float, max_attempts: int) -> list[tuple[int, int, str]]:
+    """
+    Atomically claim a batch of classification jobs.
+    
+    Queued jobs, and running jobs whose lease has expired, are switched to "running"
+    with a new lease by a single UPDATE ... RETURNING statement, so concurrent workers
+    never claim the same job. On PostgreSQL the candidate rows are locked with
+    SKIP LOCKED. Abandoned jobs that have used all their attempts are marked "failed".
+    
+    Args:
+        db (Session): The database session.
+        limit (int): Maximum number of jobs to claim.
+        lease_seconds (float): Duration of the claim.
+        max_attempts (int): Number of attempts after which a job is no longer retried.
+        
+    Returns:
+        list[tuple[int, int, str]]: The (job ID, incident ID, kind) of the claimed jobs.
+    """
+    now = datetime.utcnow()
+    abandoned = and_(ClassificationJob.state == ClassificationJob.RUNNING, ClassificationJob.lease_expires_at < now)
+    db.execute(
+        update(ClassificationJob)
+        .where(abandoned, ClassificationJob.attempts >= max_attempts)
+        .values(state=ClassificationJob.FAILED, lease_expires_at=None, last_error="lease expired")
+        .execution_options(synchronize_session=False)
+    )
+    claimable = (
+        select(ClassificationJob.id)
+        .where(or_(ClassificationJob.state == ClassificationJob.QUEUED, abandoned))
+        .where(ClassificationJob.attempts < max_attempts)
+        .order_by(ClassificationJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.execute(
+        update(ClassificationJob)
+        .where(ClassificationJob.id.in_(claimable))
+        .values(
+            state=ClassificationJob.RUNNING,
+            attempts=ClassificationJob.attempts + 1,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+        )
+        .returning(ClassificationJob.id, ClassificationJob.incident_id, ClassificationJob.kind)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return [(job_id, incident_id, kind) for job_id, incident_id, kind in claimed]
+
+def complete_classification_jobs(
+    db: Session,
+    job_ids: list[int],
+    categories: dict[int, str],
+    embeddings: Optional[dict[int, bytes]] = None,
+    model: Optional[str] = None,
+    scores: Optional[dict[int, tuple[str, dict[str, float], Optional[float]]]] = None,
+    labels: Optional[list[str]] = None,
+):
+    """
+    Store the categories of a classified batch and mark its jobs as done, in one transaction.
+    
+    Args:
+        db (Session): The database session.
+        job_ids (list[int]): The IDs of the completed jobs.
+        categories (dict[int, str]): The new category of each incident, keyed by incident ID.
+        embeddings (dict[int, bytes], optional): The quantized embedding of each incident
+            embedded with the batch, keyed by incident ID.
+        model (str, optional): The name of the model that computed the embeddings.
+        scores (dict, optional): The classification scores of the incidents. See
+            `_store_incident_scores`.
+        labels (list[str], optional): The candidate labels the scores refer to.
+    """
+    _set_incident_categories(db, categories)
+    if scores:
+        _store_incident_scores(db, labels, scores)
+    if embeddings:
+        _store_incident_embeddings(db, model, embeddings)
+    db.execute(
+        update(ClassificationJob)
+        .where(ClassificationJob.id.in_(job_ids))
+        .values(state=ClassificationJob.DONE, lease_expires_at=None, last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def fail_classification_jobs(db: Session, job_ids: list[int], error: str, max_attempts: int):
+    """
+    Release the jobs of a failed batch for a later retry.
+    
+    Jobs that have used all their attempts are marked "failed" instead of being queued again.
+    
+    Args:
+        db (Session): The database session.
+        job_ids (list[int]): The IDs of the failed jobs.
+        error (str): The error message to record.
+        max_attempts (int): Number of attempts after which a job is no longer retried.
+    """
+    db.execute(
+        update(ClassificationJob)
+        .where(ClassificationJob.id.in_(job_ids))
+        .values(
+            state=case(
+                (ClassificationJob.attempts >= max_attempts, ClassificationJob.FAILED),
+                else_=ClassificationJob.QUEUED,
+            ),
+            lease_expires_at=None,
+            last_error=error,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def count_classification_jobs(db: Session) -> dict[str, int]:
+    """
+    Count the classification jobs in each state.
+    
+    Args:
+        db (Session): The database session.
+        
+    Returns:
+        dict[str, int]: The number of jobs, keyed by state.
+    """
+    rows = db.execute(
+        select(ClassificationJob.state, func.count()).group_by(ClassificationJob.state)
+    )
+    return {state: count for state, count in rows}
+
+def cancel_classification_jobs(db: Session, incident_ids: list[int]):
+    """
+    Mark the outstanding classification jobs of several incidents as done.
+    
+    Used when the incidents have been classified by other means, such as a backfill.
+    Their embedding-only jobs are left queued, since classifying an incident does not
+    embed it.
+    
+    Args:
+        db (Session): The database session.
+        incident_ids (list[int]): The IDs of the incidents.
+    """
+    db.execute(
+        update(ClassificationJob)
+        .where(ClassificationJob.incident_id.in_(incident_ids))
+        .where(ClassificationJob.state.in_([ClassificationJob.QUEUED, ClassificationJob.FAILED]))
+        .where(ClassificationJob.kind == ClassificationJob.CLASSIFY)
+        .values(state=ClassificationJob.DONE, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def get_categorized_incidents(db: Session, categories: list[str], limit: int = 50000) -> list[tuple[str, str]]:
+    """
+    Retrieve the descriptions and categories of the most recent categorized incidents.
+    
+    Used to train the fast classifier of the classification cascade.
+    
+    Args:
+        db (Session): The database session.
+        categories (list[str]): Only return incidents in one of these categories.
+        limit (int, optional): Maximum number of incidents to return. Defaults to 50000.
+        
+    Returns:
+        list[tuple[str, str]]: The (description, category) of each incident, most recent first.
+    """
+    rows = db.execute(
+        select(Incident.description, Incident.category)
+        .where(Incident.category.in_(categories))
+        .order_by(Incident.created_at.desc(), Incident.id.desc())
+        .limit(limit)
+    )
+    return [(description, category) for description, category in rows]
+
+def get_uncategorized_incident_ids(db: Session, after_id: int = 0, limit: int = 1000, without_active_job: bool = False) -> list[int]:
+    """
+    Retrieve a chunk of incidents that have no category yet, in ID order.
+    
+    Incidents still in the "pending" category are considered uncategorized.
+    
+    Args:
+        db (Session): The database session.
+        after_id (int, optional): Only return incidents with a greater ID. Defaults to 0.
+        limit (int, optional): Maximum number of IDs to return. Defaults to 1000.
+        without_active_job (bool, optional): Skip incidents that already have a queued or
+            running classification job. Defaults to False.
+        
+    Returns:
+        list[int]: The IDs of the uncategorized incidents.
+    """
+    query = (
+        select(Incident.id)
+        .where(Incident.id > after_id)
+        .where(or_(Incident.category.is_(None), Incident.category == PENDING_CATEGORY))
+        .order_by(Incident.id)
+        .limit(limit)
+    )
+    if without_active_job:
+        query = query.where(
+            ~select(ClassificationJob.id)
+            .where(ClassificationJob.incident_id == Incident.id)
+            .where(ClassificationJob.state.in_([ClassificationJob.QUEUED, ClassificationJob.RUNNING]))
+            .exists()
+        )
+    return list(db.scalars(query))
 
 def delete_incident(db: Session, incident_id: int):
     """
@@ -79,10 +847,59 @@ def delete_incident(db: Session, incident_id: int):
         Incident: The deleted incident object.
     """
     db_incident = db.query(Incident).filter(Incident.id == incident_id).first()
+    count_incidents(db, [incident_id], -1)
     db.delete(db_incident)
     db.commit()
     return db_incident
 
+def get_incident_stats(
+    db: Session, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None
+) -> IncidentStats:
+    """
+    Count incidents by status, by category and per creation hour.
+    
+    The counts are read from the incident counters, which are kept up to date by the
+    functions creating, updating and deleting incidents, so the cost depends on the
+    number of hours and distinct statuses and categories rather than on the number of
+    incidents. Counts are per whole hour: `created_from` is rounded down to the hour.
+    
+    Args:
+        db (Session): The database session.
+        created_from (datetime, optional): Only count incidents created at or after this hour.
+        created_to (datetime, optional): Only count incidents created in hours starting before this time.
+        
+    Returns:
+        IncidentStats: The total and the counts by status, by category and per hour.
+    """
+    by_status, by_category, per_hour = {}, {}, {}
+    for hour, status, category, count in get_counters(db, created_from, created_to):
+        by_status[status] = by_status.get(status, 0) + count
+        by_category[category or None] = by_category.get(category or None, 0) + count
+        per_hour[hour] = per_hour.get(hour, 0) + count
+    return IncidentStats(
+        total=sum(by_status.values()),
+        by_status=[{"status": status, "count": count} for status, count in by_status.items() if count],
+        by_category=[{"category": category, "count": count} for category, count in by_category.items() if count],
+        per_hour=[{"hour": hour, "count": count} for hour, count in per_hour.items() if count],
+    )
+
+def rebuild_incident_counters(db: Session) -> int:
+    """
+    Recompute the incident counters from the incidents, in one transaction.
+    
+    Used after the counters were created on an existing database, or if they were
+    changed by writes that bypassed these functions.
+    
+    Args:
+        db (Session): The database session.
+        
+    Returns:
+        int: The number of counter buckets.
+    """
+    buckets = rebuild_counters(db)
+    db.commit()
+    return buckets
+
 def get_user_by_username(db: Session, email: str) -> str:
     """
     Retrieve a user by their email address.
@@ -115,4 +932,24 @@ def create_user(db: Session, email: str, password: str):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    invalidate_principal(email)
+    return db_user
+
+def update_user_password_hash(db: Session, user_id: int, hashed_password: str):
+    """
+    Replace the stored password hash of a user.
+    
+    Used to upgrade hashes transparently at login when the bcrypt cost changes.
+    
+    Args:
+        db (Session): The database session.
+        user_id (int): The ID of the user.
+        hashed_password (str): The new password hash.
+    """
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(hashed_password=hashed_password)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
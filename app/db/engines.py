@@ -0,0 +1,216 @@
+"""
+Database engines module.
+
+This module builds the engines of the application for a database URL (SQLite or
+PostgreSQL), and the engines of its read replicas. For SQLite files, it applies the
+connection profile selected by SQLITE_PROFILE.
+"""
+
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import QueuePool
+from app.core.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+    SQLITE_PROFILE,
+)
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+"""Connection pool settings of the engines, from `app.core.config`."""
+
+WRITER_POOL_OPTIONS = {
+    **POOL_OPTIONS,
+    "pool_size": 1,
+    "max_overflow": 0,
+}
+"""
+Pool settings of the SQLite writer engine.
+
+A single connection serializes the writes made through one engine: concurrent writers
+wait for it in the pool (up to DB_POOL_TIMEOUT) instead of contending for the file lock.
+The sync and async engines each have their own writer connection, which contend for the
+file lock with each other and with other processes, up to SQLITE_BUSY_TIMEOUT_MS.
+"""
+
+class FairQueuePool(QueuePool):
+    """
+    Queue pool handing out connections in request order.
+
+    With a single connection, a thread that returns it and immediately asks again
+    would usually take it back before the waiting threads are scheduled, starving
+    them. Checkouts here take a ticket and are served first come, first served.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._turns = threading.Condition()
+        self._next_ticket = 0
+        self._now_serving = 0
+
+    def _do_get(self):
+        with self._turns:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._now_serving:
+                self._turns.wait()
+        try:
+            return super()._do_get()
+        finally:
+            with self._turns:
+                self._now_serving += 1
+                self._turns.notify_all()
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    "cache_size": -SQLITE_CACHE_SIZE_KB,
+    "mmap_size": SQLITE_MMAP_SIZE,
+    "foreign_keys": "ON",
+}
+"""
+Pragmas applied to every connection of the "wal" SQLite profile.
+
+WAL lets readers proceed while a write is in progress, and synchronous=NORMAL is
+durable across application crashes with WAL while saving an fsync per commit.
+A negative cache_size is expressed in KiB.
+"""
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Apply SQLITE_PRAGMAS to a new SQLite connection.
+
+    Registered as a "connect" event listener, so it runs once per pooled connection.
+
+    Args:
+        dbapi_connection: The DBAPI connection.
+        connection_record: The pool record of the connection.
+    """
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def _uses_sqlite_profile(url: str, profile: str) -> bool:
+    """Tell whether a URL designates a SQLite file tuned by the "wal" profile."""
+    parsed = make_url(url)
+    return (
+        profile == "wal"
+        and parsed.get_backend_name() == "sqlite"
+        and parsed.database not in (None, "", ":memory:")
+    )
+
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "psycopg",
+}
+"""Async driver used for each supported backend."""
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a database URL to the async driver of its backend.
+
+    Args:
+        url (str): The database URL, e.g. "sqlite:///./app.db" or "postgresql://host/db".
+
+    Returns:
+        str: The same database with its async driver, e.g. "sqlite+aiosqlite:///./app.db".
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+def _connect_args(url: str) -> dict:
+    """Return the DBAPI connection arguments needed for a database URL."""
+    # SQLite connections are shared between the threads of the pool
+    return {"check_same_thread": False} if make_url(url).get_backend_name() == "sqlite" else {}
+
+def create_engines(url: str, profile: str = SQLITE_PROFILE) -> tuple[Engine, Engine]:
+    """
+    Create the writer and reader engines of a database.
+
+    For a SQLite file with the "wal" profile, the writer is a single-connection engine
+    served in request order and the reader a pooled engine, both with SQLITE_PRAGMAS.
+    Otherwise one pooled engine serves both roles.
+
+    Args:
+        url (str): The database URL.
+        profile (str, optional): The SQLite profile. Defaults to SQLITE_PROFILE.
+
+    Returns:
+        tuple[Engine, Engine]: The writer and reader engines.
+    """
+    connect_args = _connect_args(url)
+    if not _uses_sqlite_profile(url, profile):
+        engine = create_engine(url, connect_args=connect_args, **POOL_OPTIONS)
+        return engine, engine
+    writer = create_engine(url, connect_args=connect_args, poolclass=FairQueuePool, **WRITER_POOL_OPTIONS)
+    reader = create_engine(url, connect_args=connect_args, **POOL_OPTIONS)
+    for engine in (writer, reader):
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return writer, reader
+
+def create_async_engines(url: str, profile: str = SQLITE_PROFILE) -> tuple[AsyncEngine, AsyncEngine]:
+    """
+    Create the async writer and reader engines of a database.
+
+    Same layout as `create_engines`, through an async driver. The writer is a separate
+    connection from the sync writer: waiting tasks are served in order by the async
+    pool's queue, but writes through both engines are only serialized by the SQLite
+    file lock and its busy timeout.
+
+    Args:
+        url (str): The database URL, with an async driver.
+        profile (str, optional): The SQLite profile. Defaults to SQLITE_PROFILE.
+
+    Returns:
+        tuple[AsyncEngine, AsyncEngine]: The writer and reader engines.
+    """
+    if not _uses_sqlite_profile(url, profile):
+        engine = create_async_engine(url, **POOL_OPTIONS)
+        return engine, engine
+    writer = create_async_engine(url, **WRITER_POOL_OPTIONS)
+    reader = create_async_engine(url, **POOL_OPTIONS)
+    for engine in (writer, reader):
+        event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+    return writer, reader
+
+def create_replica_engines(urls: list[str]) -> list[Engine]:
+    """
+    Create the engines of the read replicas of a database.
+
+    Args:
+        urls (list[str]): The replica URLs.
+
+    Returns:
+        list[Engine]: One pooled engine per replica.
+    """
+    return [create_engine(url, connect_args=_connect_args(url), **POOL_OPTIONS) for url in urls]
+
+def create_async_replica_engines(urls: list[str]) -> list[AsyncEngine]:
+    """
+    Create the async engines of the read replicas of a database.
+
+    Args:
+        urls (list[str]): The replica URLs, converted with `to_async_url`.
+
+    Returns:
+        list[AsyncEngine]: One pooled engine per replica.
+    """
+    return [create_async_engine(to_async_url(url), **POOL_OPTIONS) for url in urls]
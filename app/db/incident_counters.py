@@ -0,0 +1,151 @@
+"""
+Incident counters module.
+
+This module maintains the materialized incident counters of `IncidentCounter`. Every
+adjustment is a single INSERT ... SELECT ... GROUP BY ... ON CONFLICT statement that
+counts the affected incidents in the database and adds the result to their buckets,
+so that a batch of incidents costs one statement whatever its size. When the old and
+new buckets of an incident are already known, `move_incident` adjusts both with one
+upsert of literal values instead. The functions run inside the caller's transaction
+and never commit.
+"""
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+from app.models.incident import Incident
+from app.models.incident_counter import IncidentCounter
+
+class hour_bucket(FunctionElement):
+    """SQL expression truncating a timestamp to the start of its hour."""
+
+    type = DateTime()
+    name = "hour_bucket"
+    inherit_cache = True
+
+@compiles(hour_bucket)
+def _compile_hour_bucket(element, compiler, **kw):
+    return f"date_trunc('hour', {compiler.process(element.clauses, **kw)})"
+
+@compiles(hour_bucket, "sqlite")
+def _compile_hour_bucket_sqlite(element, compiler, **kw):
+    # Same text format as the DateTime values stored by SQLAlchemy, so buckets compare equal
+    return f"strftime('%Y-%m-%d %H:00:00.000000', {compiler.process(element.clauses, **kw)})"
+
+def _counted_incidents(sign: int, incident_ids: Optional[list[int]] = None):
+    """
+    Build the SELECT counting incidents per bucket.
+
+    Args:
+        sign (int): 1 to add the incidents to their buckets, -1 to remove them.
+        incident_ids (list[int], optional): The incidents to count. Defaults to all of them.
+
+    Returns:
+        Select: The bucket columns and the signed count of each bucket.
+    """
+    bucket = (
+        hour_bucket(Incident.created_at),
+        func.coalesce(Incident.status, ""),
+        func.coalesce(Incident.category, ""),
+    )
+    query = select(*bucket, func.count() * sign).group_by(*bucket)
+    # A WHERE clause is required for INSERT ... SELECT ... ON CONFLICT on SQLite
+    return query.where(Incident.id.in_(incident_ids) if incident_ids is not None else Incident.id.isnot(None))
+
+def count_incidents(db: Session, incident_ids: list[int], sign: int):
+    """
+    Add incidents to the counters of their current buckets, or remove them.
+
+    Call with -1 before changing the status or category of incidents, or deleting
+    them, and with 1 after creating or changing them.
+
+    Args:
+        db (Session): The database session.
+        incident_ids (list[int]): The IDs of the incidents.
+        sign (int): 1 to add the incidents, -1 to remove them.
+    """
+    if not incident_ids:
+        return
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(IncidentCounter).from_select(
+        ["hour", "status", "category", "count"], _counted_incidents(sign, incident_ids)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["hour", "status", "category"],
+        set_={"count": IncidentCounter.count + statement.excluded["count"]},
+    )
+    db.execute(statement)
+
+def move_incident(
+    db: Session,
+    created_at: datetime,
+    old: tuple[Optional[str], Optional[str]],
+    new: tuple[Optional[str], Optional[str]],
+):
+    """
+    Move one incident from the counter of its old bucket to the counter of its new one.
+
+    Does nothing when the status and category did not change.
+
+    Args:
+        db (Session): The database session.
+        created_at (datetime): The creation time of the incident.
+        old (tuple[str, str]): The status and category before the change.
+        new (tuple[str, str]): The status and category after the change.
+    """
+    old, new = tuple(value or "" for value in old), tuple(value or "" for value in new)
+    if old == new:
+        return
+    hour = created_at.replace(minute=0, second=0, microsecond=0)
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(IncidentCounter).values([
+        {"hour": hour, "status": old[0], "category": old[1], "count": -1},
+        {"hour": hour, "status": new[0], "category": new[1], "count": 1},
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=["hour", "status", "category"],
+        set_={"count": IncidentCounter.count + statement.excluded["count"]},
+    )
+    db.execute(statement)
+
+def rebuild_counters(db: Session) -> int:
+    """
+    Recompute every counter from the incidents.
+
+    Args:
+        db (Session): The database session.
+
+    Returns:
+        int: The number of buckets.
+    """
+    db.execute(delete(IncidentCounter))
+    result = db.execute(
+        insert(IncidentCounter).from_select(["hour", "status", "category", "count"], _counted_incidents(1))
+    )
+    return result.rowcount
+
+def get_counters(
+    db: Session, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None
+) -> list[tuple[datetime, str, str, int]]:
+    """
+    Read the non-empty counters of a range of creation hours.
+
+    Args:
+        db (Session): The database session.
+        created_from (datetime, optional): Start of the range, rounded down to the hour.
+        created_to (datetime, optional): End of the range (exclusive).
+
+    Returns:
+        list[tuple[datetime, str, str, int]]: The hour, status, category and count of each bucket.
+    """
+    query = select(IncidentCounter.hour, IncidentCounter.status, IncidentCounter.category, IncidentCounter.count)
+    query = query.where(IncidentCounter.count != 0)
+    if created_from is not None:
+        query = query.where(IncidentCounter.hour >= created_from.replace(minute=0, second=0, microsecond=0))
+    if created_to is not None:
+        query = query.where(IncidentCounter.hour < created_to)
+    return [tuple(row) for row in db.execute(query.order_by(IncidentCounter.hour))]
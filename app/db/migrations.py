@@ -0,0 +1,163 @@
+"""
+Database migrations module.
+
+This module upgrades existing databases to the current schema. `Base.metadata.create_all`
+only creates missing tables, so changes to existing tables (new indexes, columns or
+auxiliary tables) are applied here as ordered, numbered migrations. The version of
+each applied migration is recorded in the "schema_migrations" table.
+
+Every migration must be idempotent, because a database freshly created by
+`create_all` already contains the objects declared on the models.
+"""
+
+from datetime import datetime
+from typing import Callable
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.db.incident_counters import rebuild_counters
+from app.db.search import create_search_index
+from app.models.classification_job import ClassificationJob
+from app.models.incident import Incident
+from app.models.incident_counter import IncidentCounter
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+"""Table recording the migrations applied to the database."""
+
+def _create_indexes(connection: Connection, table: Table, names: set[str]):
+    """
+    Create some of the indexes declared on a model table, unless they already exist.
+
+    Args:
+        connection (Connection): The connection of the migration transaction.
+        table (Table): The table the indexes are declared on.
+        names (set[str]): The names of the indexes to create.
+    """
+    for index in table.indexes:
+        if index.name in names:
+            index.create(connection, checkfirst=True)
+
+def _create_query_indexes(connection: Connection):
+    """
+    Create the composite and partial indexes for the incident and job query patterns.
+
+    Args:
+        connection (Connection): The connection of the migration transaction.
+    """
+    _create_indexes(connection, Incident.__table__, {
+        "ix_incidents_created_at_id",
+        "ix_incidents_status_created_at_id",
+        "ix_incidents_category_created_at_id",
+        "ix_incidents_status_category_created_at_id",
+        "ix_incidents_uncategorized",
+    })
+    _create_indexes(connection, ClassificationJob.__table__, {"ix_classification_jobs_state_id"})
+
+def _create_incident_counters(connection: Connection):
+    """
+    Create the incident counters table and fill it from the existing incidents.
+
+    Args:
+        connection (Connection): The connection of the migration transaction.
+    """
+    IncidentCounter.__table__.create(connection, checkfirst=True)
+    with Session(bind=connection) as session:
+        rebuild_counters(session)
+
+def _create_search_index(connection: Connection):
+    """
+    Create the full-text index of the incidents and index the existing incidents.
+
+    Args:
+        connection (Connection): The connection of the migration transaction.
+    """
+    create_search_index(connection, rebuild=True)
+
+def _rename_others_category(connection: Connection):
+    """
+    Rename the "Others" category of the former label set to "Other".
+
+    Args:
+        connection (Connection): The connection of the migration transaction.
+    """
+    renamed = connection.execute(
+        update(Incident.__table__).where(Incident.__table__.c.category == "Others").values(category="Other")
+    ).rowcount
+    if renamed:
+        with Session(bind=connection) as session:
+            rebuild_counters(session)
+
+def _add_incident_version(connection: Connection):
+    """
+    Add the version column of the incidents, used for optimistic concurrency.
+
+    Args:
+        connection (Connection): The connection of the migration transaction.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("incidents")}
+    if "version" not in columns:
+        connection.exec_driver_sql("ALTER TABLE incidents ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+def _add_classification_job_kind(connection: Connection):
+    """
+    Add the kind column of the classification jobs, telling embedding-only jobs apart.
+
+    Args:
+        connection (Connection): The connection of the migration transaction.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("classification_jobs")}
+    if "kind" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE classification_jobs ADD COLUMN kind VARCHAR NOT NULL DEFAULT 'classify'"
+        )
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "incident query indexes", _create_query_indexes),
+    (2, "incident counters", _create_incident_counters),
+    (3, "incident full-text search", _create_search_index),
+    (4, "rename Others category", _rename_others_category),
+    (5, "incident version", _add_incident_version),
+    (6, "classification job kind", _add_classification_job_kind),
+]
+"""
+Ordered list of migrations, as (version, name, function) tuples.
+
+New migrations are appended with the next version number and never reordered.
+"""
+
+def migrate(engine: Engine) -> list[int]:
+    """
+    Apply the pending migrations to a database.
+
+    Each migration runs in its own transaction together with the insertion of its
+    version, so an interrupted upgrade resumes from the first unapplied migration.
+
+    Args:
+        engine (Engine): The engine of the database to upgrade.
+
+    Returns:
+        list[int]: The versions of the migrations that were applied.
+    """
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = set(connection.scalars(select(schema_migrations.c.version)))
+
+    versions = []
+    for version, name, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as connection:
+            upgrade(connection)
+            connection.execute(
+                insert(schema_migrations).values(version=version, name=name, applied_at=datetime.utcnow())
+            )
+        versions.append(version)
+    return versions
@@ -0,0 +1,92 @@
+"""
+Connection pool metrics module.
+
+This module records checkout activity of SQLAlchemy connection pools through pool
+events, to help size DB_POOL_SIZE and DB_MAX_OVERFLOW for the actual traffic.
+"""
+
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class PoolMetrics:
+    """
+    Checkout counters of one engine's connection pool.
+
+    The time a connection is held between checkout and checkin is recorded, so that
+    the pool size needed for a request rate can be estimated (requests per second
+    times mean hold time), together with the peak number of connections in use.
+    """
+
+    def __init__(self, engine: Engine):
+        """
+        Attach the metrics to an engine.
+
+        Args:
+            engine (Engine): The engine whose pool is observed. For an async engine,
+                pass its `sync_engine`.
+        """
+        self._pool = engine.pool
+        self._lock = threading.Lock()
+        self._connects = 0
+        self._checkouts = 0
+        self._invalidations = 0
+        self._checked_out = 0
+        self._peak_checked_out = 0
+        self._hold_seconds = 0.0
+        self._max_hold_seconds = 0.0
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self._checkouts += 1
+            self._checked_out += 1
+            self._peak_checked_out = max(self._peak_checked_out, self._checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        with self._lock:
+            self._checked_out -= 1
+            self._hold_seconds += held
+            self._max_hold_seconds = max(self._max_hold_seconds, held)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self._invalidations += 1
+
+    def stats(self) -> dict:
+        """
+        Report the pool configuration and its checkout counters.
+
+        Returns:
+            dict: The pool state and counters, with hold times in milliseconds.
+        """
+        with self._lock:
+            returned = self._checkouts - self._checked_out
+            stats = {
+                "connects": self._connects,
+                "checkouts": self._checkouts,
+                "invalidations": self._invalidations,
+                "checked_out": self._checked_out,
+                "peak_checked_out": self._peak_checked_out,
+                "mean_hold_ms": self._hold_seconds / returned * 1000 if returned else 0.0,
+                "max_hold_ms": self._max_hold_seconds * 1000,
+            }
+        size = getattr(self._pool, "size", None)
+        overflow = getattr(self._pool, "overflow", None)
+        stats["pool"] = type(self._pool).__name__
+        stats["size"] = size() if callable(size) else None
+        stats["overflow"] = overflow() if callable(overflow) else None
+        return stats
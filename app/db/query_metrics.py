@@ -0,0 +1,58 @@
+"""
+Database query metrics module.
+
+This module records the number and duration of the statements executed by an engine
+through SQLAlchemy cursor events, in the application metrics registry.
+"""
+
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import metrics
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+"""Statement keywords reported as their own operation; other statements count as "OTHER"."""
+
+query_duration = metrics.histogram(
+    "db_query_duration_seconds",
+    "Duration of database statements, per engine and operation.",
+    ("engine", "operation"),
+)
+"""Latency histogram of the database statements. Its count is the number of statements."""
+
+query_errors = metrics.counter(
+    "db_query_errors_total",
+    "Database statements that raised an error, per engine.",
+    ("engine",),
+)
+"""Counter of the failed database statements."""
+
+def _operation(statement: str) -> str:
+    """Return the operation label of a SQL statement."""
+    words = statement.split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in OPERATIONS else "OTHER"
+
+def instrument_queries(engine: Engine, name: str):
+    """
+    Record the duration of every statement executed by an engine.
+
+    Args:
+        engine (Engine): The engine to observe. For an async engine, pass its `sync_engine`.
+        name (str): Value of the "engine" label.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        started = connection.info["query_started_at"].pop()
+        query_duration.observe(time.perf_counter() - started, engine=name, operation=_operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started_at") if context.connection is not None else None
+        if started:
+            started.pop()
+        query_errors.inc(engine=name)
@@ -0,0 +1,90 @@
+"""
+Routing session module.
+
+This module provides a session class that sends writes to one engine and reads to
+another, e.g. a single serialized SQLite writer connection and a pool of readers.
+"""
+
+import random
+from typing import Optional
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+class RoutingSession(Session):
+    """
+    Session routing statements between a writer engine and reader engines.
+
+    Flushes, INSERT/UPDATE/DELETE statements, SELECT ... FOR UPDATE and textual SQL
+    go to the writer. Other reads go to a reader chosen once per session. Once a
+    transaction has written, its later reads also go to the writer, so that it reads
+    its own uncommitted writes. With `sticky`, this lasts for the rest of the session,
+    for readers that may lag behind the writer.
+    """
+
+    def __init__(self, writer: Engine, readers: Optional[list[Engine]] = None, sticky: bool = True, **kwargs):
+        """
+        Initialize the session.
+
+        Args:
+            writer (Engine): The engine receiving the writes.
+            readers (list[Engine], optional): The engines serving the reads.
+                Defaults to the writer.
+            sticky (bool, optional): Whether reads stay on the writer after a commit.
+                Defaults to True; readers that see every commit immediately do not need it.
+            **kwargs: Other Session arguments.
+        """
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.readers = readers or [writer]
+        self.sticky = sticky
+        self._reader = None
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        """
+        Choose the engine executing a statement.
+
+        Args:
+            mapper: The mapper of the statement, if any.
+            clause: The statement, if any.
+            **kwargs: Other arguments passed by the ORM.
+
+        Returns:
+            Engine: The writer or a reader engine.
+        """
+        if self._wrote or self._flushing or self._is_write(clause):
+            self._wrote = True
+            return self.writer
+        if self._reader is None:
+            self._reader = random.choice(self.readers)
+        return self._reader
+
+    @staticmethod
+    def _is_write(clause) -> bool:
+        """Tell whether a statement must run on the writer."""
+        if clause is None:
+            return False
+        if isinstance(clause, UpdateBase):
+            return True
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return True
+        return not hasattr(clause, "selected_columns")
+
+    def commit(self):
+        """Commit the transaction, then route reads to the readers again unless sticky."""
+        super().commit()
+        if not self.sticky:
+            self._wrote = False
+
+    def rollback(self):
+        """Roll back the transaction, then route reads to the readers again unless sticky."""
+        super().rollback()
+        if not self.sticky:
+            self._wrote = False
+
+    def close(self):
+        """Close the session and forget the engines chosen for it."""
+        super().close()
+        self._reader = None
+        self._wrote = False
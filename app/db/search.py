@@ -0,0 +1,132 @@
+"""
+Incident full-text search module.
+
+This module maintains the full-text index over the title and description of the
+incidents and builds the ranked search queries that use it:
+
+- SQLite: an external-content FTS5 table, "incidents_fts", kept in sync with the
+  incidents table by triggers and ranked with bm25.
+- PostgreSQL: a GIN expression index over the `to_tsvector` of the title and the
+  description, ranked with ts_rank. PostgreSQL keeps the index up to date itself.
+
+Both the triggers and the index live in the database, so every write is indexed,
+including the bulk statements of `app.db.crud`. The index is created with the
+incidents table, and on existing databases by `app.db.migrations`.
+
+Search results are ordered by (rank, id), where a lower rank is a better match.
+"""
+
+import re
+from typing import Optional
+from sqlalchemy import Select, column, event, func, literal_column, select, table, tuple_
+from sqlalchemy.engine import Connection
+from app.models.incident import Incident
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS incidents_fts USING fts5("
+    "title, description, content='incidents', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS incidents_fts_insert AFTER INSERT ON incidents BEGIN "
+    "INSERT INTO incidents_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS incidents_fts_delete AFTER DELETE ON incidents BEGIN "
+    "INSERT INTO incidents_fts(incidents_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    # Status and category changes, such as classifications, do not touch the index
+    "CREATE TRIGGER IF NOT EXISTS incidents_fts_update AFTER UPDATE OF title, description ON incidents BEGIN "
+    "INSERT INTO incidents_fts(incidents_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO incidents_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+)
+"""Statements creating the SQLite FTS5 index and the triggers keeping it in sync."""
+
+POSTGRESQL_DOCUMENT = "to_tsvector('english', incidents.title || ' ' || incidents.description)"
+"""
+Text search document of an incident on PostgreSQL.
+
+Queries must use this exact expression for the planner to use the index, so it is
+rendered as literal SQL rather than with bound parameters.
+"""
+
+POSTGRESQL_SEARCH_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_incidents_search ON incidents "
+    "USING gin (to_tsvector('english', title || ' ' || description))",
+)
+"""Statements creating the PostgreSQL full-text index."""
+
+def create_search_index(connection: Connection, rebuild: bool = False):
+    """
+    Create the full-text index of the incidents, unless it already exists.
+
+    Args:
+        connection (Connection): A connection with an open transaction.
+        rebuild (bool, optional): Whether to index the existing incidents, which the
+            SQLite triggers only do for later writes. Defaults to False.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRESQL_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+    elif dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        if rebuild:
+            connection.exec_driver_sql("INSERT INTO incidents_fts(incidents_fts) VALUES ('rebuild')")
+
+@event.listens_for(Incident.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    create_search_index(connection)
+
+@event.listens_for(Incident.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    # The triggers are dropped with the table, the external-content FTS5 table is not
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS incidents_fts")
+
+def to_match_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word.
+
+    Each word is quoted, so that characters of the FTS5 query syntax in the text are
+    searched for literally instead of raising a syntax error.
+
+    Args:
+        text (str): The text typed by the user.
+
+    Returns:
+        str: The FTS5 query, empty if the text has no words.
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
+def search_statement(dialect: str, text: str, after: Optional[tuple[float, int]] = None) -> Optional[Select]:
+    """
+    Build the query selecting the incidents matching a text, with their rank.
+
+    Args:
+        dialect (str): The name of the database dialect.
+        text (str): The words to search for. Every word must match.
+        after (tuple[float, int], optional): The (rank, id) of the last incident of the
+            previous page. Defaults to None for the first page.
+
+    Returns:
+        Select: The query selecting (Incident, rank) rows, ordered from the best match,
+            or None if the text has no words to search for.
+    """
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(literal_column("'english'"), text)
+        document = literal_column(POSTGRESQL_DOCUMENT)
+        rank = -func.ts_rank(document, query)
+        statement = select(Incident, rank.label("rank")).where(document.op("@@")(query))
+    else:
+        match = to_match_query(text)
+        if not match:
+            return None
+        fts = table("incidents_fts", column("rowid"))
+        rank = func.bm25(literal_column("incidents_fts"))
+        statement = (
+            select(Incident, rank.label("rank"))
+            .select_from(fts.join(Incident.__table__, Incident.id == fts.c.rowid))
+            .where(literal_column("incidents_fts").op("MATCH")(match))
+        )
+    if after is not None:
+        statement = statement.where(tuple_(rank, Incident.id) > tuple_(*after))
+    return statement.order_by(rank, Incident.id)
@@ -5,31 +5,49 @@ This module configures the SQLAlchemy engine and session factory for database op
 It provides the core database connection functionality for the application.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from app.core.config import ASYNC_DATABASE_URL, DATABASE_REPLICA_URLS, DATABASE_URL
+from app.core.metrics import metrics
+from app.db.engines import (
+    create_async_engines,
+    create_async_replica_engines,
+    create_engines,
+    create_replica_engines,
+    to_async_url,
+)
+from app.db.pool_metrics import PoolMetrics
+from app.db.query_metrics import instrument_queries
+from app.db.routing import RoutingSession
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./incident-managment.db"
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
 """
 The database connection URL.
 
-This defines the location and type of the database. Currently configured to use SQLite
-with a local file in the application root directory.
+This defines the location and type of the primary database, from the DATABASE_URL
+setting. Defaults to SQLite with a local file in the application root directory.
 """
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine, read_engine = create_engines(SQLALCHEMY_DATABASE_URL)
 """
-SQLAlchemy engine instance.
+SQLAlchemy engine instances.
 
 The engine is the starting point for any SQLAlchemy application. It maintains
-a pool of connections to the database.
+a pool of connections to the database. `engine` receives the writes and schema
+changes, `read_engine` serves reads; they are the same engine unless the SQLite
+"wal" profile is selected, in which case `engine` holds the single writer connection
+(see `app.db.engines`).
 
-The 'check_same_thread' argument is set to False to allow SQLite to be used with
-multiple threads, which is necessary for FastAPI's asynchronous operation.
+For SQLite, the 'check_same_thread' argument is set to False to allow SQLite to be
+used with multiple threads, which is necessary for FastAPI's asynchronous operation.
 """
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = create_replica_engines(DATABASE_REPLICA_URLS)
+"""Engines of the read replicas listed in DATABASE_REPLICA_URLS."""
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession, writer=engine, readers=[read_engine], sticky=False, autocommit=False, autoflush=False
+)
 """
 SQLAlchemy session factory.
 
@@ -37,7 +55,8 @@ This factory creates new database sessions that are used for database operations
 Configuration:
 - autocommit=False: Changes must be explicitly committed
 - autoflush=False: Changes won't be automatically flushed to the database
-- bind=engine: Sessions are bound to the configured engine
+- class_=RoutingSession: Writes go to `engine`, reads to `read_engine`, which sees
+  every commit immediately (sticky=False)
 
 Usage:
     db = SessionLocal()
@@ -47,4 +66,113 @@ Usage:
         return result
     finally:
         db.close()  # Always close the session when done
-"""
\ No newline at end of file
+"""
+
+ReplicaSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    writer=engine,
+    readers=replica_engines or [read_engine],
+    sticky=bool(replica_engines),
+    autocommit=False,
+    autoflush=False,
+)
+"""
+SQLAlchemy session factory for read-only paths.
+
+Reads go to a replica chosen once per session, or to `read_engine` without replicas.
+It is only used where slightly stale data is acceptable: read-then-write operations
+use SessionLocal, so that they never update rows based on a lagging replica. Writes
+still go to the primary and, with replicas, the reads that follow them in the
+session too (sticky), so that a session always reads its own writes.
+"""
+
+ASYNC_SQLALCHEMY_DATABASE_URL = ASYNC_DATABASE_URL or to_async_url(SQLALCHEMY_DATABASE_URL)
+"""
+The database connection URL used by the async engine.
+
+Same database as SQLALCHEMY_DATABASE_URL, opened through the async driver of its
+backend (aiosqlite or psycopg), unless ASYNC_DATABASE_URL is set.
+"""
+
+async_engine, async_read_engine = create_async_engines(ASYNC_SQLALCHEMY_DATABASE_URL)
+"""
+SQLAlchemy async engine instances, laid out like `engine` and `read_engine`.
+
+Used by the API endpoints, so that a request waiting on the database releases the
+event loop instead of occupying a threadpool worker.
+"""
+
+async_replica_engines = create_async_replica_engines(DATABASE_REPLICA_URLS)
+"""Async engines of the read replicas listed in DATABASE_REPLICA_URLS."""
+
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    writer=async_engine.sync_engine,
+    readers=[async_read_engine.sync_engine],
+    sticky=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+"""
+SQLAlchemy async session factory.
+
+Configured like SessionLocal, except that objects are not expired on commit, so that
+they can be serialized after the session is committed without another round-trip.
+"""
+
+AsyncReplicaSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    writer=async_engine.sync_engine,
+    readers=[replica.sync_engine for replica in async_replica_engines] or [async_read_engine.sync_engine],
+    sticky=bool(async_replica_engines),
+    autoflush=False,
+    expire_on_commit=False,
+)
+"""Async session factory for read-only paths, configured like ReplicaSessionLocal."""
+
+named_engines = {"sync": engine, "async": async_engine.sync_engine}
+if read_engine is not engine:
+    named_engines["sync_read"] = read_engine
+    named_engines["async_read"] = async_read_engine.sync_engine
+for number, (replica, async_replica) in enumerate(zip(replica_engines, async_replica_engines)):
+    named_engines[f"sync_replica_{number}"] = replica
+    named_engines[f"async_replica_{number}"] = async_replica.sync_engine
+"""Every engine of the application, keyed by the name used in its metrics."""
+
+pool_metrics = {name: PoolMetrics(named_engine) for name, named_engine in named_engines.items()}
+"""Checkout metrics of the connection pool of each engine."""
+
+if metrics.enabled:
+    for name, named_engine in named_engines.items():
+        instrument_queries(named_engine, name)
+    metrics.gauge(
+        "db_pool_checked_out_connections",
+        "Connections currently checked out of each engine's pool.",
+        lambda: {(name,): stats.stats()["checked_out"] for name, stats in pool_metrics.items()},
+        ("engine",),
+    )
+
+async def get_async_db():
+    """
+    Create and yield an async database session.
+    
+    This dependency creates a new session for each request and closes it after the
+    request is completed.
+    
+    Yields:
+        AsyncSession: A SQLAlchemy async database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_replica_db():
+    """
+    Create and yield an async database session reading from the replicas.
+
+    Used by the read-only endpoints instead of `get_async_db`.
+
+    Yields:
+        AsyncSession: A SQLAlchemy async database session.
+    """
+    async with AsyncReplicaSessionLocal() as db:
+        yield db
@@ -0,0 +1,76 @@
+"""
+Classification job model module.
+
+This module defines the ClassificationJob database model, the durable queue of
+incidents waiting to be classified.
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.db.base import Base
+
+class ClassificationJob(Base):
+    """
+    Classification job database model.
+
+    A job is created together with its incident and survives restarts and crashes.
+    Workers claim jobs in batches by setting them to "running" with a lease; a job
+    whose lease expires before it completes is claimed again, until it runs out of
+    attempts and is marked "failed".
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    CLASSIFY = "classify"
+    EMBED = "embed"
+
+    __tablename__ = "classification_jobs"
+    """Table name for the classification jobs model in the database."""
+
+    __table_args__ = (
+        Index("ix_classification_jobs_state_id", "state", "id"),
+    )
+    """Index used by workers to claim the oldest queued or running jobs."""
+
+    id = Column(Integer, primary_key=True, index=True)
+    """Primary key for the job record."""
+
+    incident_id = Column(Integer, ForeignKey("incidents.id", ondelete="CASCADE"), nullable=False, index=True)
+    """ID of the incident to classify."""
+
+    kind = Column(String, nullable=False, default=CLASSIFY, server_default=CLASSIFY)
+    """
+    Work to do on the incident.
+
+    "classify" classifies the incident, and embeds it when embeddings are enabled.
+    "embed" only embeds it, for incidents whose category came from the classification cache.
+    """
+
+    state = Column(String, nullable=False, default=QUEUED)
+    """
+    Current state of the job.
+
+    One of "queued", "running", "done" or "failed".
+    """
+
+    attempts = Column(Integer, nullable=False, default=0)
+    """Number of times the job has been claimed by a worker."""
+
+    lease_expires_at = Column(DateTime, nullable=True)
+    """
+    Expiration time of the current claim.
+
+    A running job whose lease has expired is considered abandoned and can be claimed again.
+    """
+
+    last_error = Column(String, nullable=True)
+    """Error message of the last failed attempt, if any."""
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    """Timestamp when the job was created."""
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    """Timestamp when the job was last updated."""
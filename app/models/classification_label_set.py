@@ -0,0 +1,26 @@
+"""
+Classification label set model module.
+
+This module defines the ClassificationLabelSet database model, the candidate label
+lists the stored classification scores refer to.
+"""
+
+from sqlalchemy import Column, Integer, String
+from app.db.base import Base
+
+class ClassificationLabelSet(Base):
+    """
+    Classification label set database model.
+
+    Stored once per distinct list of candidate labels, so that each classification
+    only stores the scores, in the order of the labels of its set.
+    """
+
+    __tablename__ = "classification_label_sets"
+    """Table name for the classification label sets model in the database."""
+
+    id = Column(Integer, primary_key=True)
+    """Primary key for the label set record."""
+
+    labels = Column(String, nullable=False, unique=True)
+    """The candidate labels, as a JSON list, in score order."""
@@ -4,10 +4,13 @@ Incident model module.
 This module defines the Incident database model for storing and managing incident records.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
 from datetime import datetime
 from app.db.base import Base
 
+PENDING_CATEGORY = "pending"
+"""Category given to incidents created while the classification model is not ready yet."""
+
 class Incident(Base):
     """
     Incident database model.
@@ -20,6 +23,31 @@ class Incident(Base):
     __tablename__ = "incidents"
     """Table name for the incidents model in the database."""
 
+    __table_args__ = (
+        Index("ix_incidents_created_at_id", "created_at", "id"),
+        Index("ix_incidents_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_incidents_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_incidents_status_category_created_at_id", "status", "category", "created_at", "id"),
+        Index(
+            "ix_incidents_uncategorized",
+            "id",
+            sqlite_where=text(f"category IS NULL OR category = '{PENDING_CATEGORY}'"),
+            postgresql_where=text(f"category IS NULL OR category = '{PENDING_CATEGORY}'"),
+        ),
+    )
+    """
+    Indexes covering the query patterns of the API.
+    
+    - (created_at, id): recent-first listing and its keyset pagination.
+    - (status, created_at, id) and (category, created_at, id): the listing filtered
+      by status or by category.
+    - (status, category, created_at, id): triage of open incidents by category.
+    - Partial index on id for the uncategorized backlog, restricted to incidents
+      without a category or still "pending", so it stays small.
+    
+    Existing databases receive these indexes through `app.db.migrations`.
+    """
+
     id = Column(Integer, primary_key=True, index=True)
     """
     Primary key for the incident record.
@@ -69,4 +97,12 @@ class Incident(Base):
     Timestamp when the incident was last updated.
     
     Automatically set to the current UTC time when the incident is created or updated.
+    """
+    
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
+    """
+    Version of the incident, for optimistic concurrency.
+    
+    Incremented by every update of the status or the category, including classifications.
+    An update made with an expected version is only applied if the incident still has it.
     """
\ No newline at end of file
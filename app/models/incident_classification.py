@@ -0,0 +1,43 @@
+"""
+Incident classification model module.
+
+This module defines the IncidentClassification database model, the scores behind
+the category of each classified incident.
+"""
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, LargeBinary, String
+from datetime import datetime
+from app.db.base import Base
+
+class IncidentClassification(Base):
+    """
+    Incident classification database model.
+
+    Holds the latest classification of an incident by a model: the probability of
+    every candidate label, stored as float16 values in the order of the labels of
+    its label set (2 bytes per label), the top score and the inference time.
+    """
+
+    __tablename__ = "incident_classifications"
+    """Table name for the incident classifications model in the database."""
+
+    incident_id = Column(Integer, ForeignKey("incidents.id", ondelete="CASCADE"), primary_key=True)
+    """ID of the classified incident."""
+
+    label_set_id = Column(Integer, ForeignKey("classification_label_sets.id"), nullable=False, index=True)
+    """ID of the label set the scores refer to."""
+
+    model = Column(String, nullable=False)
+    """Identifier of the model that computed the scores."""
+
+    scores = Column(LargeBinary, nullable=False)
+    """Probability of each label of the label set, as float16 bytes."""
+
+    top_score = Column(Float, nullable=False)
+    """Probability of the assigned category, used to select the incidents to rescore."""
+
+    inference_ms = Column(Float, nullable=True)
+    """Inference time of the incident, in milliseconds: its share of the time of its batch."""
+
+    classified_at = Column(DateTime, default=datetime.utcnow)
+    """Timestamp when the incident was classified."""
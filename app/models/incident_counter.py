@@ -0,0 +1,34 @@
+"""
+Incident counter model module.
+
+This module defines the IncidentCounter database model, the materialized counts of
+incidents behind the dashboard statistics.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String
+from app.db.base import Base
+
+class IncidentCounter(Base):
+    """
+    Incident counter database model.
+
+    Holds the number of existing incidents created in an hour with a given status and
+    category. The counters are adjusted in the transactions that create, update or
+    delete incidents, so that statistics are read from one row per bucket instead of
+    scanning the incidents.
+    """
+
+    __tablename__ = "incident_counters"
+    """Table name for the incident counters model in the database."""
+
+    hour = Column(DateTime, primary_key=True)
+    """Creation hour of the counted incidents, truncated to the start of the hour."""
+
+    status = Column(String, primary_key=True)
+    """Status of the counted incidents."""
+
+    category = Column(String, primary_key=True)
+    """Category of the counted incidents, or an empty string for uncategorized incidents."""
+
+    count = Column(Integer, nullable=False, default=0)
+    """Number of incidents in the bucket."""
@@ -0,0 +1,38 @@
+"""
+Incident embedding model module.
+
+This module defines the IncidentEmbedding database model, the sentence embeddings
+used to find duplicate and similar incidents.
+"""
+
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String
+from app.db.base import Base
+
+class IncidentEmbedding(Base):
+    """
+    Incident embedding database model.
+
+    Each incident is embedded once, by the encoder of the classification model. The
+    vector is stored quantized to int8 (one byte per dimension), scaled so that its
+    largest component is 127; cosine similarities are unaffected by the scale.
+    """
+
+    __tablename__ = "incident_embeddings"
+    """Table name for the incident embeddings model in the database."""
+
+    id = Column(Integer, primary_key=True)
+    """
+    Primary key for the embedding record.
+
+    Increases with every stored embedding, so that the in-process similarity indexes
+    load the embeddings stored by other processes incrementally.
+    """
+
+    incident_id = Column(Integer, ForeignKey("incidents.id", ondelete="CASCADE"), nullable=False, unique=True)
+    """ID of the embedded incident."""
+
+    model = Column(String, nullable=False)
+    """Name of the model that computed the embedding. Embeddings of other models are ignored."""
+
+    vector = Column(LargeBinary, nullable=False)
+    """Quantized embedding, as int8 bytes."""
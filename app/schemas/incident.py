@@ -5,7 +5,7 @@ This module defines Pydantic models for incident data validation, serialization,
 These schemas are used for API request/response handling and data validation.
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
 from typing import Optional
 
@@ -36,22 +36,38 @@ class IncidentUpdate(BaseModel):
     Schema for incident updates.
     
     This schema is used for validating data when updating an existing incident.
-    It contains only the fields that can be updated.
+    It contains only the fields that can be updated. Updates are partial: only the
+    fields that were set are applied, the others keep their current value.
     """
-    status: str = "new"
+    status: Optional[str] = None
     """
-    Current status of the incident.
+    New status of the incident.
     
-    Defaults to "new" if not provided during update.
+    Left unchanged if not provided. Cannot be null.
     """
     
-    category: Optional[str]
+    category: Optional[str] = None
+    """
+    New category of the incident.
+    
+    Left unchanged if not provided. Can be set to null/None.
+    """
+    
+    version: Optional[int] = None
     """
-    Category of the incident.
+    Version of the incident the update was based on.
     
-    Optional field that can be null/None.
+    If provided, the update is rejected when the incident has been modified since.
     """
 
+    @field_validator("status")
+    @classmethod
+    def status_not_null(cls, value: Optional[str]) -> str:
+        """Reject an explicit null status."""
+        if value is None:
+            raise ValueError("status cannot be null")
+        return value
+
 class IncidentOut(IncidentBase):
     """
     Schema for incident responses.
@@ -73,6 +89,9 @@ class IncidentOut(IncidentBase):
     
     category: Optional[str]
     """Category of the incident. Can be null/None."""
+    
+    version: int
+    """Version of the incident, to send back with updates."""
 
     class Config:
         """Pydantic configuration for the schema."""
@@ -81,4 +100,139 @@ class IncidentOut(IncidentBase):
         Enables ORM mode (renamed to from_attributes in Pydantic v2).
         
         This allows the model to read data from SQLAlchemy ORM models.
-        """
\ No newline at end of file
+        """
+
+class SimilarIncident(BaseModel):
+    """
+    Schema for an incident similar to another one.
+    
+    The similarity is the cosine similarity of the sentence embeddings of the two
+    descriptions, between -1 and 1.
+    """
+    id: int
+    """Unique identifier of the similar incident."""
+    
+    title: str
+    """Title of the similar incident."""
+    
+    status: str
+    """Current status of the similar incident."""
+    
+    category: Optional[str]
+    """Category of the similar incident. Can be null/None."""
+    
+    created_at: datetime
+    """Timestamp when the similar incident was created."""
+    
+    score: float
+    """Similarity with the query incident."""
+
+class IncidentScores(BaseModel):
+    """
+    Schema for the classification scores of an incident.
+    
+    The scores are the probabilities computed by the model for each candidate label
+    of the label set the incident was classified with.
+    """
+    incident_id: int
+    """Unique identifier of the incident."""
+    
+    model: str
+    """Identifier of the model that computed the scores."""
+    
+    scores: dict[str, float]
+    """Probability of each candidate label."""
+    
+    top_score: float
+    """Probability of the assigned category."""
+    
+    inference_ms: Optional[float]
+    """Inference time of the incident, in milliseconds."""
+    
+    classified_at: datetime
+    """Timestamp when the incident was classified."""
+
+class IncidentCreated(IncidentOut):
+    """
+    Schema for incident creation responses.
+    
+    Includes the likely duplicates of the new incident, when they were requested.
+    """
+    duplicates: list[SimilarIncident] = []
+    """Existing incidents similar enough to be duplicates, most similar first."""
+
+class BulkIncidentResult(BaseModel):
+    """
+    Schema for the result of one item of a bulk incident creation.
+    
+    Exactly one of `id` and `error` is set.
+    """
+    index: int
+    """Position of the item in the request."""
+    
+    id: Optional[int] = None
+    """Identifier of the created incident, if the item was valid."""
+    
+    category: Optional[str] = None
+    """Category of the created incident, when it was already known or is pending."""
+    
+    error: Optional[str] = None
+    """Validation error of the item, if it was rejected."""
+
+class BulkIncidentResponse(BaseModel):
+    """
+    Schema for bulk incident creation responses.
+    
+    Invalid items are reported individually and do not prevent the valid ones
+    from being created.
+    """
+    created: int
+    """Number of incidents created."""
+    
+    failed: int
+    """Number of items rejected."""
+    
+    results: list[BulkIncidentResult]
+    """Result of each item, in request order."""
+
+class StatusCount(BaseModel):
+    """Number of incidents with a status."""
+    status: str
+    """Status of the incidents."""
+    
+    count: int
+    """Number of incidents."""
+
+class CategoryCount(BaseModel):
+    """Number of incidents with a category."""
+    category: Optional[str]
+    """Category of the incidents, or null for uncategorized incidents."""
+    
+    count: int
+    """Number of incidents."""
+
+class HourCount(BaseModel):
+    """Number of incidents created in an hour."""
+    hour: datetime
+    """Start of the hour."""
+    
+    count: int
+    """Number of incidents."""
+
+class IncidentStats(BaseModel):
+    """
+    Schema for incident statistics responses.
+    
+    Counts incidents by their current status and category, and by creation hour.
+    """
+    total: int
+    """Number of incidents."""
+    
+    by_status: list[StatusCount]
+    """Number of incidents per status."""
+    
+    by_category: list[CategoryCount]
+    """Number of incidents per category."""
+    
+    per_hour: list[HourCount]
+    """Number of incidents created per hour, in chronological order."""
@@ -6,6 +6,7 @@ These schemas are used for API request/response handling and user management ope
 """
 
 from pydantic import BaseModel
+from typing import Optional
 
 class UserCreate(BaseModel):
     """
@@ -27,4 +28,26 @@ class UserCreate(BaseModel):
     
     This field is used only during user creation. The password is hashed
     before storage and the plain text version is never stored in the database.
-    """
\ No newline at end of file
+    """
+
+class Principal(BaseModel):
+    """
+    Schema for the authenticated user of a request.
+    
+    This is the identity returned by the authentication dependency. It holds no
+    credentials, so it can be cached between requests or rebuilt from token claims.
+    """
+    id: Optional[int] = None
+    """
+    Unique identifier of the user.
+    
+    Can be None in stateless mode for tokens issued before the claim was added.
+    """
+    
+    email: str
+    """User's email address, the subject of the access token."""
+    
+    class Config:
+        """Pydantic configuration for the schema."""
+        from_attributes = True
+        """Allows the principal to be read from the User ORM model."""
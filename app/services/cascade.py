@@ -0,0 +1,153 @@
+"""
+Classification cascade module.
+
+This module puts the fast classifier of `app.services.fast_classifier` in front of
+the zero-shot model. Each batch is first classified by the fast classifier; the
+incidents it classifies with a probability below `CASCADE_THRESHOLD` are escalated
+to the zero-shot model in one batched call. Since most incidents are obvious, most
+never reach the large model.
+
+A small random fraction of the confident fast classifications is escalated too, to
+measure how often the two models agree. The escalation and agreement counters are
+reported by the classification stats and the metrics.
+"""
+
+import logging
+import os
+import random
+import threading
+from typing import Callable, Optional
+from app.core.config import CASCADE_AUDIT_RATE, CASCADE_MODEL_PATH, CASCADE_THRESHOLD
+from app.core.metrics import metrics
+from app.services.classifier import CANDIDATE_LABELS, Classification, as_classification
+from app.services.fast_classifier import TfidfLogisticClassifier
+
+logger = logging.getLogger(__name__)
+
+FAST_MODEL_ID = "tfidf-logistic"
+"""Model identifier stored with the scores of the fast classifier."""
+
+cascade_decisions = metrics.counter(
+    "classification_cascade_total",
+    "Incidents classified by each stage of the cascade (fast or escalated to the zero-shot model).",
+    ("stage",),
+)
+"""Counter of the incidents classified by each stage of the cascade."""
+
+cascade_audits = metrics.counter(
+    "classification_cascade_audits_total",
+    "Confident fast classifications checked against the zero-shot model, per outcome (agreed or disagreed).",
+    ("outcome",),
+)
+"""Counter of the audited fast classifications."""
+
+class CascadeClassifier:
+    """
+    Two-stage classifier: the fast classifier, then the zero-shot model when unsure.
+
+    Called like the batch classification functions it wraps, with a list of
+    descriptions, and returns their classifications.
+    """
+
+    def __init__(
+        self,
+        fast: TfidfLogisticClassifier,
+        classify_batch: Callable[[list[str]], list],
+        threshold: float = CASCADE_THRESHOLD,
+        audit_rate: float = CASCADE_AUDIT_RATE,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initialize the cascade.
+
+        Args:
+            fast (TfidfLogisticClassifier): The first-stage classifier.
+            classify_batch (Callable): Function classifying a list of descriptions with the zero-shot
+                model, returning their categories or their `Classification`s.
+            threshold (float): Probability from which a fast classification is accepted.
+            audit_rate (float): Fraction of the accepted fast classifications escalated anyway.
+            rng (random.Random, optional): Random source of the audits.
+        """
+        self.fast = fast
+        self.classify_batch = classify_batch
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._counters = {"fast_classified": 0, "escalated": 0, "audited": 0, "agreed": 0}
+
+    def __call__(self, descriptions: list[str]) -> list[Classification]:
+        """
+        Classify a batch of descriptions.
+
+        Args:
+            descriptions (list[str]): The incident description texts.
+
+        Returns:
+            list[Classification]: The classification of each description, in the same order,
+                from the model that decided it.
+        """
+        results = [
+            Classification(max(scores, key=scores.get), scores, FAST_MODEL_ID)
+            for scores in self.fast.scores(descriptions)
+        ]
+        confident = [result.scores[result.category] >= self.threshold for result in results]
+        escalated = [
+            index for index, accepted in enumerate(confident)
+            if not accepted or self._rng.random() < self.audit_rate
+        ]
+        audited = agreed = 0
+        if escalated:
+            for index, result in zip(escalated, self.classify_batch([descriptions[index] for index in escalated])):
+                result = as_classification(result)
+                if confident[index]:
+                    audited += 1
+                    agreed += results[index].category == result.category
+                results[index] = result
+
+        uncertain = len(escalated) - audited
+        with self._lock:
+            self._counters["fast_classified"] += len(descriptions) - uncertain
+            self._counters["escalated"] += uncertain
+            self._counters["audited"] += audited
+            self._counters["agreed"] += agreed
+        cascade_decisions.inc(len(descriptions) - uncertain, stage="fast")
+        cascade_decisions.inc(uncertain, stage="escalated")
+        cascade_audits.inc(agreed, outcome="agreed")
+        cascade_audits.inc(audited - agreed, outcome="disagreed")
+        return results
+
+    def counters(self) -> dict:
+        """
+        Return the decision counters of the cascade.
+
+        Returns:
+            dict: The number of incidents accepted from the fast classifier, escalated
+                because it was unsure, audited, and audited with the same category.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+def load_cascade(classify_batch: Callable[[list[str]], list], path: str = CASCADE_MODEL_PATH) -> Callable:
+    """
+    Put the trained fast classifier, if any, in front of a zero-shot classification function.
+
+    Args:
+        classify_batch (Callable): Function classifying a list of descriptions with the zero-shot model.
+        path (str): Path of the fast classifier.
+
+    Returns:
+        Callable: A `CascadeClassifier`, or `classify_batch` itself when there is no usable
+            fast classifier.
+    """
+    if not path or not os.path.exists(path):
+        return classify_batch
+    try:
+        fast = TfidfLogisticClassifier.load(path)
+    except Exception:
+        logger.exception("Failed to load the fast classifier from %s", path)
+        return classify_batch
+    if not set(fast.labels) <= set(CANDIDATE_LABELS):
+        logger.warning("Ignoring the fast classifier %s, trained on other categories", path)
+        return classify_batch
+    return CascadeClassifier(fast, classify_batch)
@@ -0,0 +1,224 @@
+"""
+Classification cache module.
+
+This module caches classification results by content, so that incidents with the same
+description are classified once. Entries are keyed by a hash of the normalized
+description, the candidate label set and the model identifier, which means that changing
+the labels or the model never serves stale categories.
+
+Two tiers are available: an in-process LRU cache, and an optional persistent SQLite file
+shared by every worker on the host and kept across restarts. Both tiers expire entries
+after a time-to-live.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import (
+    CLASSIFICATION_CACHE_PATH,
+    CLASSIFICATION_CACHE_SIZE,
+    CLASSIFICATION_CACHE_TTL_SECONDS,
+    CLASSIFIER_BACKEND,
+    CLASSIFIER_MODE,
+)
+from app.services.classifier import CANDIDATE_LABELS, MODEL_NAME
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.,;:!?\"'()[]{}-"
+
+def normalize_description(description: str) -> str:
+    """
+    Normalize a description so that near-identical texts share a cache entry.
+
+    The text is NFKC-normalized, case-folded, its whitespace collapsed and the
+    punctuation at both ends stripped, so "VPN down!" and "vpn  DOWN" match.
+
+    Args:
+        description (str): The incident description text.
+
+    Returns:
+        str: The normalized description.
+    """
+    text = unicodedata.normalize("NFKC", description).casefold()
+    return _WHITESPACE.sub(" ", text).strip(_EDGE_PUNCTUATION)
+
+class SQLiteCacheTier:
+    """
+    Persistent cache tier stored in a SQLite file.
+
+    Expired entries are ignored on read and purged periodically on write.
+    """
+
+    PURGE_EVERY = 1000
+    """Number of writes between two purges of the expired entries."""
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        """
+        Open (and create if needed) the cache file.
+
+        Args:
+            path (str): Path of the SQLite file.
+            ttl (float, optional): Lifetime of an entry in seconds. None disables expiration.
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS classification_cache ("
+            "key TEXT PRIMARY KEY, category TEXT NOT NULL, expires_at REAL)"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the category stored for a key, if present and not expired.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached category, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT category FROM classification_cache "
+                "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, category: str):
+        """
+        Store the category of a key.
+
+        Args:
+            key (str): The cache key.
+            category (str): The category to store.
+        """
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO classification_cache (key, category, expires_at) VALUES (?, ?, ?)",
+                (key, category, expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._connection.execute(
+                    "DELETE FROM classification_cache WHERE expires_at <= ?", (time.time(),)
+                )
+
+    def stats(self) -> dict:
+        """
+        Return the usage statistics of the tier.
+
+        Returns:
+            dict: Number of stored entries and hit/miss counts.
+        """
+        with self._lock:
+            size = self._connection.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0]
+            return {"size": size, "ttl_seconds": self.ttl, "hits": self.hits, "misses": self.misses}
+
+class ClassificationCache:
+    """
+    Content-addressed cache of incident categories.
+
+    Lookups go to the in-process LRU tier first, then to the persistent tier when
+    one is configured. Persistent hits are promoted to the in-process tier.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        labels: list[str],
+        maxsize: int = CLASSIFICATION_CACHE_SIZE,
+        ttl: Optional[float] = CLASSIFICATION_CACHE_TTL_SECONDS,
+        path: Optional[str] = None,
+    ):
+        """
+        Initialize the cache tiers.
+
+        Args:
+            model_id (str): Identifier of the model producing the categories.
+            labels (list[str]): The candidate labels the categories are chosen from.
+            maxsize (int): Maximum number of entries of the in-process tier.
+            ttl (float, optional): Lifetime of an entry in seconds. None disables expiration.
+            path (str, optional): Path of the persistent SQLite tier. None disables it.
+        """
+        self._namespace = "\x1f".join([model_id, *labels])
+        self.memory = TTLCache(maxsize, ttl)
+        self.persistent = SQLiteCacheTier(path, ttl) if path else None
+
+    def key(self, description: str) -> str:
+        """
+        Compute the cache key of a description.
+
+        Args:
+            description (str): The incident description text.
+
+        Returns:
+            str: The SHA-256 hex digest of the model, labels and normalized description.
+        """
+        content = f"{self._namespace}\x1e{normalize_description(description)}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, description: str) -> Optional[str]:
+        """
+        Return the cached category of a description.
+
+        Args:
+            description (str): The incident description text.
+
+        Returns:
+            Optional[str]: The cached category, or None on a miss.
+        """
+        key = self.key(description)
+        category = self.memory.get(key)
+        if category is None and self.persistent is not None:
+            category = self.persistent.get(key)
+            if category is not None:
+                self.memory.set(key, category)
+        return category
+
+    def set(self, description: str, category: str):
+        """
+        Store the category of a description in every tier.
+
+        Args:
+            description (str): The incident description text.
+            category (str): The category assigned to the description.
+        """
+        key = self.key(description)
+        self.memory.set(key, category)
+        if self.persistent is not None:
+            self.persistent.set(key, category)
+
+    def stats(self) -> dict:
+        """
+        Return the statistics of every tier.
+
+        Returns:
+            dict: The statistics of the in-process tier and, if enabled, of the persistent tier.
+        """
+        return {
+            "memory": self.memory.stats(),
+            "persistent": self.persistent.stats() if self.persistent is not None else None,
+        }
+
+classification_cache = ClassificationCache(
+    model_id=f"{MODEL_NAME}:{CLASSIFIER_BACKEND}:{CLASSIFIER_MODE}",
+    labels=CANDIDATE_LABELS,
+    path=CLASSIFICATION_CACHE_PATH,
+)
+"""Application-wide classification cache."""
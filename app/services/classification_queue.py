@@ -0,0 +1,710 @@
+"""
+Classification queue module.
+
+This module provides the micro-batching workers behind the incident classifier.
+The API stores a durable classification job together with each incident and only
+notifies the workers. Workers claim jobs from the `classification_jobs` table in
+batches, read the descriptions, classify a whole batch with a single model call and
+write the categories back with a single bulk UPDATE, along with the score of every
+label when the classification function reports them. Jobs left behind by a crash are
+claimed again once their lease expires. When an embedding function is set, the
+incidents of a batch are also embedded, and their embeddings stored in the same
+transaction as their categories.
+
+Two implementations share the same interface:
+
+- `ClassificationQueue` runs one worker thread in the API process.
+- `ClassificationWorkerPool` runs N separate worker processes, each loading the
+  model once, so CPU-heavy inference never competes with request handling.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Callable, Optional
+from app.core.config import (
+    CLASSIFICATION_JOB_LEASE_SECONDS,
+    CLASSIFICATION_JOB_MAX_ATTEMPTS,
+    CLASSIFICATION_POLL_SECONDS,
+    CLASSIFIER_MAX_BATCH_SIZE,
+    CLASSIFIER_MAX_WAIT_MS,
+    CLASSIFIER_NUM_THREADS,
+    CLASSIFIER_WORKERS,
+    INCIDENT_EMBEDDINGS,
+)
+from app.core.cache import TTLCache
+from app.core.metrics import metrics
+from app.db.crud import (
+    claim_classification_jobs,
+    complete_classification_jobs,
+    count_classification_jobs,
+    fail_classification_jobs,
+    get_embedded_incident_ids,
+    get_incident_descriptions,
+)
+from app.db.session import SessionLocal
+from app.models.classification_job import ClassificationJob
+from app.services.cascade import FAST_MODEL_ID, CascadeClassifier, cascade_audits, cascade_decisions, load_cascade
+from app.services.classification_cache import ClassificationCache, classification_cache, normalize_description
+from app.services.classifier import (
+    CANDIDATE_LABELS,
+    MODEL_NAME,
+    LazyModel,
+    as_classification,
+    embed_descriptions,
+    load_classifier,
+    model,
+    score_categories,
+)
+from app.services.similarity_index import quantize
+
+logger = logging.getLogger(__name__)
+
+CASCADE_COUNTERS = ("fast_classified", "escalated", "audited", "agreed")
+"""Counters of a `CascadeClassifier`, reported with the batching counters."""
+
+_STOP = None
+"""Sentinel telling a worker to stop. None survives pickling through process queues."""
+
+QUEUE_DEPTH_TTL_SECONDS = 5.0
+"""Time, in seconds, the job counts of the `classification_queue_depth` gauge are reused."""
+
+_queue_depth = TTLCache(maxsize=1, ttl=QUEUE_DEPTH_TTL_SECONDS)
+"""Last job counts read for the `classification_queue_depth` gauge."""
+
+batch_size = metrics.histogram(
+    "classification_batch_size",
+    "Number of incidents per classification batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+"""Size histogram of the processed classification batches."""
+
+batch_duration = metrics.histogram(
+    "classification_batch_duration_seconds",
+    "Duration of classification batches, from reading the descriptions to storing the categories.",
+)
+"""Latency histogram of the processed classification batches."""
+
+def _format_stats(counters: dict, jobs: dict) -> dict:
+    """
+    Turn raw batching counters into the figures reported by `stats`.
+
+    Args:
+        counters (dict): Raw batch, incident and timing counters, and the cascade
+            counters when a cascade classifies the batches.
+        jobs (dict): Number of classification jobs in each state.
+
+    Returns:
+        dict: Job counts, batch and incident counts, latency/throughput figures, and
+            the escalation and agreement rates of the cascade.
+    """
+    batches = counters["batches"]
+    busy_seconds = counters["busy_seconds"]
+    stats = {
+        "pending": jobs.get("queued", 0) + jobs.get("running", 0),
+        "jobs": jobs,
+        "batches": batches,
+        "failed_batches": counters["failed_batches"],
+        "incidents": counters["incidents"],
+        "last_batch_size": counters["last_batch_size"],
+        "last_batch_latency_ms": round(counters["last_batch_latency"] * 1000, 3),
+        "avg_batch_latency_ms": round(busy_seconds / batches * 1000, 3) if batches else 0.0,
+        "avg_batch_size": round(counters["incidents"] / batches, 3) if batches else 0.0,
+        "throughput_per_second": round(counters["incidents"] / busy_seconds, 3) if busy_seconds else 0.0,
+    }
+    if "escalated" in counters:
+        classified = counters["fast_classified"] + counters["escalated"]
+        stats["cascade"] = {
+            **{key: counters[key] for key in CASCADE_COUNTERS},
+            "escalation_rate": round(counters["escalated"] / classified, 3) if classified else 0.0,
+            "agreement_rate": round(counters["agreed"] / counters["audited"], 3) if counters["audited"] else None,
+        }
+    return stats
+
+def _job_counts(session_factory: Callable) -> dict:
+    """Return the number of classification jobs in each state."""
+    db = session_factory()
+    try:
+        return count_classification_jobs(db)
+    finally:
+        db.close()
+
+class ClassificationQueue:
+    """
+    Micro-batching classification queue.
+
+    When notified, the worker lets a batch fill until `max_batch_size` notifications
+    have arrived or `max_wait` seconds have elapsed, then claims up to `max_batch_size`
+    jobs at once. It also polls the job table every `poll_interval` seconds, so jobs
+    created before a restart or abandoned by another worker are picked up. Each batch
+    is classified with one call to `classify_batch` and written back to the database
+    with a single bulk UPDATE. Descriptions repeated within a batch are classified
+    once, and the results of the zero-shot model are stored in the classification cache
+    when one is set.
+    """
+
+    def __init__(
+        self,
+        classify_batch: Callable[[list[str]], list] = score_categories,
+        session_factory: Callable = SessionLocal,
+        max_batch_size: int = CLASSIFIER_MAX_BATCH_SIZE,
+        max_wait: float = CLASSIFIER_MAX_WAIT_MS / 1000,
+        cache: Optional[ClassificationCache] = None,
+        model: Optional[LazyModel] = None,
+        work_queue=None,
+        poll_interval: float = CLASSIFICATION_POLL_SECONDS,
+        lease_seconds: float = CLASSIFICATION_JOB_LEASE_SECONDS,
+        max_attempts: int = CLASSIFICATION_JOB_MAX_ATTEMPTS,
+        embed_batch: Optional[Callable[[list[str]], object]] = None,
+        embedding_model: str = MODEL_NAME,
+        labels: list[str] = CANDIDATE_LABELS,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            classify_batch (Callable): Function classifying a list of descriptions, returning their
+                categories, or their `Classification`s to also store the score of each label.
+            session_factory (Callable): Factory for the sessions used to read and store incidents.
+            max_batch_size (int): Maximum number of incidents per batch.
+            max_wait (float): Maximum time, in seconds, spent waiting for a batch to fill.
+            cache (ClassificationCache, optional): Cache receiving the classification results.
+            model (LazyModel, optional): Model warmed up when the worker starts.
+            work_queue (optional): Queue the notifications are read from. Defaults to a new `queue.Queue`.
+            poll_interval (float): Maximum time, in seconds, between two looks at the job table.
+            lease_seconds (float): Duration of a job claim before it can be claimed again.
+            max_attempts (int): Number of attempts after which a job is marked as failed.
+            embed_batch (Callable, optional): Function embedding a list of descriptions, returning
+                an array of vectors or None when embeddings are not supported. Defaults to None,
+                which disables embeddings.
+            embedding_model (str): Name of the model computing the embeddings, stored with them.
+            labels (list[str]): The candidate labels the classification scores refer to.
+        """
+        self.classify_batch = classify_batch
+        self.embed_batch = embed_batch
+        self.embedding_model = embedding_model
+        self.labels = labels
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache = cache
+        self.model = model
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._queue = work_queue if work_queue is not None else queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._counters = {
+            "batches": 0,
+            "failed_batches": 0,
+            "incidents": 0,
+            "busy_seconds": 0.0,
+            "last_batch_size": 0,
+            "last_batch_latency": 0.0,
+        }
+
+    @property
+    def is_ready(self) -> bool:
+        """bool: Whether incidents can be classified without waiting for the model."""
+        return self.model is None or self.model.is_ready
+
+    def status(self) -> dict:
+        """
+        Describe the readiness of the classification model.
+
+        Returns:
+            dict: The state of the model used by the worker.
+        """
+        if self.model is None:
+            return {"state": LazyModel.READY}
+        return self.model.status()
+
+    def start(self):
+        """Start the worker thread, and warm up the model, if not already running."""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                if self.model is not None and self.model.state == LazyModel.UNLOADED:
+                    self.model.warm_up()
+                self._worker = threading.Thread(
+                    target=self._run, name="classification-worker", daemon=True
+                )
+                self._worker.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the worker thread once the jobs that can be claimed are processed.
+
+        Args:
+            timeout (float, optional): Maximum time, in seconds, to wait for the worker.
+        """
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None and worker.is_alive():
+            self._queue.put(_STOP)
+            worker.join(timeout)
+
+    def notify(self, count: int = 1):
+        """
+        Tell the worker that new classification jobs have been stored.
+
+        The worker thread is started on first use, so notifying never blocks on the model.
+
+        Args:
+            count (int): Number of new jobs.
+        """
+        self.start()
+        for _ in range(count):
+            self._queue.put(True)
+
+    def stats(self) -> dict:
+        """
+        Return the batching counters of the queue.
+
+        Returns:
+            dict: Job counts, batch and incident counts, and latency/throughput figures.
+        """
+        jobs = _job_counts(self.session_factory)
+        with self._lock:
+            return _format_stats(self._counters, jobs)
+
+    def _run(self):
+        """Worker loop: wait for work, then claim and process batches until stopped."""
+        while True:
+            stopping = self._wait_for_work()
+            while self._claim_and_process() == self.max_batch_size:
+                pass
+            if stopping:
+                return
+
+    def _wait_for_work(self) -> bool:
+        """
+        Block until notified or until the poll interval elapses, then let a batch fill.
+
+        Returns:
+            bool: Whether a stop request was received.
+        """
+        try:
+            item = self._queue.get(timeout=self.poll_interval)
+        except queue.Empty:
+            return False
+        if item is _STOP:
+            return True
+        received = 1
+        deadline = time.monotonic() + self.max_wait
+        while received < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return True
+            received += 1
+        return False
+
+    def _claim_and_process(self) -> int:
+        """
+        Claim a batch of jobs and process it.
+
+        Returns:
+            int: The number of claimed jobs.
+        """
+        db = self.session_factory()
+        try:
+            jobs = claim_classification_jobs(db, self.max_batch_size, self.lease_seconds, self.max_attempts)
+        except Exception:
+            logger.exception("Failed to claim classification jobs")
+            return 0
+        finally:
+            db.close()
+        if jobs:
+            self._process(jobs)
+        return len(jobs)
+
+    def _process(self, batch: list[tuple[int, int, str]]):
+        """
+        Classify a batch, store the resulting categories and complete its jobs.
+
+        Incidents of embedding-only jobs are embedded but not classified. On failure,
+        the jobs are released for a later retry.
+
+        Args:
+            batch (list[tuple[int, int, str]]): The (job ID, incident ID, kind) of the jobs to process.
+        """
+        started = time.perf_counter()
+        job_ids = [job_id for job_id, _, _ in batch]
+        db = self.session_factory()
+        try:
+            descriptions = get_incident_descriptions(db, [incident_id for _, incident_id, _ in batch])
+            embedded = get_embedded_incident_ids(db, list(descriptions)) if self.embed_batch is not None else set()
+            # Release the connection while the model runs
+            db.rollback()
+            to_classify = {
+                incident_id: descriptions[incident_id]
+                for _, incident_id, kind in batch
+                if kind != ClassificationJob.EMBED and incident_id in descriptions
+            }
+            unique = {}
+            for description in to_classify.values():
+                unique.setdefault(normalize_description(description), description)
+            results = {}
+            inference_ms = None
+            if unique:
+                inference_started = time.perf_counter()
+                results = dict(zip(unique, map(as_classification, self.classify_batch(list(unique.values())))))
+                inference_ms = (time.perf_counter() - inference_started) * 1000 / len(unique)
+            if self.cache is not None:
+                # The cache namespace is the zero-shot model: answers of the fast cascade stage stay out
+                for normalized, description in unique.items():
+                    if results[normalized].model != FAST_MODEL_ID:
+                        self.cache.set(description, results[normalized].category)
+            classifications = {
+                incident_id: results[normalize_description(description)]
+                for incident_id, description in to_classify.items()
+            }
+            # Descriptions of the embedding-only jobs come after the classified ones, so
+            # that a batch without them reuses the embeddings computed for scoring
+            embedding_texts = dict(unique)
+            for description in descriptions.values():
+                embedding_texts.setdefault(normalize_description(description), description)
+            complete_classification_jobs(
+                db,
+                job_ids,
+                {incident_id: result.category for incident_id, result in classifications.items()},
+                self._embed(embedding_texts, {
+                    incident_id: description
+                    for incident_id, description in descriptions.items()
+                    if incident_id not in embedded
+                }),
+                self.embedding_model,
+                {
+                    incident_id: (result.model, result.scores, inference_ms)
+                    for incident_id, result in classifications.items()
+                    if result.scores is not None
+                },
+                self.labels,
+            )
+        except Exception as exc:
+            logger.exception("Failed to classify a batch of %d incidents", len(batch))
+            try:
+                db.rollback()
+                fail_classification_jobs(db, job_ids, repr(exc), self.max_attempts)
+            except Exception:
+                logger.exception("Failed to release %d classification jobs", len(batch))
+            with self._lock:
+                self._counters["failed_batches"] += 1
+            self._batch_done()
+            return
+        finally:
+            db.close()
+        elapsed = time.perf_counter() - started
+        batch_size.observe(len(batch))
+        batch_duration.observe(elapsed)
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["incidents"] += len(batch)
+            self._counters["busy_seconds"] += elapsed
+            self._counters["last_batch_size"] = len(batch)
+            self._counters["last_batch_latency"] = elapsed
+            if isinstance(self.classify_batch, CascadeClassifier):
+                self._counters.update(self.classify_batch.counters())
+        self._batch_done()
+
+    def _embed(self, unique: dict[str, str], descriptions: dict[int, str]) -> dict[int, bytes]:
+        """
+        Embed the incidents of a batch that have no embedding yet.
+
+        The whole batch of unique descriptions is embedded, as classified, so that the
+        embedding mode reuses the embeddings computed for scoring.
+
+        Args:
+            unique (dict[str, str]): The descriptions of the batch, keyed by normalized description.
+            descriptions (dict[int, str]): The descriptions to embed, keyed by incident ID.
+
+        Returns:
+            dict[int, bytes]: The quantized embedding of each incident, keyed by incident ID.
+        """
+        if self.embed_batch is None or not descriptions:
+            return {}
+        vectors = self.embed_batch(list(unique.values()))
+        if vectors is None:
+            return {}
+        quantized = dict(zip(unique, quantize(vectors)))
+        return {
+            incident_id: quantized[normalize_description(description)]
+            for incident_id, description in descriptions.items()
+        }
+
+    def _batch_done(self):
+        """Hook called after each batch, successful or not."""
+
+class _PoolWorker(ClassificationQueue):
+    """Batching loop run inside a worker process, reporting its counters to the pool."""
+
+    def __init__(self, events, **kwargs):
+        super().__init__(**kwargs)
+        self._events = events
+
+    def _batch_done(self):
+        with self._lock:
+            counters = dict(self._counters)
+        self._events.put((os.getpid(), "stats", counters))
+
+def _pool_worker_main(work_queue, events, num_threads: int, max_batch_size: int, max_wait: float):
+    """
+    Entry point of a classification worker process.
+
+    Loads the model once with the configured number of intra-op threads, reports
+    readiness to the pool, then classifies batches until a stop request is received.
+
+    Args:
+        work_queue: Queue the notifications are read from.
+        events: Queue the readiness and counter updates are sent to.
+        num_threads (int): Number of intra-op threads of this worker.
+        max_batch_size (int): Maximum number of incidents per batch.
+        max_wait (float): Maximum time, in seconds, spent waiting for a batch to fill.
+    """
+    try:
+        classifier = load_classifier(num_threads=num_threads)
+    except Exception as exc:
+        events.put((os.getpid(), "failed", repr(exc)))
+        raise
+    events.put((os.getpid(), "ready", None))
+    worker = _PoolWorker(
+        events,
+        classify_batch=load_cascade(classifier.score),
+        embed_batch=classifier.embed if INCIDENT_EMBEDDINGS else None,
+        max_batch_size=max_batch_size,
+        max_wait=max_wait,
+        cache=classification_cache,
+        work_queue=work_queue,
+    )
+    worker._run()
+
+class ClassificationWorkerPool:
+    """
+    Pool of classification worker processes.
+
+    The API process only puts notifications on a local inter-process queue. Each
+    worker process loads the model once, with its own intra-op thread budget, and
+    runs the same job-claiming, micro-batching loop as `ClassificationQueue`.
+
+    Workers that die unexpectedly, e.g. killed for lack of memory, are replaced the
+    next time the pool is notified or its state is read, and readiness only counts the
+    running workers. A worker that exited because the model failed to load is not
+    replaced, so that the failure stays reported.
+    """
+
+    def __init__(
+        self,
+        processes: int = CLASSIFIER_WORKERS,
+        num_threads: int = CLASSIFIER_NUM_THREADS,
+        max_batch_size: int = CLASSIFIER_MAX_BATCH_SIZE,
+        max_wait: float = CLASSIFIER_MAX_WAIT_MS / 1000,
+    ):
+        """
+        Initialize the pool without starting any process.
+
+        Args:
+            processes (int): Number of worker processes.
+            num_threads (int): Number of intra-op threads of each worker, 0 for the library default.
+            max_batch_size (int): Maximum number of incidents per batch.
+            max_wait (float): Maximum time, in seconds, spent waiting for a batch to fill.
+        """
+        self.processes = processes
+        self.num_threads = num_threads
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._context = multiprocessing.get_context("spawn")
+        self._queue = self._context.Queue()
+        self._events = self._context.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._states: dict[int, str] = {}
+        self._errors: dict[int, str] = {}
+        self._counters: dict[int, dict] = {}
+
+    def _drain_events(self):
+        """Apply the readiness and counter updates sent by the workers, then replace the dead ones."""
+        while True:
+            try:
+                pid, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "stats":
+                previous = self._counters.get(pid)
+                # One update per batch: record the worker's batch if it succeeded
+                if payload["batches"] > (previous["batches"] if previous else 0):
+                    batch_size.observe(payload["last_batch_size"])
+                    batch_duration.observe(payload["last_batch_latency"])
+                if "escalated" in payload:
+                    delta = {key: payload[key] - (previous or {}).get(key, 0) for key in CASCADE_COUNTERS}
+                    cascade_decisions.inc(delta["fast_classified"], stage="fast")
+                    cascade_decisions.inc(delta["escalated"], stage="escalated")
+                    cascade_audits.inc(delta["agreed"], outcome="agreed")
+                    cascade_audits.inc(delta["audited"] - delta["agreed"], outcome="disagreed")
+                self._counters[pid] = payload
+            else:
+                self._states[pid] = kind
+                if payload is not None:
+                    self._errors[pid] = payload
+        self._replace_dead_workers()
+
+    def _spawn(self, index: int):
+        """Start the worker process of a slot of the pool and return it."""
+        process = self._context.Process(
+            target=_pool_worker_main,
+            args=(self._queue, self._events, self.num_threads, self.max_batch_size, self.max_wait),
+            name=f"classification-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _replace_dead_workers(self):
+        """Forget the state of the workers that died unexpectedly and start new ones."""
+        for index, process in enumerate(self._workers):
+            if process.is_alive() or self._states.get(process.pid) == LazyModel.FAILED:
+                continue
+            logger.warning("Classification worker %s exited with code %s, restarting it", process.pid, process.exitcode)
+            self._states.pop(process.pid, None)
+            self._workers[index] = self._spawn(index)
+
+    def _worker_states(self) -> list[Optional[str]]:
+        """Return the last reported state of the current worker of each slot."""
+        return [self._states.get(process.pid) for process in self._workers]
+
+    @property
+    def is_ready(self) -> bool:
+        """bool: Whether at least one running worker has loaded the model."""
+        with self._lock:
+            self._drain_events()
+            return LazyModel.READY in self._worker_states()
+
+    def status(self) -> dict:
+        """
+        Describe the readiness of the worker processes.
+
+        Returns:
+            dict: The overall state and the number of workers, ready workers and failures.
+        """
+        with self._lock:
+            self._drain_events()
+            states = self._worker_states()
+            ready = states.count(LazyModel.READY)
+            failed = states.count(LazyModel.FAILED)
+            if ready:
+                state = LazyModel.READY
+            elif self._workers and failed == len(self._workers):
+                state = LazyModel.FAILED
+            elif self._workers:
+                state = LazyModel.LOADING
+            else:
+                state = LazyModel.UNLOADED
+            return {
+                "state": state,
+                "workers": self.processes,
+                "ready_workers": ready,
+                "failed_workers": failed,
+                "errors": sorted(set(self._errors.values())),
+            }
+
+    def start(self):
+        """Start the worker processes, or replace the ones that died, if needed."""
+        with self._lock:
+            if self._workers:
+                self._replace_dead_workers()
+                return
+            self._workers = [self._spawn(index) for index in range(self.processes)]
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the worker processes once the jobs that can be claimed are processed.
+
+        Args:
+            timeout (float, optional): Maximum time, in seconds, to wait for each worker.
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(_STOP)
+        for process in workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+    def notify(self, count: int = 1):
+        """
+        Tell the workers that new classification jobs have been stored.
+
+        Args:
+            count (int): Number of new jobs.
+        """
+        self.start()
+        for _ in range(count):
+            self._queue.put(True)
+
+    def stats(self) -> dict:
+        """
+        Return the batching counters aggregated over every worker.
+
+        Returns:
+            dict: Job counts, batch and incident counts, and latency/throughput figures.
+        """
+        jobs = _job_counts(SessionLocal)
+        with self._lock:
+            self._drain_events()
+            per_worker = list(self._counters.values())
+        keys = ["batches", "failed_batches", "incidents", "busy_seconds"]
+        if any("escalated" in counters for counters in per_worker):
+            keys.extend(CASCADE_COUNTERS)
+        totals = {key: sum(counters.get(key, 0) for counters in per_worker) for key in keys}
+        latest = max(per_worker, key=lambda counters: counters["batches"], default=None)
+        totals["last_batch_size"] = latest["last_batch_size"] if latest else 0
+        totals["last_batch_latency"] = latest["last_batch_latency"] if latest else 0.0
+        stats = _format_stats(totals, jobs)
+        stats["workers"] = self.processes
+        return stats
+
+if CLASSIFIER_WORKERS > 0:
+    classification_queue = ClassificationWorkerPool()
+else:
+    classification_queue = ClassificationQueue(
+        classify_batch=load_cascade(score_categories),
+        cache=classification_cache,
+        model=model,
+        embed_batch=embed_descriptions if INCIDENT_EMBEDDINGS else None,
+    )
+"""
+Application-wide classification queue used by the incident endpoints.
+
+With `CLASSIFIER_WORKERS` set to 0 the model runs in a thread of the API process,
+otherwise in a pool of that many worker processes.
+"""
+
+def _queue_depth_by_state() -> dict:
+    """
+    Return the number of classification jobs in each state, keyed by gauge label.
+
+    Jobs are counted in the database at most once per QUEUE_DEPTH_TTL_SECONDS, so
+    frequent or concurrent scrapes do not each run a COUNT over the job table.
+    """
+    jobs = _queue_depth.get("jobs")
+    if jobs is None:
+        jobs = _job_counts(SessionLocal)
+        _queue_depth.set("jobs", jobs)
+    return {(state,): count for state, count in jobs.items()}
+
+metrics.gauge(
+    "classification_queue_depth",
+    "Number of classification jobs in each state.",
+    _queue_depth_by_state,
+    ("state",),
+)
@@ -5,14 +5,306 @@ This module provides functionality to automatically classify incidents based on
 It uses a pre-trained LLM (Zero-Shot Classification) to determine the most appropriate category.
 """
 
-from transformers import pipeline
+import logging
+import threading
+import time
+from typing import NamedTuple, Optional, Union
+from app.core.config import (
+    CLASSIFIER_BACKEND,
+    CLASSIFIER_LABELS,
+    CLASSIFIER_MODE,
+    CLASSIFIER_MODEL,
+    CLASSIFIER_NUM_THREADS,
+    CLASSIFIER_ONNX_PATH,
+)
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = CLASSIFIER_MODEL  # Multilingual model by default
 
-# Initialize the zero-shot classifier (loads only once)
-classifier = pipeline(
-    "zero-shot-classification",
-    model="joeddav/xlm-roberta-large-xnli",  # Multilingual model
-    device="cpu"  # Use "cuda" if you have GPU
+inference_duration = metrics.histogram(
+    "classifier_inference_duration_seconds",
+    "Duration of classifier calls, tokenization included, per scoring mode.",
+    ("mode",),
 )
+"""Latency histogram of the classifier calls."""
+
+# Candidate categories (configured with CLASSIFIER_LABELS)
+CANDIDATE_LABELS = CLASSIFIER_LABELS
+
+class Classification(NamedTuple):
+    """Classification of one description, with the scores behind it."""
+
+    category: str
+    """The most probable label."""
+
+    scores: Optional[dict[str, float]]
+    """The probability of each candidate label, or None if unknown."""
+
+    model: Optional[str]
+    """Identifier of the model that computed the scores."""
+
+def as_classification(result: Union[str, Classification]) -> Classification:
+    """
+    Turn the result of a batch classification function into a `Classification`.
+    
+    Classification functions may return bare categories, which carry no scores.
+    
+    Args:
+        result (Union[str, Classification]): A category or a classification.
+        
+    Returns:
+        Classification: The classification.
+    """
+    return result if isinstance(result, Classification) else Classification(result, None, None)
+
+class LazyModel:
+    """
+    Zero-shot model holder loaded on first use or warmed up in the background.
+    
+    Loading the model takes a long time, so it is never done at import time. The
+    model is either loaded by the first caller that needs it, or by a background
+    thread started with `warm_up`. Concurrent callers wait for the same load.
+    """
+    UNLOADED = "unloaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, loader):
+        """
+        Initialize the holder without loading anything.
+        
+        Args:
+            loader (Callable): Function building the model objects.
+        """
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self.state = self.UNLOADED
+        self.error = None
+        self.load_seconds = None
+
+    @property
+    def is_ready(self) -> bool:
+        """bool: Whether the model is loaded and can serve classifications."""
+        return self.state == self.READY
+
+    def get(self):
+        """
+        Return the loaded model objects, loading them first if needed.
+        
+        Returns:
+            The value built by the loader.
+        """
+        if self.state != self.READY:
+            return self.load()
+        return self._value
+
+    def load(self):
+        """
+        Load the model if it is not loaded yet, blocking until it is available.
+        
+        Returns:
+            The value built by the loader.
+            
+        Raises:
+            Exception: Any error raised by the loader. A later call retries the load.
+        """
+        with self._lock:
+            if self.state == self.READY:
+                return self._value
+            self.state = self.LOADING
+            started = time.perf_counter()
+            try:
+                self._value = self._loader()
+            except Exception as exc:
+                self.state = self.FAILED
+                self.error = repr(exc)
+                raise
+            self.load_seconds = time.perf_counter() - started
+            self.error = None
+            self.state = self.READY
+            return self._value
+
+    def warm_up(self) -> threading.Thread:
+        """
+        Load the model in a background thread.
+        
+        Returns:
+            threading.Thread: The started loading thread.
+        """
+        def run():
+            try:
+                self.load()
+            except Exception:
+                logger.exception("Failed to load the classification model")
+
+        thread = threading.Thread(target=run, name="classifier-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> dict:
+        """
+        Describe the loading state of the model.
+        
+        Returns:
+            dict: The model name, its state, the load duration and the last load error.
+        """
+        return {
+            "model": MODEL_NAME,
+            "backend": CLASSIFIER_BACKEND,
+            "mode": CLASSIFIER_MODE,
+            "state": self.state,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.error,
+        }
+
+class ZeroShotClassifier:
+    """
+    Loaded zero-shot classifier.
+    
+    Wraps the transformers pipeline built on the backend's model and, outside of
+    pipeline mode, the scorer reusing that model with cached label encodings. When
+    the backend exposes the encoder of the model, it also embeds descriptions for
+    the similar-incident detection.
+    """
+
+    def __init__(self, pipeline, scorer, labels: list[str], mode: str = "pipeline", encoder=None, model_id: str = MODEL_NAME):
+        """
+        Initialize the classifier.
+        
+        Args:
+            pipeline: The transformers zero-shot classification pipeline.
+            scorer: The packed or embedding scorer, or None in pipeline mode.
+            labels (list[str]): The candidate labels.
+            mode (str, optional): The scoring mode, used to label the timings. Defaults to "pipeline".
+            encoder (SentenceEncoder, optional): The sentence encoder of the model, if the
+                backend supports it. Defaults to None.
+            model_id (str, optional): Identifier of the model, stored with the scores.
+                Defaults to MODEL_NAME.
+        """
+        self.pipeline = pipeline
+        self.scorer = scorer
+        self.labels = list(labels)
+        self.mode = mode
+        self.encoder = encoder
+        self.model_id = model_id
+
+    def embed(self, descriptions: list[str]):
+        """
+        Compute the sentence embedding of each description.
+        
+        In the embedding mode, the embeddings computed by the last classification of the
+        same descriptions are reused.
+        
+        Args:
+            descriptions (list[str]): The incident description texts.
+            
+        Returns:
+            numpy.ndarray: A (len(descriptions), hidden_size) float32 array of unit vectors,
+                or None if the backend does not expose the encoder.
+        """
+        if self.encoder is None:
+            return None
+        with inference_duration.time(mode="sentence-embedding"):
+            return self.encoder.embed(descriptions).float().numpy()
+
+    def score(self, descriptions: list[str]) -> list[Classification]:
+        """
+        Score every candidate label against each description.
+        
+        Args:
+            descriptions (list[str]): The incident description texts.
+            
+        Returns:
+            list[Classification]: The classification of each description, in the same order.
+        """
+        if self.scorer is not None:
+            with inference_duration.time(mode=self.mode):
+                rows = self.scorer.scores(descriptions)
+            distributions = [dict(zip(self.labels, row)) for row in rows]
+        else:
+            with inference_duration.time(mode=self.mode):
+                results = self.pipeline(
+                    descriptions,
+                    self.labels,
+                    multi_label=False,
+                    batch_size=len(descriptions) * len(self.labels),
+                )
+            if isinstance(results, dict):
+                results = [results]
+            distributions = [dict(zip(result['labels'], result['scores'])) for result in results]
+        return [
+            Classification(max(scores, key=scores.get), scores, self.model_id)
+            for scores in distributions
+        ]
+
+    def classify(self, descriptions: list[str]) -> list[str]:
+        """
+        Return the highest-confidence label of each description.
+        
+        Args:
+            descriptions (list[str]): The incident description texts.
+            
+        Returns:
+            list[str]: The label of each description, in the same order.
+        """
+        return [classification.category for classification in self.score(descriptions)]
+
+def load_classifier(
+    backend: str = CLASSIFIER_BACKEND,
+    mode: str = CLASSIFIER_MODE,
+    num_threads: int = CLASSIFIER_NUM_THREADS,
+    model_name: str = MODEL_NAME,
+) -> ZeroShotClassifier:
+    """
+    Load the model through an inference backend and build the zero-shot classifier.
+    
+    Args:
+        backend (str): The inference backend, one of "torch", "torch-int8" or "onnx".
+        mode (str): The scoring strategy, one of "pipeline", "packed" or "embedding".
+        num_threads (int): Number of intra-op threads, 0 for the library default.
+        model_name (str): Hugging Face identifier or local path of the model.
+        
+    Returns:
+        ZeroShotClassifier: The loaded classifier.
+        
+    Raises:
+        ValueError: If the backend or the mode is unknown, or if they are incompatible.
+    """
+    from transformers import pipeline
+    from app.services.backends import OnnxBackend, get_backend
+    from app.services.zero_shot import EmbeddingClassifier, PackedNLIClassifier, SentenceEncoder
+
+    if mode not in ("pipeline", "packed", "embedding"):
+        raise ValueError(f"Unknown classifier mode: {mode!r}")
+    options = {"onnx_path": CLASSIFIER_ONNX_PATH} if backend == OnnxBackend.name else {}
+    inference_backend = get_backend(backend, model_name, num_threads, **options)
+    if mode == "embedding" and not inference_backend.supports_encoder:
+        raise ValueError(f"The {backend!r} backend does not support the embedding mode")
+
+    model, tokenizer = inference_backend.load()
+    classifier = pipeline(
+        "zero-shot-classification",
+        model=model,
+        tokenizer=tokenizer,
+        device="cpu"  # Use "cuda" if you have GPU
+    )
+
+    encoder = SentenceEncoder(model, tokenizer) if inference_backend.supports_encoder else None
+
+    # Scorer reusing the pipeline's model, with the label encodings cached once at load time
+    scorer = None
+    if mode == "packed":
+        scorer = PackedNLIClassifier(model, tokenizer, CANDIDATE_LABELS)
+    elif mode == "embedding":
+        scorer = EmbeddingClassifier(model, tokenizer, CANDIDATE_LABELS, encoder=encoder)
+    return ZeroShotClassifier(classifier, scorer, CANDIDATE_LABELS, mode, encoder, f"{model_name}:{backend}:{mode}")
+
+model = LazyModel(load_classifier)
+"""Application-wide zero-shot model, loaded lazily."""
 
 def classify_category(description: str) -> str:
     """
@@ -25,7 +317,7 @@ def classify_category(description: str) -> str:
         description (str): The incident description text to analyze.
         
     Returns:
-        str: The determined incident category. One of:
+        str: The determined incident category, one of `CANDIDATE_LABELS`. By default:
             - "Network Issue": For network-related problems
             - "Server Issue": For server-related problems
             - "Software Issue": For software-related problems
@@ -40,18 +332,61 @@ def classify_category(description: str) -> str:
         >>> classify_category("The database is unresponsive")
         "Server Issue"
     """
-    # Candidate categories (can be extended)
-    candidate_labels = [
-        "Network Issue",
-        "Server Issue",
-        "Software Issue",
-        "Login Issue",
-        "Others"
-    ]
-    
+    classifier = model.get()
+    if classifier.scorer is not None:
+        return classifier.classify([description])[0]
+
     # Get classification from the model
-    result = classifier(description, candidate_labels, multi_label=False)
-    print("Aqui: ", result)
+    with inference_duration.time(mode=classifier.mode):
+        result = classifier.pipeline(description, CANDIDATE_LABELS, multi_label=False)
     
     # Return the highest-confidence label
-    return result['labels'][0]
\ No newline at end of file
+    return result['labels'][0]
+
+def classify_categories(descriptions: list[str]) -> list[str]:
+    """
+    Classify several incidents with a single batched call to the zero-shot classifier.
+    
+    All premise/hypothesis pairs of the batch are sent to the model together, so the
+    cost of one forward pass is shared by every incident of the batch. The scoring
+    strategy is selected by `CLASSIFIER_MODE` and the runtime by `CLASSIFIER_BACKEND`.
+    The call blocks until the model is loaded.
+    
+    Args:
+        descriptions (list[str]): The incident description texts to analyze.
+        
+    Returns:
+        list[str]: The determined category of each description, in the same order.
+    """
+    if not descriptions:
+        return []
+    return model.get().classify(descriptions)
+
+def score_categories(descriptions: list[str]) -> list[Classification]:
+    """
+    Classify several incidents like `classify_categories`, keeping the score of every label.
+    
+    Args:
+        descriptions (list[str]): The incident description texts to analyze.
+        
+    Returns:
+        list[Classification]: The classification of each description, in the same order.
+    """
+    if not descriptions:
+        return []
+    return model.get().score(descriptions)
+
+def embed_descriptions(descriptions: list[str]):
+    """
+    Compute the sentence embeddings of several incidents with the classification model.
+    
+    The call blocks until the model is loaded.
+    
+    Args:
+        descriptions (list[str]): The incident description texts.
+        
+    Returns:
+        numpy.ndarray: One unit vector per description, or None if the inference
+            backend does not support embeddings.
+    """
+    return model.get().embed(descriptions)
@@ -0,0 +1,221 @@
+"""
+Fast classifier module.
+
+This module provides a small text classifier, a TF-IDF model over words and word
+bigrams followed by a multinomial logistic regression, implemented with NumPy. It
+is trained on incidents already categorized by the zero-shot model, classifies a
+description in microseconds, and is used as the first stage of the classification
+cascade (see `app.services.cascade`).
+
+Documents are kept as sparse rows (term indices and weights), so training and
+inference cost grows with the number of terms of the documents, not with the
+size of the vocabulary.
+"""
+
+import math
+import re
+from collections import Counter
+import numpy as np
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split a text into its lowercase words and word bigrams.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list[str]: The terms of the text.
+    """
+    words = re.findall(r"\w+", text.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+class TfidfLogisticClassifier:
+    """TF-IDF features and multinomial logistic regression."""
+
+    def __init__(self, vocabulary: list[str], idf: np.ndarray, weights: np.ndarray, bias: np.ndarray, labels: list[str]):
+        """
+        Initialize a trained classifier.
+
+        Args:
+            vocabulary (list[str]): The terms of the features, in feature order.
+            idf (np.ndarray): The inverse document frequency of each term.
+            weights (np.ndarray): The (terms, labels) weights of the regression.
+            bias (np.ndarray): The bias of each label.
+            labels (list[str]): The labels, in column order.
+        """
+        self.vocabulary = list(vocabulary)
+        self.term_index = {term: index for index, term in enumerate(self.vocabulary)}
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.labels = list(labels)
+
+    @classmethod
+    def fit(
+        cls,
+        texts: list[str],
+        labels: list[str],
+        min_df: int = 2,
+        max_features: int = 50000,
+        l2: float = 1e-4,
+        epochs: int = 200,
+        learning_rate: float = 0.5,
+    ) -> "TfidfLogisticClassifier":
+        """
+        Train a classifier.
+
+        The regression is trained by full-batch gradient descent with Adam updates.
+
+        Args:
+            texts (list[str]): The training texts.
+            labels (list[str]): The label of each text.
+            min_df (int, optional): Minimum number of texts a term must appear in. Defaults to 2.
+            max_features (int, optional): Maximum number of terms, the most frequent first. Defaults to 50000.
+            l2 (float, optional): L2 regularization strength. Defaults to 1e-4.
+            epochs (int, optional): Number of gradient steps. Defaults to 200.
+            learning_rate (float, optional): Step size. Defaults to 0.5.
+
+        Returns:
+            TfidfLogisticClassifier: The trained classifier.
+        """
+        documents = [set(tokenize(text)) for text in texts]
+        frequencies = Counter(term for document in documents for term in document)
+        terms = sorted(
+            (term for term, count in frequencies.items() if count >= min_df),
+            key=lambda term: (-frequencies[term], term),
+        )[:max_features]
+        idf = np.array([math.log((1 + len(texts)) / (1 + frequencies[term])) + 1 for term in terms], dtype=np.float32)
+        label_names = sorted(set(labels))
+        model = cls(
+            terms,
+            idf,
+            np.zeros((len(terms), len(label_names)), dtype=np.float32),
+            np.zeros(len(label_names), dtype=np.float32),
+            label_names,
+        )
+
+        features = model._features(texts)
+        targets = np.zeros((len(texts), len(label_names)), dtype=np.float32)
+        targets[np.arange(len(texts)), [label_names.index(label) for label in labels]] = 1
+        parameters = [model.weights, model.bias]
+        moments = [(np.zeros_like(p), np.zeros_like(p)) for p in parameters]
+        for step in range(1, epochs + 1):
+            # Gradient of the mean cross-entropy
+            error = (model._probabilities(features, len(texts)) - targets) / len(texts)
+            gradients = [model._transpose_product(features, error) + l2 * model.weights, error.sum(axis=0)]
+            for parameter, gradient, (first, second) in zip(parameters, gradients, moments):
+                first *= 0.9
+                first += 0.1 * gradient
+                second *= 0.999
+                second += 0.001 * gradient ** 2
+                parameter -= (
+                    learning_rate * (first / (1 - 0.9 ** step)) / (np.sqrt(second / (1 - 0.999 ** step)) + 1e-8)
+                )
+        return model
+
+    def _features(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the L2-normalized TF-IDF vectors of texts, as sparse rows.
+
+        Args:
+            texts (list[str]): The texts.
+
+        Returns:
+            tuple: The row of each non-zero value, its term index and its weight.
+        """
+        rows, indices, values = [], [], []
+        for row, text in enumerate(texts):
+            counts = Counter(term for term in tokenize(text) if term in self.term_index)
+            if not counts:
+                continue
+            index = np.fromiter((self.term_index[term] for term in counts), dtype=np.int64, count=len(counts))
+            weight = (1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))) * self.idf[index]
+            rows.append(np.full(len(counts), row))
+            indices.append(index)
+            values.append(weight / np.linalg.norm(weight))
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(indices), np.concatenate(values)
+
+    def _probabilities(self, features: tuple, count: int) -> np.ndarray:
+        """Compute the label probabilities of `count` sparse rows."""
+        rows, indices, values = features
+        logits = np.stack([
+            np.bincount(rows, weights=values * self.weights[indices, label], minlength=count)
+            for label in range(len(self.labels))
+        ], axis=1) + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def _transpose_product(self, features: tuple, error: np.ndarray) -> np.ndarray:
+        """Compute X.T @ error for sparse rows X."""
+        rows, indices, values = features
+        return np.stack([
+            np.bincount(indices, weights=values * error[rows, label], minlength=len(self.vocabulary))
+            for label in range(len(self.labels))
+        ], axis=1).astype(np.float32)
+
+    def scores(self, texts: list[str]) -> list[dict[str, float]]:
+        """
+        Compute the probability of every label for texts.
+
+        Args:
+            texts (list[str]): The texts.
+
+        Returns:
+            list[dict[str, float]]: The probability of each label, for each text.
+        """
+        probabilities = self._probabilities(self._features(texts), len(texts))
+        return [dict(zip(self.labels, row)) for row in probabilities.tolist()]
+
+    def predict(self, texts: list[str]) -> tuple[list[str], list[float]]:
+        """
+        Classify texts.
+
+        Args:
+            texts (list[str]): The texts.
+
+        Returns:
+            tuple[list[str], list[float]]: The most probable label of each text and its probability.
+        """
+        probabilities = self._probabilities(self._features(texts), len(texts))
+        best = probabilities.argmax(axis=1)
+        return [self.labels[index] for index in best], probabilities[np.arange(len(texts)), best].tolist()
+
+    def save(self, path: str):
+        """
+        Write the classifier to a NumPy archive.
+
+        Args:
+            path (str): The file path.
+        """
+        np.savez_compressed(
+            path,
+            vocabulary=np.array(self.vocabulary),
+            idf=self.idf,
+            weights=self.weights,
+            bias=self.bias,
+            labels=np.array(self.labels),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfLogisticClassifier":
+        """
+        Read a classifier written by `save`.
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            TfidfLogisticClassifier: The classifier.
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            return cls(
+                archive["vocabulary"].tolist(),
+                archive["idf"],
+                archive["weights"],
+                archive["bias"],
+                archive["labels"].tolist(),
+            )
@@ -0,0 +1,60 @@
+"""
+Incident export service module.
+
+This module serializes streams of incident rows to NDJSON or CSV, one chunk of rows
+at a time, so that exports of any size run in constant memory.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator
+from sqlalchemy import Row
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+"""Supported export formats and their media types."""
+
+def _value(value):
+    """Convert a column value to a JSON and CSV friendly value."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def to_ndjson(chunks: Iterable[list[Row]]) -> Iterator[str]:
+    """
+    Serialize chunks of rows as newline-delimited JSON.
+
+    Args:
+        chunks (Iterable[list[Row]]): The chunks of rows to serialize.
+
+    Yields:
+        str: One block of JSON lines per chunk.
+    """
+    for chunk in chunks:
+        yield "".join(
+            json.dumps({key: _value(value) for key, value in row._mapping.items()}) + "\n"
+            for row in chunk
+        )
+
+def to_csv(chunks: Iterable[list[Row]], columns: list[str]) -> Iterator[str]:
+    """
+    Serialize chunks of rows as CSV, preceded by a header line.
+
+    Args:
+        chunks (Iterable[list[Row]]): The chunks of rows to serialize.
+        columns (list[str]): The column names, in the order of the row values.
+
+    Yields:
+        str: The header, then one block of CSV lines per chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
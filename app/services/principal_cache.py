@@ -0,0 +1,44 @@
+"""
+Principal cache service module.
+
+This module keeps the authenticated users of recent requests in memory, keyed by
+token subject, so that protected endpoints do not query the users table on every call.
+"""
+
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import AUTH_PRINCIPAL_CACHE_SIZE, AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+from app.schemas.user import Principal
+
+principal_cache = TTLCache(maxsize=AUTH_PRINCIPAL_CACHE_SIZE, ttl=AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+"""Least recently used principals, keyed by email, with TTL eviction."""
+
+def get_principal(email: str) -> Optional[Principal]:
+    """
+    Look up a cached principal.
+
+    Args:
+        email (str): The token subject.
+
+    Returns:
+        Optional[Principal]: The cached principal, or None on a miss.
+    """
+    return principal_cache.get(email)
+
+def set_principal(principal: Principal):
+    """
+    Cache a principal after it has been loaded from the database.
+
+    Args:
+        principal (Principal): The authenticated user.
+    """
+    principal_cache.set(principal.email, principal)
+
+def invalidate_principal(email: str):
+    """
+    Drop a user from the cache, for instance after the user has been changed or removed.
+
+    Args:
+        email (str): The email address of the user.
+    """
+    principal_cache.pop(email)
@@ -0,0 +1,267 @@
+"""
+Similarity index module.
+
+This module finds the incidents most similar to a sentence embedding. Embeddings
+are stored in the database as int8 vectors (see `IncidentEmbedding`) and loaded
+incrementally into an in-process index, which keeps them quantized in memory:
+one byte per dimension.
+
+Small corpora are searched exhaustively with NumPy. From `SIMILARITY_IVF_MIN_SIZE`
+embeddings, the index switches to an inverted file: the vectors are partitioned
+into about sqrt(n) clusters by spherical k-means, and a lookup only scores the
+vectors of the `SIMILARITY_NPROBE` clusters closest to the query. The clusters are
+retrained whenever the corpus has doubled since the last training.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import SIMILARITY_IVF_MIN_SIZE, SIMILARITY_NPROBE
+from app.core.metrics import metrics
+from app.db.crud import get_incident_embeddings
+
+logger = logging.getLogger(__name__)
+
+KMEANS_ITERATIONS = 8
+"""Number of k-means iterations when training the clusters."""
+
+KMEANS_SAMPLES_PER_CLUSTER = 32
+"""Number of vectors sampled per cluster to train the clusters."""
+
+search_duration = metrics.histogram(
+    "similarity_search_duration_seconds",
+    "Duration of similar-incident lookups, per index kind.",
+    ("index",),
+)
+"""Latency histogram of the similarity lookups."""
+
+def quantize(vectors) -> list[bytes]:
+    """
+    Quantize embeddings to int8, for storage.
+
+    Each vector is scaled so that its largest component is 127, which keeps the
+    precision of small components and does not change cosine similarities.
+
+    Args:
+        vectors: A (n, dimensions) array of embeddings.
+
+    Returns:
+        list[bytes]: The int8 bytes of each vector.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scale = np.abs(vectors).max(axis=1, keepdims=True)
+    scale[scale == 0] = 1
+    return [row.tobytes() for row in np.round(vectors / scale * 127).astype(np.int8)]
+
+def dequantize(vector: bytes) -> np.ndarray:
+    """
+    Turn a stored int8 vector back into a float32 unit vector.
+
+    Args:
+        vector (bytes): The int8 bytes of the vector.
+
+    Returns:
+        np.ndarray: The normalized vector.
+    """
+    return _normalize(np.frombuffer(vector, dtype=np.int8).astype(np.float32))
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors, along their last axis, to unit length."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+class SimilarityIndex:
+    """
+    In-process cosine similarity index over the incident embeddings.
+
+    Thread-safe. Vectors are only ever added: results are matched against the incidents
+    table by the callers, which drops the incidents deleted since they were indexed.
+    """
+
+    def __init__(self, ivf_min_size: int = SIMILARITY_IVF_MIN_SIZE, nprobe: int = SIMILARITY_NPROBE, seed: int = 0):
+        """
+        Initialize an empty index.
+
+        Args:
+            ivf_min_size (int): Number of vectors from which lookups use the clusters.
+            nprobe (int): Number of clusters scanned by a lookup.
+            seed (int): Seed of the random sampling of the k-means training.
+        """
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self.last_row_id = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._size = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors: Optional[np.ndarray] = None
+        self._inverse_norms = np.empty(0, dtype=np.float32)
+        self._centroids: Optional[np.ndarray] = None
+        self._clusters: list[list[int]] = []
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def kind(self) -> str:
+        """str: "ivf" when lookups use the clusters, "exact" otherwise."""
+        return "ivf" if self._centroids is not None else "exact"
+
+    def add(self, incident_ids: list[int], vectors: list[bytes]):
+        """
+        Add quantized vectors to the index.
+
+        Args:
+            incident_ids (list[int]): The ID of the incident of each vector.
+            vectors (list[bytes]): The int8 bytes of each vector, as produced by `quantize`.
+        """
+        with self._lock:
+            self._add(incident_ids, vectors)
+
+    def _add(self, incident_ids: list[int], vectors: list[bytes]):
+        """Add quantized vectors to the index, with the lock held."""
+        if not vectors:
+            return
+        batch = np.frombuffer(b"".join(vectors), dtype=np.int8).reshape(len(vectors), -1)
+        start = self._size
+        self._reserve(start + len(batch), batch.shape[1])
+        self._vectors[start:start + len(batch)] = batch
+        self._ids[start:start + len(batch)] = incident_ids
+        norms = np.linalg.norm(batch.astype(np.float32), axis=1)
+        self._inverse_norms[start:start + len(batch)] = 1 / np.where(norms == 0, 1, norms)
+        self._size += len(batch)
+        if self._size >= self.ivf_min_size and self._size >= 2 * self._trained_size:
+            self._train()
+        elif self._centroids is not None:
+            self._assign(range(start, self._size))
+
+    def _reserve(self, size: int, dimensions: int):
+        """Grow the arrays, geometrically, to hold at least `size` vectors."""
+        if self._vectors is None:
+            self._vectors = np.empty((0, dimensions), dtype=np.int8)
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        self._vectors = np.resize(self._vectors, (capacity, dimensions))
+        self._ids = np.resize(self._ids, capacity)
+        self._inverse_norms = np.resize(self._inverse_norms, capacity)
+
+    def _unit_vectors(self, rows) -> np.ndarray:
+        """Dequantize and normalize the vectors of some rows."""
+        return self._vectors[rows].astype(np.float32) * self._inverse_norms[rows, None]
+
+    def _train(self):
+        """Partition the vectors into clusters with spherical k-means, then index every vector."""
+        started = time.perf_counter()
+        clusters = max(1, int(math.sqrt(self._size)))
+        sample = self._rng.choice(self._size, min(self._size, clusters * KMEANS_SAMPLES_PER_CLUSTER), replace=False)
+        points = self._unit_vectors(np.sort(sample))
+        centroids = points[self._rng.choice(len(points), clusters, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = self._nearest(points, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, points)
+            # Keep the previous centroid of a cluster left empty
+            filled = np.bincount(assignment, minlength=clusters) > 0
+            centroids[filled] = _normalize(sums[filled])
+        self._centroids = centroids
+        self._clusters = [[] for _ in range(clusters)]
+        self._assign(range(self._size))
+        self._trained_size = self._size
+        logger.info(
+            "Trained %d similarity clusters over %d embeddings in %.1fs",
+            clusters, self._size, time.perf_counter() - started,
+        )
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """Return the index of the centroid closest to each point."""
+        return np.concatenate([
+            np.argmax(points[start:start + chunk_size] @ centroids.T, axis=1)
+            for start in range(0, len(points), chunk_size)
+        ])
+
+    def _assign(self, rows: range, chunk_size: int = 4096):
+        """Add rows to the list of their nearest cluster."""
+        for start in range(rows.start, rows.stop, chunk_size):
+            chunk = np.arange(start, min(start + chunk_size, rows.stop))
+            for row, cluster in zip(chunk.tolist(), self._nearest(self._unit_vectors(chunk), self._centroids).tolist()):
+                self._clusters[cluster].append(row)
+
+    def search(
+        self, vector: np.ndarray, limit: int = 10, min_score: float = 0.0, exclude: Optional[int] = None
+    ) -> list[tuple[int, float]]:
+        """
+        Find the incidents whose embedding is the most similar to a vector.
+
+        Args:
+            vector (np.ndarray): The query embedding.
+            limit (int, optional): Maximum number of results. Defaults to 10.
+            min_score (float, optional): Minimum cosine similarity of a result. Defaults to 0.
+            exclude (int, optional): ID of an incident to leave out, such as the query incident.
+
+        Returns:
+            list[tuple[int, float]]: The (incident ID, cosine similarity) pairs, most similar first.
+        """
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock, search_duration.time(index=self.kind):
+            if self._size == 0:
+                return []
+            if self._centroids is None:
+                rows = slice(0, self._size)
+            else:
+                probes = np.argsort(self._centroids @ query)[::-1][:self.nprobe]
+                rows = np.fromiter(
+                    (row for cluster in probes for row in self._clusters[cluster]), dtype=np.int64
+                )
+            scores = (self._vectors[rows].astype(np.float32) @ query) * self._inverse_norms[rows]
+            ids = self._ids[rows]
+        keep = scores >= min_score
+        if exclude is not None:
+            keep &= ids != exclude
+        scores, ids = scores[keep], ids[keep]
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            scores, ids = scores[top], ids[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[index]), float(scores[index])) for index in order]
+
+    def sync(self, db: Session, model: str, chunk_size: int = 10000):
+        """
+        Load the embeddings stored since the last synchronization.
+
+        Concurrent synchronizations may read the same rows; each row is only added once.
+
+        Args:
+            db (Session): The database session.
+            model (str): Only load the embeddings computed by this model.
+            chunk_size (int, optional): Number of embeddings read per query. Defaults to 10000.
+        """
+        after = self.last_row_id
+        while True:
+            rows = get_incident_embeddings(db, model, after_id=after, limit=chunk_size)
+            if not rows:
+                return
+            with self._lock:
+                fresh = [row for row in rows if row[0] > self.last_row_id]
+                if fresh:
+                    self._add([incident_id for _, incident_id, _ in fresh], [vector for _, _, vector in fresh])
+                    self.last_row_id = fresh[-1][0]
+            after = rows[-1][0]
+            if len(rows) < chunk_size:
+                return
+
+similarity_index = SimilarityIndex()
+"""Application-wide similarity index of the incident embeddings."""
+
+metrics.gauge(
+    "similarity_index_size",
+    "Number of incident embeddings in the similarity index.",
+    lambda: len(similarity_index),
+)
@@ -0,0 +1,221 @@
+"""
+Zero-shot scoring module.
+
+This module provides zero-shot classifiers that reuse work across incidents instead of
+going through the generic transformers pipeline for every premise/hypothesis pair:
+
+- `PackedNLIClassifier` tokenizes the hypotheses built from the candidate labels once,
+  then packs every premise of a batch with all of the cached hypotheses into a single
+  padded tensor, so the whole batch costs one forward pass of the NLI model.
+- `EmbeddingClassifier` encodes the candidate labels once and scores a description
+  against all of them with a single encoder pass and a cosine similarity.
+
+`SentenceEncoder` computes the sentence embeddings used by the embedding classifier
+and by the similar-incident detection.
+"""
+
+import torch
+from app.core.metrics import metrics
+
+DEFAULT_HYPOTHESIS_TEMPLATE = "This example is {}."
+"""Hypothesis template used by the transformers zero-shot pipeline."""
+
+tokenization_duration = metrics.histogram(
+    "classifier_tokenization_duration_seconds",
+    "Duration of the tokenization of the descriptions, per scoring mode.",
+    ("mode",),
+)
+"""Latency histogram of the tokenization step of the scorers."""
+
+def _entailment_id(config) -> int:
+    """
+    Find the index of the entailment logit in an NLI model configuration.
+
+    Args:
+        config: The model configuration.
+
+    Returns:
+        int: The index of the entailment class.
+    """
+    for label, index in config.label2id.items():
+        if label.lower().startswith("entail"):
+            return index
+    return -1
+
+class PackedNLIClassifier:
+    """
+    NLI zero-shot classifier with cached hypothesis encodings.
+
+    The hypothesis of each candidate label is tokenized once, when the classifier is
+    built. Premises are tokenized once per call and concatenated with the cached
+    hypotheses, and all the resulting pairs are sent to the model as one padded batch.
+    """
+
+    def __init__(self, model, tokenizer, labels: list[str], hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE):
+        """
+        Initialize the classifier and cache the hypothesis encodings.
+
+        Args:
+            model: A sequence classification model fine-tuned on NLI.
+            tokenizer: The tokenizer matching the model.
+            labels (list[str]): The candidate labels.
+            hypothesis_template (str): Template turning a label into a hypothesis.
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.labels = list(labels)
+        self.entailment_id = _entailment_id(model.config)
+        self.hypotheses = [
+            tokenizer.encode(hypothesis_template.format(label), add_special_tokens=False)
+            for label in self.labels
+        ]
+        self.max_premise_length = (
+            min(tokenizer.model_max_length, model.config.max_position_embeddings)
+            - max(len(hypothesis) for hypothesis in self.hypotheses)
+            - tokenizer.num_special_tokens_to_add(pair=True)
+        )
+        self.use_token_type_ids = "token_type_ids" in tokenizer.model_input_names
+
+    def _pack(self, premises: list[list[int]]) -> dict:
+        """
+        Build the padded batch pairing every premise with every cached hypothesis.
+
+        Args:
+            premises (list[list[int]]): The token IDs of each premise.
+
+        Returns:
+            dict: The model inputs as PyTorch tensors.
+        """
+        features = {"input_ids": []}
+        if self.use_token_type_ids:
+            features["token_type_ids"] = []
+        for premise in premises:
+            for hypothesis in self.hypotheses:
+                features["input_ids"].append(
+                    self.tokenizer.build_inputs_with_special_tokens(premise, hypothesis)
+                )
+                if self.use_token_type_ids:
+                    features["token_type_ids"].append(
+                        self.tokenizer.create_token_type_ids_from_sequences(premise, hypothesis)
+                    )
+        return self.tokenizer.pad(features, return_tensors="pt")
+
+    def scores(self, descriptions: list[str]) -> list[list[float]]:
+        """
+        Compute the probability of each candidate label for each description.
+
+        As in the transformers pipeline with `multi_label=False`, the entailment logits
+        of a description are normalized with a softmax over the candidate labels.
+
+        Args:
+            descriptions (list[str]): The incident description texts.
+
+        Returns:
+            list[list[float]]: One list of label probabilities per description.
+        """
+        with tokenization_duration.time(mode="packed"):
+            premises = self.tokenizer(
+                descriptions,
+                add_special_tokens=False,
+                truncation=True,
+                max_length=self.max_premise_length,
+            )["input_ids"]
+            inputs = self._pack(premises)
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+        entailment = logits[:, self.entailment_id].reshape(len(descriptions), len(self.labels))
+        return entailment.softmax(dim=-1).tolist()
+
+class SentenceEncoder:
+    """
+    Sentence encoder built on the encoder of a transformers model.
+
+    The embeddings of the last call are kept, so that a batch embedded for scoring
+    is not encoded again when its embeddings are stored right after.
+    """
+
+    def __init__(self, model, tokenizer):
+        """
+        Initialize the encoder.
+
+        Args:
+            model: A transformers model whose `base_model` is a text encoder.
+            tokenizer: The tokenizer matching the model.
+        """
+        self.encoder = model.base_model
+        self.tokenizer = tokenizer
+        self._last = None
+
+    def embed(self, texts: list[str]) -> torch.Tensor:
+        """
+        Compute L2-normalized, mean-pooled sentence embeddings.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            torch.Tensor: A (len(texts), hidden_size) tensor of unit vectors.
+        """
+        last = self._last
+        if last is not None and last[0] == texts:
+            return last[1]
+        with tokenization_duration.time(mode="embedding"):
+            inputs = self.tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
+        with torch.inference_mode():
+            hidden = self.encoder(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        embeddings = torch.nn.functional.normalize(pooled, dim=-1)
+        self._last = (list(texts), embeddings)
+        return embeddings
+
+class EmbeddingClassifier:
+    """
+    Embedding-similarity zero-shot classifier.
+
+    Each candidate label is embedded once with the encoder of the model. A description
+    is embedded with a single encoder pass, whatever the number of labels, and scored
+    by cosine similarity against the cached label embeddings.
+    """
+
+    def __init__(self, model, tokenizer, labels: list[str], temperature: float = 0.05, encoder: SentenceEncoder = None):
+        """
+        Initialize the classifier and cache the label embeddings.
+
+        Args:
+            model: A transformers model whose `base_model` is a text encoder.
+            tokenizer: The tokenizer matching the model.
+            labels (list[str]): The candidate labels.
+            temperature (float): Softmax temperature applied to the cosine similarities.
+            encoder (SentenceEncoder, optional): The encoder to share with other users of
+                the model. Defaults to a new encoder.
+        """
+        self.sentence_encoder = encoder or SentenceEncoder(model, tokenizer)
+        self.labels = list(labels)
+        self.temperature = temperature
+        self.label_embeddings = self.sentence_encoder.embed(self.labels)
+
+    def embed(self, texts: list[str]) -> torch.Tensor:
+        """
+        Compute L2-normalized, mean-pooled sentence embeddings.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            torch.Tensor: A (len(texts), hidden_size) tensor of unit vectors.
+        """
+        return self.sentence_encoder.embed(texts)
+
+    def scores(self, descriptions: list[str]) -> list[list[float]]:
+        """
+        Compute the probability of each candidate label for each description.
+
+        Args:
+            descriptions (list[str]): The incident description texts.
+
+        Returns:
+            list[list[float]]: One list of label probabilities per description.
+        """
+        similarities = self.embed(descriptions) @ self.label_embeddings.T
+        return (similarities / self.temperature).softmax(dim=-1).tolist()
@@ -0,0 +1,84 @@
+"""
+Test module for authentication.
+
+This module checks that the authenticated principal is cached between requests,
+invalidated when the user changes, and built from the token claims alone in
+stateless mode.
+"""
+
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from passlib.context import CryptContext
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints import authentication
+from app.api.endpoints.authentication import create_access_token, get_current_user, token as login
+from app.core.security import PasswordHasher, PasswordHasherBusy
+from app.db.crud import create_user, get_user_by_username
+from app.services.principal_cache import principal_cache
+
+# Stored user with a valid token, and an empty principal cache
+@pytest.fixture
+def token(database_url):
+    principal_cache.clear()
+    db = sessionmaker(bind=create_engine(database_url))()
+    user = create_user(db, "user@example.com", "secret")
+    db.close()
+    yield create_access_token({"sub": user.email, "uid": user.id})
+    principal_cache.clear()
+
+# Test that the user is looked up once and then served from the cache
+def test_principal_cache(token, run_async):
+    with patch.object(authentication, "get_user_by_username", wraps=authentication.get_user_by_username) as lookup:
+        first = run_async(get_current_user, token)
+        second = run_async(get_current_user, token)
+
+    assert first == second
+    assert first.email == "user@example.com"
+    assert lookup.call_count == 1
+
+    principal_cache.pop("user@example.com")
+    with pytest.raises(HTTPException):
+        run_async(get_current_user, create_access_token({"sub": "unknown@example.com"}))
+
+# Test that stateless mode trusts the token claims without a lookup
+def test_stateless_mode(token, run_async):
+    with patch.object(authentication, "AUTH_STATELESS", True), \
+            patch.object(authentication, "get_user_by_username") as lookup:
+        principal = run_async(get_current_user, token)
+
+    assert (principal.id, principal.email) == (1, "user@example.com")
+    lookup.assert_not_called()
+
+# Test that a login rehashes a password stored with another bcrypt cost
+def test_rehash_on_login(token, database_url, run_async):
+    hasher = PasswordHasher(workers=1, max_queue=0, context=CryptContext(schemes=["bcrypt"], bcrypt__rounds=5))
+    form = SimpleNamespace(username="user@example.com", password="secret")
+    with patch.object(authentication, "password_hasher", hasher):
+        response = run_async(login, form)
+
+    assert response["token_type"] == "bearer"
+    db = sessionmaker(bind=create_engine(database_url))()
+    assert get_user_by_username(db, "user@example.com").hashed_password.startswith("$2b$05$")
+    assert hasher.stats()["operations"] == 1
+
+# Test that operations beyond the queue limit are rejected at once
+def test_password_hasher_rejects_when_full():
+    release = threading.Event()
+    context = SimpleNamespace(verify_and_update=lambda plain, hashed: (release.wait(5), None))
+    hasher = PasswordHasher(workers=1, max_queue=1, context=context)
+
+    async def burst():
+        running = [asyncio.ensure_future(hasher.verify_and_update("p", "h")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.verify_and_update("p", "h")
+        release.set()
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(burst()) == [(True, None), (True, None)]
+    assert hasher.stats()["rejected"] == 1
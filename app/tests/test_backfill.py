@@ -0,0 +1,38 @@
+"""
+Test module for the classification backfill.
+
+This module checks that the backfill command classifies the uncategorized incidents
+and settles their classification jobs, without cancelling their embedding jobs.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.crud import create_incident
+from app.models.classification_job import ClassificationJob
+from app.models.incident import Incident
+from app.schemas.incident import IncidentCreate
+from app.services.classification_cache import ClassificationCache
+from app.services.classifier import Classification
+from scripts.backfill_classifications import backfill
+
+# Test that a backfill cancels the classification job of an incident but keeps its embedding job queued
+def test_backfill_keeps_embedding_jobs(database_url):
+    session_factory = sessionmaker(bind=create_engine(database_url))
+    db = session_factory()
+    incident = create_incident(db, IncidentCreate(title="VPN", description="VPN down"), classify=True)
+    db.add(ClassificationJob(incident_id=incident.id, kind=ClassificationJob.EMBED))
+    db.commit()
+
+    classifier = SimpleNamespace(score=lambda descriptions: [Classification("Network Issue", None, None)] * len(descriptions))
+    with patch("scripts.backfill_classifications.load_classifier", return_value=classifier), \
+            patch("scripts.backfill_classifications.SessionLocal", session_factory), \
+            patch("scripts.backfill_classifications.classification_cache", ClassificationCache("m", ["Network Issue"])):
+        backfill(chunk_size=10, batch_size=4)
+
+    db.expire_all()
+    assert db.get(Incident, incident.id).category == "Network Issue"
+    jobs = {job.kind: job.state for job in db.query(ClassificationJob)}
+    assert jobs == {ClassificationJob.CLASSIFY: ClassificationJob.DONE, ClassificationJob.EMBED: ClassificationJob.QUEUED}
+    db.close()
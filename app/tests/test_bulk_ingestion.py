@@ -0,0 +1,55 @@
+"""
+Test module for bulk incident ingestion.
+
+This module checks that valid items of a bulk request are created in one batch with
+their classification jobs, while invalid items are reported individually.
+"""
+
+import threading
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints.incidents import create_bulk
+from app.models.classification_job import ClassificationJob
+from app.models.incident import Incident
+
+# Test that a bulk request creates the valid items, reports the invalid ones and reads the cache off the event loop
+@patch("app.api.endpoints.incidents.INCIDENT_EMBEDDINGS", True)
+@patch("app.api.endpoints.incidents.classification_cache")
+@patch("app.api.endpoints.incidents.classification_queue")
+def test_create_bulk(mock_queue, mock_cache, database_url, run_async):
+    mock_queue.is_ready = True
+    threads = []
+
+    def cached_category(description):
+        threads.append(threading.get_ident())
+        return "Login Issue" if description == "cached" else None
+
+    mock_cache.get.side_effect = cached_category
+    items = [
+        {"title": "VPN", "description": "VPN down"},
+        {"title": "Missing description"},
+        {"title": "Login", "description": "cached"},
+        "not an object",
+        {"title": "Disk", "description": "Disk full"},
+    ]
+
+    response = run_async(create_bulk, items, user=None)
+
+    assert (response.created, response.failed) == (3, 2)
+    assert [result.index for result in response.results] == [0, 1, 2, 3, 4]
+    assert response.results[1].error.startswith("description")
+    assert response.results[3].id is None and response.results[3].error
+    assert response.results[2].category == "Login Issue"
+    assert len(threads) == 3 and threading.get_ident() not in threads
+
+    db = sessionmaker(bind=create_engine(database_url))()
+    stored = {incident.id: incident for incident in db.query(Incident)}
+    assert [stored[result.id].title for result in response.results if result.id] == ["VPN", "Login", "Disk"]
+    jobs = {job.incident_id: job.kind for job in db.query(ClassificationJob)}
+    assert jobs == {
+        response.results[0].id: ClassificationJob.CLASSIFY,
+        response.results[2].id: ClassificationJob.EMBED,
+        response.results[4].id: ClassificationJob.CLASSIFY,
+    }
+    mock_queue.notify.assert_called_once_with(3)
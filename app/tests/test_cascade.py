@@ -0,0 +1,69 @@
+"""
+Test module for the classification cascade.
+
+This module checks the fast TF-IDF classifier and that the cascade only sends the
+incidents it is unsure about, plus its audits, to the zero-shot model.
+"""
+
+import random
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.crud import create_incident, enqueue_classification_jobs, get_categorized_incidents
+from app.schemas.incident import IncidentCreate
+from app.services.cascade import CascadeClassifier
+from app.services.classification_queue import ClassificationQueue
+from app.services.fast_classifier import TfidfLogisticClassifier
+
+EXAMPLES = [
+    ("VPN tunnel down, cannot reach the office network", "Network Issue"),
+    ("Wifi keeps dropping and the network is slow", "Network Issue"),
+    ("Network latency between sites is very high", "Network Issue"),
+    ("Cannot log in, password rejected", "Login Issue"),
+    ("Login fails with invalid password after reset", "Login Issue"),
+    ("Account locked after failed login attempts", "Login Issue"),
+]
+
+# Test that the fast classifier learns its training set and survives a save and load
+def test_fast_classifier_fit_and_save(tmp_path):
+    texts, labels = zip(*EXAMPLES)
+    model = TfidfLogisticClassifier.fit(list(texts), list(labels), min_df=1)
+    path = str(tmp_path / "fast.npz")
+    model.save(path)
+    loaded = TfidfLogisticClassifier.load(path)
+
+    predicted, probabilities = loaded.predict(["the network is down", "password rejected at login", ""])
+    assert predicted[:2] == ["Network Issue", "Login Issue"]
+    assert min(probabilities[:2]) > 0.8 and probabilities[2] < 0.8
+    assert loaded.labels == ["Login Issue", "Network Issue"]
+
+# Test that a queue with a cascade only escalates uncertain and audited incidents, and reports it
+def test_cascade_escalates_uncertain_incidents(database_url):
+    session_factory = sessionmaker(bind=create_engine(database_url))
+    db = session_factory()
+    texts, labels = zip(*EXAMPLES)
+    fast = TfidfLogisticClassifier.fit(list(texts), list(labels), min_df=1)
+    escalated = []
+
+    def classify_batch(descriptions):
+        escalated.extend(descriptions)
+        return ["Server Issue"] * len(descriptions)
+
+    descriptions = ["VPN network down", "Login password rejected", "Printer on fire", "Wifi network slow"]
+    ids = [create_incident(db, IncidentCreate(title="Incident", description=d)).id for d in descriptions]
+    enqueue_classification_jobs(db, ids)
+    cascade = CascadeClassifier(fast, classify_batch, threshold=0.8, audit_rate=0.5, rng=random.Random(3))
+    queue = ClassificationQueue(
+        classify_batch=cascade, session_factory=session_factory, max_batch_size=8, max_wait=0.2
+    )
+    queue.notify(len(ids))
+    queue.stop(timeout=5)
+
+    stats = queue.stats()["cascade"]
+    assert "Printer on fire" in escalated
+    assert stats["escalated"] == 1 and stats["fast_classified"] == 3
+    assert stats["audited"] == len(escalated) - 1 and stats["agreed"] == 0
+    assert stats["escalation_rate"] == 0.25
+
+    categories = dict(get_categorized_incidents(db, ["Network Issue", "Login Issue", "Server Issue"]))
+    assert categories["Printer on fire"] == "Server Issue"
+    assert categories["Login password rejected"] in ("Login Issue", "Server Issue")
@@ -0,0 +1,261 @@
+"""
+Test module for the classification queue.
+
+This module checks that queued classification jobs are claimed and classified in
+micro-batches, that the categories are written back to the database, and that
+failed or abandoned jobs are retried.
+"""
+
+import itertools
+import queue
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.base import Base
+from app.db.crud import enqueue_classification_jobs
+from app.models.classification_job import ClassificationJob
+from app.models.incident import Incident
+from app.services.cascade import FAST_MODEL_ID
+from app.services.classification_cache import ClassificationCache
+from app.services.classification_queue import ClassificationQueue, ClassificationWorkerPool
+from app.services.classifier import LazyModel
+from app.services.classifier import Classification
+
+# In-memory database shared by every session of a test
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _store_incidents(session_factory, descriptions):
+    db = session_factory()
+    rows = [Incident(title="Incident", description=description) for description in descriptions]
+    db.add_all(rows)
+    db.commit()
+    ids = [row.id for row in rows]
+    enqueue_classification_jobs(db, ids)
+    db.close()
+    return ids
+
+def _job_states(session_factory):
+    db = session_factory()
+    states = [(job.state, job.attempts) for job in db.query(ClassificationJob).order_by(ClassificationJob.id)]
+    db.close()
+    return states
+
+# Three stored incidents with a queued classification job each
+@pytest.fixture
+def incidents(session_factory):
+    return _store_incidents(session_factory, [f"description {i}" for i in range(3)])
+
+# Test that submitted incidents are classified in a single batch
+def test_queue_classifies_in_batches(session_factory, incidents):
+    calls = []
+
+    def classify_batch(descriptions):
+        calls.append(list(descriptions))
+        return [f"Category {d[-1]}" for d in descriptions]
+
+    queue = ClassificationQueue(
+        classify_batch=classify_batch,
+        session_factory=session_factory,
+        max_batch_size=8,
+        max_wait=0.5,
+    )
+    queue.notify(len(incidents))
+    queue.stop(timeout=5)
+
+    assert calls == [["description 0", "description 1", "description 2"]]
+    db = session_factory()
+    categories = [db.get(Incident, incident_id).category for incident_id in incidents]
+    db.close()
+    assert categories == ["Category 0", "Category 1", "Category 2"]
+    assert _job_states(session_factory) == [("done", 1)] * 3
+
+    stats = queue.stats()
+    assert stats["batches"] == 1
+    assert stats["incidents"] == 3
+    assert stats["last_batch_size"] == 3
+
+# Test that a batch never exceeds the configured size
+def test_queue_respects_max_batch_size(session_factory, incidents):
+    sizes = []
+
+    def classify_batch(descriptions):
+        sizes.append(len(descriptions))
+        return ["Other"] * len(descriptions)
+
+    queue = ClassificationQueue(
+        classify_batch=classify_batch,
+        session_factory=session_factory,
+        max_batch_size=2,
+        max_wait=0.5,
+    )
+    queue.notify(len(incidents))
+    queue.stop(timeout=5)
+
+    assert sizes == [2, 1]
+    assert queue.stats()["batches"] == 2
+
+# Test that a failing model call releases the jobs for a retry
+def test_queue_retries_failed_batch(session_factory, incidents):
+    def classify_batch(descriptions):
+        raise RuntimeError("model unavailable")
+
+    queue = ClassificationQueue(
+        classify_batch=classify_batch,
+        session_factory=session_factory,
+        max_batch_size=8,
+        max_wait=0.01,
+        max_attempts=2,
+    )
+    queue.notify()
+    queue.stop(timeout=5)
+
+    assert queue.stats()["failed_batches"] == 1
+    assert queue.stats()["batches"] == 0
+    assert _job_states(session_factory) == [("queued", 1)] * 3
+
+    # The second failure exhausts the attempts
+    queue.notify()
+    queue.stop(timeout=5)
+    assert _job_states(session_factory) == [("failed", 2)] * 3
+
+# Test that a job abandoned by a crashed worker is claimed again once its lease expires
+def test_queue_reclaims_abandoned_jobs(session_factory, incidents):
+    db = session_factory()
+    db.query(ClassificationJob).filter(ClassificationJob.incident_id == incidents[0]).update(
+        {"state": "running", "attempts": 1, "lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.query(ClassificationJob).filter(ClassificationJob.incident_id == incidents[1]).update(
+        {"state": "running", "attempts": 1, "lease_expires_at": datetime.utcnow() + timedelta(minutes=5)}
+    )
+    db.commit()
+    db.close()
+
+    queue = ClassificationQueue(
+        classify_batch=lambda descriptions: ["Other"] * len(descriptions),
+        session_factory=session_factory,
+        max_batch_size=8,
+        max_wait=0.01,
+    )
+    queue.start()
+    queue.stop(timeout=5)
+
+    assert _job_states(session_factory) == [("done", 2), ("running", 1), ("done", 1)]
+
+# Test that repeated descriptions are classified once and cached
+def test_queue_deduplicates_and_caches(session_factory):
+    calls = []
+
+    def classify_batch(descriptions):
+        calls.append(list(descriptions))
+        return ["Network Issue"] * len(descriptions)
+
+    cache = ClassificationCache(model_id="test-model", labels=["Network Issue", "Other"])
+    queue = ClassificationQueue(
+        classify_batch=classify_batch,
+        session_factory=session_factory,
+        max_batch_size=8,
+        max_wait=0.5,
+        cache=cache,
+    )
+    vpn_ids = _store_incidents(session_factory, ["VPN down", "vpn   DOWN!"])
+    queue.notify(len(vpn_ids))
+    queue.stop(timeout=5)
+
+    assert calls == [["VPN down"]]
+    assert cache.get("Vpn down.") == "Network Issue"
+    db = session_factory()
+    assert db.get(Incident, vpn_ids[1]).category == "Network Issue"
+    db.close()
+
+# Test that the answers of the fast cascade stage are not cached under the zero-shot model
+def test_queue_does_not_cache_fast_answers(session_factory):
+    def classify_batch(descriptions):
+        return [
+            Classification("Network Issue", None, FAST_MODEL_ID if "VPN" in d else "test-model")
+            for d in descriptions
+        ]
+
+    cache = ClassificationCache(model_id="test-model", labels=["Network Issue", "Other"])
+    queue = ClassificationQueue(
+        classify_batch=classify_batch,
+        session_factory=session_factory,
+        max_wait=0.5,
+        cache=cache,
+    )
+    ids = _store_incidents(session_factory, ["VPN down", "Router down"])
+    queue.notify(len(ids))
+    queue.stop(timeout=5)
+
+    assert cache.get("VPN down") is None
+    assert cache.get("Router down") == "Network Issue"
+
+# Test that cache keys depend on the label set and that entries expire
+def test_classification_cache_keys_and_ttl(tmp_path):
+    cache = ClassificationCache(model_id="m", labels=["A", "B"], path=str(tmp_path / "cache.db"))
+    other_labels = ClassificationCache(model_id="m", labels=["A", "C"])
+    assert cache.key("VPN down") != other_labels.key("VPN down")
+
+    cache.set("VPN down", "A")
+    cache.memory.clear()
+    assert cache.get("vpn down") == "A"
+    assert cache.stats()["persistent"]["hits"] == 1
+
+    expired = ClassificationCache(model_id="m", labels=["A"], ttl=-1, path=str(tmp_path / "expired.db"))
+    expired.set("VPN down", "A")
+    assert expired.get("VPN down") is None
+    assert expired.stats()["memory"]["expirations"] == 1
+
+class _FakeProcess:
+    """Stand-in for a worker process, alive until killed."""
+
+    pids = itertools.count(1000)
+
+    def __init__(self, **kwargs):
+        self.pid, self.exitcode, self.alive = next(self.pids), None, False
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def kill(self):
+        self.alive, self.exitcode = False, -9
+
+# Test that a killed worker is replaced and no longer counted as ready
+def test_pool_replaces_dead_workers(monkeypatch):
+    context = type("Context", (), {"Process": _FakeProcess, "Queue": queue.Queue})()
+    monkeypatch.setattr("app.services.classification_queue.multiprocessing.get_context", lambda method: context)
+    pool = ClassificationWorkerPool(processes=2)
+    pool.start()
+    first, second = pool._workers
+    pool._events.put((first.pid, LazyModel.READY, None))
+    pool._events.put((second.pid, LazyModel.FAILED, "OSError('no model')"))
+    assert pool.is_ready
+    assert pool.status()["ready_workers"] == 1
+
+    first.kill()
+    second.kill()
+    assert not pool.is_ready
+    replacement = pool._workers[0]
+    assert replacement is not first and replacement.is_alive()
+    # The worker that failed to load the model is not restarted
+    assert pool._workers[1] is second
+    assert pool.status() == {
+        "state": LazyModel.LOADING,
+        "workers": 2,
+        "ready_workers": 0,
+        "failed_workers": 1,
+        "errors": ["OSError('no model')"],
+    }
+
+    pool._events.put((replacement.pid, LazyModel.READY, None))
+    assert pool.is_ready
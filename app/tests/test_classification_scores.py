@@ -0,0 +1,65 @@
+"""
+Test module for the stored classification scores.
+
+This module checks that classification workers store the score of every label with
+the category, and which incidents are reclassified after the label set changes.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints import incidents as incident_endpoints
+from app.db.crud import create_incident, enqueue_classification_jobs, get_rescore_incident_ids, update_incident_categories
+from app.schemas.incident import IncidentCreate
+from app.services.classification_queue import ClassificationQueue
+from app.services.classifier import Classification
+
+LABELS = ["Network Issue", "Login Issue", "Other"]
+
+# Test that the queue stores the score of every label, readable through the API
+def test_queue_stores_scores(database_url, run_async):
+    session_factory = sessionmaker(bind=create_engine(database_url))
+    db = session_factory()
+    ids = [create_incident(db, IncidentCreate(title="Incident", description=d)).id for d in ("VPN down", "Printer")]
+    enqueue_classification_jobs(db, ids)
+
+    def classify_batch(descriptions):
+        return [
+            Classification("Network Issue", {"Network Issue": 0.75, "Login Issue": 0.2, "Other": 0.05}, "nli")
+            if "VPN" in description else "Other"
+            for description in descriptions
+        ]
+
+    queue = ClassificationQueue(
+        classify_batch=classify_batch, session_factory=session_factory, labels=LABELS, max_batch_size=8, max_wait=0.2
+    )
+    queue.notify(len(ids))
+    queue.stop(timeout=5)
+
+    scores = run_async(incident_endpoints.classification, ids[0], user=None)
+    assert scores.model == "nli" and scores.top_score == 0.75 and scores.inference_ms >= 0
+    assert scores.scores == pytest.approx({"Network Issue": 0.75, "Login Issue": 0.2, "Other": 0.05}, abs=1e-3)
+    with pytest.raises(incident_endpoints.HTTPException) as error:
+        run_async(incident_endpoints.classification, ids[1], user=None)
+    assert error.value.status_code == 409
+
+# Test that only uncertain incidents and incidents with a removed category are rescored
+def test_rescore_selection(database_url):
+    db = sessionmaker(bind=create_engine(database_url))()
+    ids = [create_incident(db, IncidentCreate(title="Incident", description=str(i))).id for i in range(5)]
+    update_incident_categories(
+        db,
+        {ids[0]: "Network Issue", ids[1]: "Network Issue", ids[2]: "Others", ids[3]: "Login Issue"},
+        {
+            ids[0]: ("nli", {"Network Issue": 0.95, "Other": 0.05}, 10.0),
+            ids[1]: ("nli", {"Network Issue": 0.55, "Other": 0.45}, 10.0),
+        },
+        LABELS,
+    )
+    new_labels = LABELS + ["Database Issue"]
+
+    assert get_rescore_incident_ids(db, LABELS, 0.6) == [ids[2]]
+    assert get_rescore_incident_ids(db, new_labels, 0.6) == [ids[1], ids[2]]
+    assert get_rescore_incident_ids(db, new_labels, 0.6, include_unscored=True) == ids[1:4]
+    enqueue_classification_jobs(db, [ids[1]])
+    assert get_rescore_incident_ids(db, new_labels, 0.6) == [ids[2]]
@@ -5,10 +5,13 @@ This module contains tests for the incident API endpoints, including
 creation, listing, and classification functionality.
 """
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
-from app.main import app
+from unittest.mock import patch, AsyncMock, MagicMock
+from main import app
+from app.api.endpoints.authentication import get_current_user
+from app.db.session import get_async_db, get_async_replica_db
 from app.db.crud import create_incident, get_incident, update_incident
 from app.schemas.incident import IncidentCreate, IncidentUpdate
 from app.models.incident import Incident
@@ -50,50 +53,56 @@ def sample_incident():
         status="new",
         category="Network Issue",
         created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        updated_at=datetime.utcnow(),
+        version=1
     )
 
+# Override the database and authentication dependencies of the endpoints
+@pytest.fixture
+def overrides(mock_db, mock_current_user):
+    async def get_db():
+        yield mock_db
+
+    app.dependency_overrides[get_async_db] = get_db
+    app.dependency_overrides[get_async_replica_db] = get_db
+    app.dependency_overrides[get_current_user] = lambda: mock_current_user
+    yield
+    app.dependency_overrides.clear()
+
 # Test creating an incident
-@patch("app.api.endpoints.incidents.get_current_user")
-@patch("app.api.endpoints.incidents.get_db")
-def test_create_incident(mock_get_db, mock_get_current_user, mock_db, mock_current_user, sample_incident_data, sample_incident):
-    # Setup mocks
-    mock_get_current_user.return_value = mock_current_user
-    mock_get_db.return_value = mock_db
+@patch("app.api.endpoints.incidents.classification_queue")
+@patch("app.api.endpoints.incidents.classification_cache")
+def test_create_incident(mock_cache, mock_queue, overrides, mock_db, sample_incident_data, sample_incident):
+    mock_cache.get.return_value = None
+    mock_queue.is_ready = True
     
     # Mock the create_incident function
-    with patch("app.api.endpoints.incidents.create_incident") as mock_create:
+    with patch("app.api.endpoints.incidents.create_incident", new_callable=AsyncMock) as mock_create:
         mock_create.return_value = sample_incident
         
         # Make the request
-        response = client.post("/incidents/", json=sample_incident_data)
+        response = client.post("/incidents/incidents/", json=sample_incident_data)
         
         # Assert response
         assert response.status_code == 200
         assert response.json()["title"] == sample_incident_data["title"]
         assert response.json()["description"] == sample_incident_data["description"]
-        assert "id" in response.json()
+        assert response.json()["id"] == 1
         
-        # Verify create_incident was called with correct data
-        mock_create.assert_called_once()
-        
-        # Verify background task was added
-        # Note: This is challenging to test directly, but we can check the function was imported
+        # Verify create_incident was called with the request data and the workers notified
+        mock_create.assert_awaited_once_with(
+            mock_db, IncidentCreate(**sample_incident_data), category=None, classify=True, embedding=None
+        )
+        mock_queue.notify.assert_called_once()
 
 # Test listing all incidents
-@patch("app.api.endpoints.incidents.get_current_user")
-@patch("app.api.endpoints.incidents.get_db")
-def test_list_all_incidents(mock_get_db, mock_get_current_user, mock_db, mock_current_user, sample_incident):
-    # Setup mocks
-    mock_get_current_user.return_value = mock_current_user
-    mock_get_db.return_value = mock_db
-    
-    # Mock the get_incident function
-    with patch("app.api.endpoints.incidents.get_incident") as mock_get:
+def test_list_all_incidents(overrides, mock_db, sample_incident):
+    # Mock the list_incidents function
+    with patch("app.api.endpoints.incidents.list_incidents", new_callable=AsyncMock) as mock_get:
         mock_get.return_value = [sample_incident]
         
         # Make the request
-        response = client.get("/")
+        response = client.get("/incidents/")
         
         # Assert response
         assert response.status_code == 200
@@ -102,11 +111,16 @@ def test_list_all_incidents(mock_get_db, mock_get_current_user, mock_db, mock_cu
         assert response.json()[0]["title"] == sample_incident.title
         assert response.json()[0]["description"] == sample_incident.description
         
-        # Verify get_incident was called
-        mock_get.assert_called_once_with(mock_db)
+        # Verify list_incidents was called for the first page, without filters
+        mock_get.assert_called_once_with(
+            mock_db, limit=101, after=None, status=None, category=None,
+            created_from=None, created_to=None,
+        )
+        assert "X-Next-Cursor" not in response.headers
 
 # Test the classification function
 def test_classify_incident():
+    pytest.importorskip("transformers")
     from app.services.classifier import classify_category
     
     # Test network classification
@@ -125,22 +139,73 @@ def test_classify_incident():
     assert classify_category("Unknown problem") == "Other"
 
 # Test the background classification task
-@patch("app.api.endpoints.incidents.update_incident")
-def test_classify_background_task(mock_update):
-    from app.api.endpoints.incidents import _classify
-    
-    # Create mock db and incident
-    mock_db = MagicMock()
-    incident_id = 1
-    description = "Network is down"
-    
-    # Call the function
-    _classify(mock_db, incident_id, description)
-    
-    # Verify update_incident was called with correct parameters
-    mock_update.assert_called_once()
-    args, kwargs = mock_update.call_args
-    assert args[0] == mock_db
-    assert args[1] == incident_id
-    assert isinstance(args[2], IncidentUpdate)
-    assert args[2].category == "Network Issue"
\ No newline at end of file
+@patch("app.api.endpoints.incidents.classification_queue")
+@patch("app.api.endpoints.incidents.classification_cache")
+@patch("app.api.endpoints.incidents.create_incident", new_callable=AsyncMock)
+def test_classify_background_task(mock_create, mock_cache, mock_queue, mock_db, sample_incident_data, sample_incident):
+    from app.api.endpoints.incidents import create
+    
+    # No cached category, model ready
+    mock_cache.get.return_value = None
+    mock_queue.is_ready = True
+    mock_create.return_value = sample_incident
+    
+    # Call the endpoint function
+    data = IncidentCreate(**sample_incident_data)
+    response = asyncio.run(create(data, db=mock_db, user=None))
+    assert (response.id, response.title, response.category) == (1, "Test Incident", "Network Issue")
+    assert response.duplicates == []
+    
+    # Verify a classification job was created with the incident and the workers notified
+    mock_create.assert_awaited_once_with(mock_db, data, category=None, classify=True, embedding=None)
+    mock_queue.notify.assert_called_once()
+
+# Test that a cached classification skips the classification job, only queuing an embedding
+@patch("app.api.endpoints.incidents.INCIDENT_EMBEDDINGS", True)
+@patch("app.api.endpoints.incidents.classification_queue")
+@patch("app.api.endpoints.incidents.classification_cache")
+@patch("app.api.endpoints.incidents.create_incident", new_callable=AsyncMock)
+def test_classify_cache_hit(mock_create, mock_cache, mock_queue, mock_db, sample_incident_data, sample_incident):
+    from app.api.endpoints.incidents import create
+    
+    mock_cache.get.return_value = "Network Issue"
+    mock_create.return_value = sample_incident
+    
+    data = IncidentCreate(**sample_incident_data)
+    response = asyncio.run(create(data, db=mock_db, user=None))
+    assert (response.id, response.category) == (1, "Network Issue")
+    
+    # Verify the cached category was stored and only an embedding job was queued
+    mock_create.assert_awaited_once_with(mock_db, data, category="Network Issue", embedding=None, embed=True)
+    mock_queue.notify.assert_called_once()
+
+# Test that the model holder loads lazily and reports its state
+def test_lazy_model_loading():
+    from app.services.classifier import LazyModel
+    
+    loader = MagicMock(return_value="model")
+    lazy = LazyModel(loader)
+    
+    # Nothing is loaded until the model is needed
+    assert lazy.status()["state"] == LazyModel.UNLOADED
+    loader.assert_not_called()
+    
+    # The first use loads the model, later uses reuse it
+    assert lazy.get() == "model"
+    assert lazy.get() == "model"
+    loader.assert_called_once()
+    assert lazy.is_ready
+
+# Test that a failed load is reported and retried
+def test_lazy_model_failure():
+    from app.services.classifier import LazyModel
+    
+    loader = MagicMock(side_effect=[OSError("download failed"), "model"])
+    lazy = LazyModel(loader)
+    
+    lazy.warm_up().join()
+    assert lazy.status()["state"] == LazyModel.FAILED
+    assert "download failed" in lazy.status()["error"]
+    
+    assert lazy.get() == "model"
+    assert lazy.status()["state"] == LazyModel.READY
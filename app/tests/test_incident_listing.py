@@ -0,0 +1,115 @@
+"""
+Test module for incident listing.
+
+This module checks the keyset pagination and the filters of the incident listing,
+both in the CRUD layer and through the cursor tokens of the API, and the streaming
+export of incidents.
+"""
+
+import json
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from main import app
+from app.api.endpoints.authentication import get_current_user
+from app.api.endpoints.incidents import list_all, read
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.crud import list_incidents
+from app.models.incident import Incident
+
+START = datetime(2024, 1, 1)
+
+# Database with 10 incidents, two of them sharing a creation time
+@pytest.fixture
+def db(database_url):
+    engine = create_engine(database_url)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    for i in range(10):
+        session.add(Incident(
+            title=f"Incident {i}",
+            description="description",
+            status="open" if i % 2 else "resolved",
+            category="Network Issue" if i < 5 else "Server Issue",
+            created_at=START + timedelta(hours=min(i, 8)),
+        ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+# Test that walking the pages returns every incident once, most recent first
+def test_keyset_pages(db):
+    seen = []
+    after = None
+    while True:
+        page = list_incidents(db, limit=3, after=after)
+        if not page:
+            break
+        seen.extend(page)
+        after = (page[-1].created_at, page[-1].id)
+
+    assert [incident.id for incident in seen] == list(range(10, 0, -1))
+
+# Test that filters are applied in the query
+def test_filters(db):
+    page = list_incidents(
+        db,
+        status="open",
+        category="Network Issue",
+        created_from=START + timedelta(hours=1),
+        created_to=START + timedelta(hours=4),
+    )
+
+    assert [incident.title for incident in page] == ["Incident 3", "Incident 1"]
+
+# Test that the endpoint returns a next cursor only while more incidents are available
+def test_next_cursor(db, run_async):
+    filters = dict(status=None, category=None, created_from=None, created_to=None, user=None)
+    response = MagicMock(headers={})
+    first = run_async(list_all, response, limit=6, cursor=None, **filters)
+    cursor = response.headers["X-Next-Cursor"]
+    assert decode_cursor(cursor) == (first[-1].created_at, first[-1].id)
+
+    response = MagicMock(headers={})
+    second = run_async(list_all, response, limit=6, cursor=cursor, **filters)
+    assert len(first) + len(second) == 10
+    assert "X-Next-Cursor" not in response.headers
+
+    with pytest.raises(HTTPException):
+        run_async(list_all, response, limit=6, cursor="not a cursor", **filters)
+
+# Test that a single incident is returned, or a 404 error when it does not exist
+def test_read_incident(db, run_async):
+    assert run_async(read, 3, user=None).title == "Incident 2"
+
+    with pytest.raises(HTTPException) as error:
+        run_async(read, 42, user=None)
+    assert error.value.status_code == 404
+
+# Test that cursors round-trip
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(START, 42)) == (START, 42)
+
+# Test that the export streams every matching incident in both formats
+def test_export_streams_incidents(db):
+    app.dependency_overrides[get_current_user] = lambda: "test@example.com"
+    factory = sessionmaker(bind=db.get_bind())
+    try:
+        with patch("app.api.endpoints.incidents.ReplicaSessionLocal", factory), \
+                patch("app.api.endpoints.incidents.EXPORT_CHUNK_SIZE", 2):
+            client = TestClient(app)
+            ndjson = client.get("/incidents/export", params={"status": "open"})
+            csv = client.get("/incidents/export", params={"format": "csv"})
+    finally:
+        app.dependency_overrides.clear()
+
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert [line["title"] for line in lines] == [f"Incident {i}" for i in (1, 3, 5, 7, 9)]
+    rows = csv.text.splitlines()
+    assert rows[0].startswith("id,title,description,status,category")
+    assert len(rows) == 11
@@ -0,0 +1,43 @@
+"""
+Test module for the incident full-text search.
+
+This module checks that the search index follows the incident writes, and that
+search results are ranked and paginated.
+"""
+
+from fastapi import Response
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints.incidents import search
+from app.db.crud import create_incident, create_incidents, delete_incident, search_incidents
+from app.models.incident import Incident
+from app.schemas.incident import IncidentCreate
+
+# Test that searches follow the writes and rank the best matches first
+def test_search_incidents(database_url, run_async):
+    db = sessionmaker(bind=create_engine(database_url))()
+    vpn = create_incident(db, IncidentCreate(title="VPN", description="The VPN drops every hour"))
+    payments = create_incident(db, IncidentCreate(title="Payments DB down", description="Payments database unreachable"))
+    deleted, slow = create_incidents(db, [
+        IncidentCreate(title="Old", description="Payments database restarted"),
+        IncidentCreate(title="Checkout slow", description="Latency on the payments service"),
+    ])
+    delete_incident(db, deleted)
+    db.execute(update(Incident).where(Incident.id == vpn.id).values(description="Payments VPN tunnel down"))
+    db.commit()
+
+    assert [incident.id for incident, _ in search_incidents(db, "payments databases")] == [payments.id]
+    assert {incident.id for incident, _ in search_incidents(db, "down")} == {payments.id, vpn.id}
+    assert search_incidents(db, "hour") == []
+    assert [incident.id for incident, _ in search_incidents(db, 'payments-db ("')] == [payments.id]
+    assert search_incidents(db, "*") == []
+
+    response = Response()
+    first = run_async(search, response, q="payments", limit=2, cursor=None, status=None, category=None, user=None)
+    second = run_async(
+        search, Response(), q="payments", limit=2, cursor=response.headers["X-Next-Cursor"],
+        status=None, category=None, user=None,
+    )
+    ranked = [incident.id for incident, _ in search_incidents(db, "payments")]
+    assert [incident.id for incident in first + second] == ranked
+    assert sorted(ranked) == sorted([vpn.id, payments.id, slow])
@@ -0,0 +1,73 @@
+"""
+Test module for the incident statistics.
+
+This module checks that the incident counters follow the creations, updates,
+classifications and deletions of incidents, and match a rebuild from scratch.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints.incidents import stats
+from app.db.crud import (
+    create_incident,
+    create_incidents,
+    delete_incident,
+    get_incident_stats,
+    rebuild_incident_counters,
+    update_incident,
+    update_incident_categories,
+)
+from app.db.incident_counters import move_incident
+from app.models.incident import Incident
+from app.models.incident_counter import IncidentCounter
+from app.schemas.incident import IncidentCreate, IncidentUpdate
+
+def _counters(db):
+    return sorted(tuple(row) for row in db.execute(
+        select(IncidentCounter.hour, IncidentCounter.status, IncidentCounter.category, IncidentCounter.count)
+        .where(IncidentCounter.count != 0)
+    ))
+
+# Test that the counters are maintained by every write and match a rebuild
+def test_counters_follow_incident_writes(database_url, run_async):
+    db = sessionmaker(bind=create_engine(database_url))()
+    incident = IncidentCreate(title="VPN", description="VPN down")
+    first = create_incident(db, incident)
+    second = create_incident(db, incident, category="Network", classify=True)
+    third, fourth = create_incidents(db, [incident, incident], categories=[None, "Network"])
+    last_hour = datetime.utcnow() - timedelta(hours=1)
+    db.execute(update(Incident).where(Incident.id == fourth).values(created_at=last_hour))
+    rebuild_incident_counters(db)
+
+    update_incident(db, first.id, IncidentUpdate(status="closed", category="Hardware"))
+    update_incident_categories(db, {third: "Network"})
+    delete_incident(db, second.id)
+
+    counted = _counters(db)
+    rebuild_incident_counters(db)
+    assert counted == _counters(db)
+
+    result = get_incident_stats(db)
+    assert result.total == 3
+    assert {row.status: row.count for row in result.by_status} == {"open": 2, "closed": 1}
+    assert {row.category: row.count for row in result.by_category} == {"Hardware": 1, "Network": 2}
+    assert [row.count for row in result.per_hour] == [1, 2]
+    assert result.per_hour[0].hour == last_hour.replace(minute=0, second=0, microsecond=0)
+
+    response = run_async(stats, created_from=datetime.utcnow(), user=None)
+    assert response.total == 2
+
+# Test that moving an incident between buckets matches a rebuild, and that a no-op move writes nothing
+def test_move_incident_matches_rebuild(database_url):
+    db = sessionmaker(bind=create_engine(database_url))()
+    incident = create_incident(db, IncidentCreate(title="VPN", description="VPN down"), category="Network")
+    rebuild_incident_counters(db)
+
+    move_incident(db, incident.created_at, ("open", "Network"), ("open", "Network"))
+    db.execute(update(Incident).where(Incident.id == incident.id).values(status="closed", category=None))
+    move_incident(db, incident.created_at, ("open", "Network"), ("closed", None))
+
+    counted = _counters(db)
+    rebuild_incident_counters(db)
+    assert counted == _counters(db)
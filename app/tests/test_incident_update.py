@@ -0,0 +1,45 @@
+"""
+Test module for partial incident updates.
+
+This module checks that updates only change the fields that were set, and that the
+version of an incident rejects updates based on a stale copy.
+"""
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints.incidents import HTTPException, patch
+from app.db.crud import create_incident, update_incident_categories
+from app.schemas.incident import IncidentCreate, IncidentUpdate
+
+# Test that a partial update keeps the other fields and increments the version
+def test_patch_applies_only_set_fields(database_url, run_async):
+    db = sessionmaker(bind=create_engine(database_url))()
+    incident = create_incident(db, IncidentCreate(title="VPN", description="VPN down"), category="Network Issue")
+    assert incident.version == 1
+
+    updated = run_async(patch, incident.id, IncidentUpdate(status="in progress"), user=None)
+    assert (updated.status, updated.category, updated.version) == ("in progress", "Network Issue", 2)
+
+    updated = run_async(patch, incident.id, IncidentUpdate(category=None, version=2), user=None)
+    assert (updated.status, updated.category, updated.version) == ("in progress", None, 3)
+
+    with pytest.raises(ValidationError):
+        IncidentUpdate(status=None)
+
+# Test that an update based on a stale version is rejected, including after a classification
+def test_patch_rejects_stale_version(database_url, run_async):
+    db = sessionmaker(bind=create_engine(database_url))()
+    incident = create_incident(db, IncidentCreate(title="VPN", description="VPN down"))
+    update_incident_categories(db, {incident.id: "Network Issue"})
+
+    with pytest.raises(HTTPException) as error:
+        run_async(patch, incident.id, IncidentUpdate(status="closed", version=1), user=None)
+    assert error.value.status_code == 409
+    with pytest.raises(HTTPException) as error:
+        run_async(patch, incident.id + 1, IncidentUpdate(status="closed"), user=None)
+    assert error.value.status_code == 404
+
+    updated = run_async(patch, incident.id, IncidentUpdate(status="closed", version=2), user=None)
+    assert (updated.status, updated.category, updated.version) == ("closed", "Network Issue", 3)
@@ -0,0 +1,66 @@
+"""
+Test module for the metrics.
+
+This module checks the text exposition of the metrics registry, that a disabled
+registry records nothing, and that requests and database statements are timed.
+"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from main import app
+from app.core.metrics import MetricsRegistry
+from app.db.query_metrics import instrument_queries
+from app.services.classification_queue import _queue_depth
+
+# Test that counters, histograms and gauges are rendered in the exposition format
+def test_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("method",))
+    duration = registry.histogram("duration_seconds", "Duration.", buckets=(0.1, 1.0))
+    registry.gauge("depth", "Depth.", lambda: {("queued",): 3}, ("state",))
+    requests.inc(method="GET")
+    requests.inc(2, method="GET")
+    duration.observe(0.05)
+    duration.observe(0.5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{method="GET"} 3' in lines
+    assert 'duration_seconds_bucket{le="0.1"} 1' in lines
+    assert 'duration_seconds_bucket{le="+Inf"} 2' in lines
+    assert "duration_seconds_count 2" in lines
+    assert 'depth{state="queued"} 3' in lines
+
+# Test that a disabled registry does not record anything
+def test_disabled_registry():
+    registry = MetricsRegistry(enabled=False)
+    duration = registry.histogram("duration_seconds", "Duration.")
+    with duration.time():
+        pass
+    duration.observe(1.0)
+
+    assert "duration_seconds_count" not in registry.render()
+
+# Test that requests are timed per route template, statements per operation, and jobs counted once per interval
+def test_request_and_query_metrics(database_url, monkeypatch):
+    # Keep the queue depth gauge off the application database
+    counts = []
+    monkeypatch.setattr(
+        "app.services.classification_queue._job_counts", lambda session_factory: counts.append(1) or {"queued": 2}
+    )
+    _queue_depth.clear()
+    engine = create_engine(database_url)
+    instrument_queries(engine, "test")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    client = TestClient(app)
+    assert client.get("/health/live").status_code == 200
+    body = client.get("/metrics").text
+
+    assert 'http_request_duration_seconds_count{method="GET",route="/health/live",status="200"} 1' in body
+    assert 'db_query_duration_seconds_count{engine="test",operation="SELECT"}' in body
+    assert 'classification_queue_depth{state="queued"} 2' in body
+    assert 'classification_queue_depth{state="queued"} 2' in client.get("/metrics").text
+    assert len(counts) == 1
+    engine.dispose()
@@ -0,0 +1,27 @@
+"""
+Test module for database migrations.
+
+This module checks that a database created before the query indexes existed is
+upgraded in place, and that migrations are only applied once.
+"""
+
+from sqlalchemy import create_engine, inspect
+from app.db.base import Base
+from app.db.migrations import MIGRATIONS, migrate
+
+# Test that an existing incidents table receives the query indexes
+def test_migrate_existing_database():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE incidents (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, "
+            "description VARCHAR NOT NULL, status VARCHAR, category VARCHAR, "
+            "created_at DATETIME, updated_at DATETIME)"
+        )
+    Base.metadata.create_all(bind=engine)
+
+    assert migrate(engine) == [version for version, _, _ in MIGRATIONS]
+    assert migrate(engine) == []
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("incidents")}
+    assert {"ix_incidents_created_at_id", "ix_incidents_uncategorized"} <= indexes
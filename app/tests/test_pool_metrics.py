@@ -0,0 +1,26 @@
+"""
+Test module for connection pool metrics.
+
+This module checks that checkouts, peak usage and hold times of a pool are recorded.
+"""
+
+from sqlalchemy import create_engine, text
+from app.db.pool_metrics import PoolMetrics
+
+# Test that concurrent checkouts and their release are counted
+def test_pool_metrics(database_url):
+    engine = create_engine(database_url, pool_size=2, max_overflow=1)
+    metrics = PoolMetrics(engine)
+
+    first, second = engine.connect(), engine.connect()
+    first.execute(text("SELECT 1"))
+    assert metrics.stats()["checked_out"] == 2
+    first.close()
+    second.close()
+
+    stats = metrics.stats()
+    assert (stats["checkouts"], stats["checked_out"], stats["peak_checked_out"]) == (2, 0, 2)
+    assert stats["connects"] == 2
+    assert stats["size"] == 2
+    assert stats["max_hold_ms"] >= stats["mean_hold_ms"] > 0
+    engine.dispose()
@@ -0,0 +1,99 @@
+"""
+Test module for the similar-incident detection.
+
+This module checks the quantized similarity index, exhaustive and clustered, and
+that classification workers embed incidents for the similarity lookups.
+"""
+
+from types import SimpleNamespace
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints import incidents as incident_endpoints
+from app.db.crud import create_incident, enqueue_classification_jobs
+from app.models.incident_embedding import IncidentEmbedding
+from app.schemas.incident import IncidentCreate
+from app.services.classification_queue import ClassificationQueue
+from app.services.classifier import MODEL_NAME
+from app.services.similarity_index import SimilarityIndex, dequantize, quantize
+
+# Test that the clustered index finds nearly the same neighbours as the exhaustive one
+def test_clustered_index_recall():
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(40, 64))
+    points = centers[rng.integers(0, 40, size=4000)] + rng.normal(scale=0.3, size=(4000, 64))
+    vectors = quantize(points)
+    assert min(float(dequantize(vector) @ (point / np.linalg.norm(point))) for vector, point in zip(vectors, points)) > 0.999
+
+    exact, clustered = SimilarityIndex(ivf_min_size=10**9), SimilarityIndex(ivf_min_size=1000, nprobe=8)
+    for index in (exact, clustered):
+        for start in range(0, 4000, 500):
+            index.add(list(range(start, start + 500)), vectors[start:start + 500])
+    assert (exact.kind, clustered.kind, len(clustered)) == ("exact", "ivf", 4000)
+
+    queries = centers + rng.normal(scale=0.3, size=centers.shape)
+    found = [
+        len({i for i, _ in exact.search(query, 10)} & {i for i, _ in clustered.search(query, 10)})
+        for query in queries
+    ]
+    assert sum(found) / (10 * len(queries)) > 0.9
+    assert exact.search(points[7], 1, exclude=None)[0][0] == 7
+
+# Test that workers store the embeddings of a batch and that similar incidents are found
+def test_queue_embeds_incidents(database_url, run_async, monkeypatch):
+    session_factory = sessionmaker(bind=create_engine(database_url))
+    db = session_factory()
+    descriptions = ["VPN down", "VPN down", "VPN is down again", "Disk full"]
+    ids = [create_incident(db, IncidentCreate(title="Incident", description=d)).id for d in descriptions]
+    enqueue_classification_jobs(db, ids)
+    calls = []
+
+    def embed_batch(texts):
+        calls.append(texts)
+        return np.array([[text.count("VPN"), text.count("Disk"), 0.1 * len(text)] for text in texts])
+
+    queue = ClassificationQueue(
+        classify_batch=lambda texts: ["Network Issue"] * len(texts),
+        embed_batch=embed_batch,
+        session_factory=session_factory,
+        max_batch_size=8,
+        max_wait=0.2,
+    )
+    queue.notify(len(ids))
+    queue.stop(timeout=5)
+
+    assert calls == [["VPN down", "VPN is down again", "Disk full"]]
+    stored = {row.incident_id: row for row in db.query(IncidentEmbedding)}
+    assert sorted(stored) == ids and {row.model for row in stored.values()} == {MODEL_NAME}
+
+    monkeypatch.setattr(incident_endpoints, "similarity_index", SimilarityIndex())
+    similar = run_async(incident_endpoints.similar, ids[0], limit=2, min_score=0.5, user=None)
+    assert [incident.id for incident in similar] == [ids[1], ids[2]]
+    assert similar[0].score > 0.999
+
+# Test that an incident categorized from the cache is embedded, without classification, and found
+def test_cache_hit_incident_is_embedded(database_url, run_async, monkeypatch):
+    session_factory = sessionmaker(bind=create_engine(database_url))
+    first = create_incident(session_factory(), IncidentCreate(title="Incident", description="VPN down"), classify=True)
+    notified = []
+    monkeypatch.setattr(incident_endpoints, "INCIDENT_EMBEDDINGS", True)
+    monkeypatch.setattr(incident_endpoints, "classification_cache", SimpleNamespace(get=lambda description: "Network Issue"))
+    monkeypatch.setattr(incident_endpoints, "classification_queue", SimpleNamespace(notify=lambda count=1: notified.append(count), is_ready=True))
+    second = run_async(incident_endpoints.create, IncidentCreate(title="Incident", description="vpn down!"), user=None)
+    assert second.category == "Network Issue" and notified == [1]
+
+    classified = []
+    queue = ClassificationQueue(
+        classify_batch=lambda texts: classified.extend(texts) or ["Network Issue"] * len(texts),
+        embed_batch=lambda texts: np.array([[1.0, 0.1 * len(text)] for text in texts]),
+        session_factory=session_factory,
+        max_batch_size=8,
+        max_wait=0.2,
+    )
+    queue.notify(2)
+    queue.stop(timeout=5)
+    assert classified == ["VPN down"]
+
+    monkeypatch.setattr(incident_endpoints, "similarity_index", SimilarityIndex())
+    similar = run_async(incident_endpoints.similar, second.id, limit=5, min_score=0.5, user=None)
+    assert [incident.id for incident in similar] == [first.id]
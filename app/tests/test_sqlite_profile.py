@@ -0,0 +1,76 @@
+"""
+Test module for the SQLite connection profiles.
+
+This module checks the pragmas of the "wal" profile and the routing of statements
+between the writer and reader engines, including read replicas.
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+from app.db.crud import create_incident, list_incidents
+from app.db.engines import create_engines, create_replica_engines, to_async_url
+from app.db.routing import RoutingSession
+from app.models.incident import Incident
+from app.schemas.incident import IncidentCreate
+
+# Test that the "wal" profile applies its pragmas on separate writer and reader engines
+def test_wal_profile_sets_pragmas(tmp_path):
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'wal.db'}", "wal")
+    with reader.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert connection.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+    assert writer is not reader
+    assert writer.pool.size() == 1
+
+# Test that the "default" profile keeps one engine with the SQLite defaults
+def test_default_profile_shares_one_engine(tmp_path):
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'default.db'}", "default")
+    assert writer is reader
+    with writer.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+
+# Test that writes and reads of a writing transaction go to the writer, other reads to a reader
+def test_routing_session_sends_writes_to_writer(tmp_path):
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'routing.db'}", "wal")
+    Base.metadata.create_all(bind=writer)
+    Session = sessionmaker(class_=RoutingSession, writer=writer, readers=[reader], sticky=False)
+    db = Session()
+    try:
+        assert db.get_bind(clause=select(Incident)) is reader
+        create_incident(db, IncidentCreate(title="VPN", description="The VPN is down"))
+        assert db.get_bind(clause=select(Incident)) is reader
+        assert len(list_incidents(db)) == 1
+
+        db.add(Incident(title="Mail", description="Mail is slow"))
+        db.flush()
+        # Reads of the open transaction must see its own writes
+        assert db.get_bind(clause=select(Incident)) is writer
+        assert db.scalar(select(func.count()).select_from(Incident)) == 2
+        db.rollback()
+        assert db.get_bind(clause=select(Incident)) is reader
+    finally:
+        db.close()
+
+# Test that a replica session keeps reading from the primary once it has written
+def test_sticky_replica_session(tmp_path):
+    primary, _ = create_engines(f"sqlite:///{tmp_path / 'primary.db'}", "default")
+    [replica] = create_replica_engines([f"sqlite:///{tmp_path / 'replica.db'}"])
+    for engine in (primary, replica):
+        Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(class_=RoutingSession, writer=primary, readers=[replica], sticky=True)
+    db = Session()
+    try:
+        assert list_incidents(db) == []
+        create_incident(db, IncidentCreate(title="VPN", description="The VPN is down"))
+        # The replica has not caught up: only the primary has the incident
+        assert len(list_incidents(db)) == 1
+    finally:
+        db.close()
+    assert db.get_bind(clause=select(Incident)) is replica
+
+# Test that database URLs are converted to the async driver of their backend
+def test_to_async_url():
+    assert to_async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert to_async_url("postgresql://user:secret@db/app") == "postgresql+psycopg://user:secret@db/app"
@@ -2,10 +2,17 @@ from app.db.base import Base
 from app.db.session import engine, SessionLocal
 from app.models.incident import Incident
 from app.models.user import User
+from app.models.classification_job import ClassificationJob
+from app.models.incident_counter import IncidentCounter
+from app.models.incident_embedding import IncidentEmbedding
+from app.models.classification_label_set import ClassificationLabelSet
+from app.models.incident_classification import IncidentClassification
 from app.db.crud import get_user_by_username, create_user
+from app.db.migrations import migrate
 
 def init():
     Base.metadata.create_all(bind=engine)
+    migrate(engine)
     db = SessionLocal()
     if not get_user_by_username(db, "admin"):
         create_user(db, "admin", "admin")
@@ -1,7 +1,22 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.api.endpoints import incidents, authentication
+from app.api.endpoints import incidents, authentication, health, metrics
+from app.api.middleware import TimingMiddleware
+from app.core.metrics import metrics as metrics_registry
+from app.services.classification_queue import classification_queue
 
-app = FastAPI(title="Incident Management System")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    classification_queue.start()
+    yield
+    classification_queue.stop(timeout=30)
+
+app = FastAPI(title="Incident Management System", lifespan=lifespan)
+
+if metrics_registry.enabled:
+    app.add_middleware(TimingMiddleware)
 
 app.include_router(incidents.router, prefix="/incidents", tags=["Incidents"])
-app.include_router(authentication.router, prefix="/auth", tags=["Auth"])
\ No newline at end of file
+app.include_router(authentication.router, prefix="/auth", tags=["Auth"])
+app.include_router(health.router, prefix="/health", tags=["Health"])
+app.include_router(metrics.router, tags=["Metrics"])
@@ -0,0 +1,158 @@
+"""
+Classification backfill command.
+
+Classifies every incident that has no category yet (including incidents left in the
+"pending" category), for instance after a crash lost in-flight classifications or
+after the label set changed.
+
+By default the model is loaded in this process and incidents are processed in
+throughput-optimized chunks: each chunk is read with one query, repeated descriptions
+are classified once, descriptions are sorted by length so that each model batch needs
+as little padding as possible, and the categories of a chunk are written with a single
+UPDATE, together with the scores of the incidents the model classified. With --enqueue,
+classification jobs are only created for the running workers.
+
+Usage:
+    python -m scripts.backfill_classifications
+    python -m scripts.backfill_classifications --chunk-size 2000 --batch-size 64
+    python -m scripts.backfill_classifications --enqueue
+"""
+
+import argparse
+import time
+from app.db.crud import (
+    cancel_classification_jobs,
+    enqueue_classification_jobs,
+    get_incident_descriptions,
+    get_uncategorized_incident_ids,
+    update_incident_categories,
+)
+from app.db.session import SessionLocal
+from app.services.classification_cache import classification_cache, normalize_description
+from app.services.classifier import CANDIDATE_LABELS, Classification, load_classifier
+
+def classify_chunk(
+    classifier, descriptions: dict[int, str], batch_size: int
+) -> dict[int, Classification]:
+    """
+    Classify a chunk of incidents.
+
+    Args:
+        classifier: The loaded zero-shot classifier.
+        descriptions (dict[int, str]): The description of each incident, keyed by incident ID.
+        batch_size (int): Number of descriptions per model call.
+
+    Returns:
+        dict[int, Classification]: The classification of each incident, keyed by incident ID.
+            Classifications served by the cache have no scores.
+    """
+    unique = {}
+    for description in descriptions.values():
+        unique.setdefault(normalize_description(description), description)
+
+    results = {}
+    pending = []
+    for normalized, description in unique.items():
+        cached = classification_cache.get(description)
+        if cached is not None:
+            results[normalized] = Classification(cached, None, None)
+        else:
+            pending.append((normalized, description))
+
+    pending.sort(key=lambda item: len(item[1]))
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        scored = classifier.score([description for _, description in batch])
+        for (normalized, description), result in zip(batch, scored):
+            results[normalized] = result
+            classification_cache.set(description, result.category)
+
+    return {
+        incident_id: results[normalize_description(description)]
+        for incident_id, description in descriptions.items()
+    }
+
+def backfill(chunk_size: int, batch_size: int):
+    """
+    Classify every uncategorized incident in this process.
+
+    Args:
+        chunk_size (int): Number of incidents read and written per chunk.
+        batch_size (int): Number of descriptions per model call.
+    """
+    classifier = load_classifier()
+    db = SessionLocal()
+    started = time.perf_counter()
+    total = 0
+    after_id = 0
+    try:
+        while True:
+            incident_ids = get_uncategorized_incident_ids(db, after_id=after_id, limit=chunk_size)
+            if not incident_ids:
+                break
+            after_id = incident_ids[-1]
+            descriptions = get_incident_descriptions(db, incident_ids)
+            # Release the connection while the model runs
+            db.rollback()
+            results = classify_chunk(classifier, descriptions, batch_size)
+            update_incident_categories(
+                db,
+                {incident_id: result.category for incident_id, result in results.items()},
+                {
+                    incident_id: (result.model, result.scores, None)
+                    for incident_id, result in results.items()
+                    if result.scores is not None
+                },
+                CANDIDATE_LABELS,
+            )
+            cancel_classification_jobs(db, incident_ids)
+            total += len(incident_ids)
+            elapsed = time.perf_counter() - started
+            print(f"{total} incidents classified ({total / elapsed:.1f}/s)")
+    finally:
+        db.close()
+
+def enqueue(chunk_size: int):
+    """
+    Create classification jobs for every uncategorized incident without an active job.
+
+    Args:
+        chunk_size (int): Number of jobs inserted per statement.
+    """
+    db = SessionLocal()
+    total = 0
+    after_id = 0
+    try:
+        while True:
+            incident_ids = get_uncategorized_incident_ids(
+                db, after_id=after_id, limit=chunk_size, without_active_job=True
+            )
+            if not incident_ids:
+                break
+            after_id = incident_ids[-1]
+            enqueue_classification_jobs(db, incident_ids)
+            total += len(incident_ids)
+    finally:
+        db.close()
+    print(f"{total} classification jobs queued")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000, help="incidents read and written per chunk"
+    )
+    parser.add_argument("--batch-size", type=int, default=32, help="descriptions per model call")
+    parser.add_argument(
+        "--enqueue", action="store_true", help="only queue jobs for the classification workers"
+    )
+    args = parser.parse_args()
+
+    if args.enqueue:
+        enqueue(args.chunk_size)
+    else:
+        backfill(args.chunk_size, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+API and classifier benchmark.
+
+Seeds a temporary database with N incidents, then measures the throughput and the
+p50/p95/p99 latency of the hot API paths, called by concurrent clients through the
+ASGI interface of the application (without network or server overhead):
+
+- POST /incidents/incidents/
+- GET /incidents/
+- POST /auth/token
+
+Classification throughput is measured separately, by running the classification
+queue over seeded incidents with a small stand-in model built locally: a randomly
+initialized two-layer BERT NLI model with a word-level vocabulary. It exercises the
+tokenization, the batched forward passes and the database round-trips of the real
+code path without downloading the production model.
+
+The results are compared with a stored baseline: a throughput lower, a latency higher
+or more failed requests than the baseline, beyond the tolerance, is reported as a
+regression and the script exits with status 1.
+
+Usage:
+    python -m scripts.benchmark_api
+    python -m scripts.benchmark_api --incidents 50000 --requests 2000 --concurrency 32
+    python -m scripts.benchmark_api --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from main import app
+from app.api.endpoints import incidents as incident_endpoints
+from app.db.base import Base
+from app.db.crud import create_incidents, create_user, enqueue_classification_jobs
+from app.db.engines import create_async_engines, to_async_url
+from app.db.migrations import migrate
+from app.db.routing import RoutingSession
+from app.db.session import get_async_db, get_async_replica_db
+from app.schemas.incident import IncidentCreate
+from app.services.classification_queue import ClassificationQueue
+from app.services.classifier import CANDIDATE_LABELS, load_classifier
+from scripts.benchmark_backends import SAMPLE_TICKETS, percentile
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+"""Baseline the results are compared with, unless another file is given."""
+
+HIGHER_IS_BETTER = {"requests_per_second", "incidents_per_second"}
+"""Metrics for which a lower value is a regression; for the others, a higher value is."""
+
+COMPARED_METRICS = HIGHER_IS_BETTER | {"p95_ms", "p99_ms", "errors"}
+"""Metrics compared with the baseline. Medians are reported but too noisy to gate on."""
+
+USER_EMAIL = "benchmark@example.com"
+USER_PASSWORD = "benchmark"
+
+class IdleQueue:
+    """
+    Classification queue leaving the jobs created during the API benchmark queued.
+
+    Keeps the model and the worker thread out of the request measurements; the
+    classification path is measured on its own by `benchmark_classification`.
+    """
+
+    is_ready = True
+
+    def notify(self, count: int = 1):
+        """Ignore the notification."""
+
+def seed_database(url: str, incidents: int) -> sessionmaker:
+    """
+    Create the schema and the benchmark user, and insert incidents in batches.
+
+    Args:
+        url (str): The database URL.
+        incidents (int): Number of incidents to insert.
+
+    Returns:
+        sessionmaker: Factory of sessions on the database.
+    """
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    Base.metadata.create_all(bind=engine)
+    migrate(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    db = session_factory()
+    try:
+        create_user(db, USER_EMAIL, USER_PASSWORD)
+        for start in range(0, incidents, 1000):
+            create_incidents(db, [
+                IncidentCreate(title=f"Incident {i}", description=f"{SAMPLE_TICKETS[i % len(SAMPLE_TICKETS)]} (#{i})")
+                for i in range(start, min(start + 1000, incidents))
+            ])
+    finally:
+        db.close()
+    return session_factory
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """
+    Summarize the latencies of a load run.
+
+    Args:
+        latencies (list[float]): Latency of each successful request, in ms.
+        errors (int): Number of failed requests.
+        elapsed (float): Duration of the run, in seconds.
+
+    Returns:
+        dict: Throughput, latency percentiles and error count.
+    """
+    summary = {"requests_per_second": round(len(latencies) / elapsed, 1), "errors": errors}
+    for name, fraction in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        summary[name] = round(percentile(latencies, fraction), 2) if latencies else None
+    return summary
+
+async def load(client: httpx.AsyncClient, send, requests: int, concurrency: int) -> dict:
+    """
+    Send requests from concurrent clients and measure them.
+
+    Args:
+        client (httpx.AsyncClient): The client bound to the application.
+        send: Coroutine function sending one request with the client, given its number.
+        requests (int): Total number of requests.
+        concurrency (int): Number of requests in flight at any time.
+
+    Returns:
+        dict: The summary of the run, see `summarize`.
+    """
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def user():
+        nonlocal errors
+        for number in remaining:
+            started = time.perf_counter()
+            response = await send(client, number)
+            if response.status_code < 400:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+async def benchmark_api(url: str, requests: int, login_requests: int, concurrency: int) -> dict:
+    """
+    Measure the hot API endpoints against a seeded database.
+
+    Args:
+        url (str): The database URL.
+        requests (int): Number of incident creation and listing requests.
+        login_requests (int): Number of token requests; each one verifies a bcrypt hash.
+        concurrency (int): Number of requests in flight at any time.
+
+    Returns:
+        dict: The summary of each endpoint.
+    """
+    # Same engine layout and SQLite profile as the application
+    engine, read_engine = create_async_engines(to_async_url(url))
+    session_factory = async_sessionmaker(
+        sync_session_class=RoutingSession,
+        writer=engine.sync_engine,
+        readers=[read_engine.sync_engine],
+        sticky=False,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    async def get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_db
+    app.dependency_overrides[get_async_replica_db] = get_db
+    classification_queue = incident_endpoints.classification_queue
+    incident_endpoints.classification_queue = IdleQueue()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            credentials = {"username": USER_EMAIL, "password": USER_PASSWORD}
+            response = await client.post("/auth/token", data=credentials)
+            response.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+            async def create(client, number):
+                ticket = SAMPLE_TICKETS[number % len(SAMPLE_TICKETS)]
+                return await client.post(
+                    "/incidents/incidents/", json={"title": f"Load {number}", "description": f"{ticket} [{number}]"}
+                )
+
+            async def list_page(client, number):
+                return await client.get("/incidents/", params={"limit": 50})
+
+            async def token(client, number):
+                return await client.post("/auth/token", data=credentials)
+
+            return {
+                "create": await load(client, create, requests, concurrency),
+                "list": await load(client, list_page, requests, concurrency),
+                "token": await load(client, token, login_requests, concurrency),
+            }
+    finally:
+        app.dependency_overrides.clear()
+        incident_endpoints.classification_queue = classification_queue
+        await engine.dispose()
+        await read_engine.dispose()
+
+def create_stand_in_model(directory: str) -> str:
+    """
+    Build a small randomly initialized NLI model and its tokenizer.
+
+    The word-level vocabulary covers the sample tickets, the candidate labels and the
+    hypothesis template of the zero-shot pipeline. The predictions are meaningless,
+    but the cost of each step scales like the production model.
+
+    Args:
+        directory (str): Directory the model and the tokenizer are saved to.
+
+    Returns:
+        str: The directory, usable as a model name.
+    """
+    import torch
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import BertConfig, BertForSequenceClassification, PreTrainedTokenizerFast
+
+    special = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    texts = SAMPLE_TICKETS + CANDIDATE_LABELS + ["This example is {}."]
+    words = sorted({word for text in texts for word in re.findall(r"\w+|[^\w\s]+", text.lower())})
+    vocab = {token: index for index, token in enumerate(special + words)}
+
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.Lowercase()
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])],
+    )
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="[UNK]",
+        pad_token="[PAD]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+        mask_token="[MASK]",
+        model_max_length=128,
+    ).save_pretrained(directory)
+
+    labels = ["contradiction", "neutral", "entailment"]
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        max_position_embeddings=128,
+        id2label=dict(enumerate(labels)),
+        label2id={label: index for index, label in enumerate(labels)},
+    )
+    torch.manual_seed(0)
+    BertForSequenceClassification(config).save_pretrained(directory)
+    return directory
+
+def benchmark_classification(session_factory: sessionmaker, model_name: str, mode: str, incidents: int, batch_size: int) -> dict:
+    """
+    Measure the classification queue over seeded incidents.
+
+    Args:
+        session_factory (sessionmaker): Factory of sessions on the seeded database.
+        model_name (str): Identifier or path of the model.
+        mode (str): The scoring mode.
+        incidents (int): Number of incidents to classify.
+        batch_size (int): Maximum number of incidents per batch.
+
+    Returns:
+        dict: The classification throughput and the mean batch latency.
+    """
+    classifier = load_classifier(backend="torch", mode=mode, model_name=model_name)
+    db = session_factory()
+    try:
+        enqueue_classification_jobs(db, list(range(1, incidents + 1)))
+    finally:
+        db.close()
+
+    queue = ClassificationQueue(
+        classify_batch=classifier.classify, session_factory=session_factory, max_batch_size=batch_size
+    )
+    started = time.perf_counter()
+    queue.notify(incidents)
+    while queue.stats()["pending"]:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    queue.stop()
+
+    stats = queue.stats()
+    return {
+        "incidents_per_second": round(stats["incidents"] / elapsed, 1),
+        "avg_batch_latency_ms": stats["avg_batch_latency_ms"],
+        "errors": stats["failed_batches"],
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    List the metrics that regressed compared with a baseline.
+
+    Args:
+        results (dict): The measured metrics, keyed by benchmark.
+        baseline (dict): The baseline metrics, keyed by benchmark.
+        tolerance (float): Allowed relative deviation, e.g. 0.25 for 25%.
+
+    Returns:
+        list[str]: A description of each regression.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(name, {}).get(metric)
+            if metric not in COMPARED_METRICS or expected is None or value is None:
+                continue
+            if metric == "errors":
+                regressed = value > expected
+            elif metric in HIGHER_IS_BETTER:
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{name}.{metric}: {value} (baseline {expected})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incidents", type=int, default=10000, help="incidents seeded before measuring")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per incident endpoint")
+    parser.add_argument("--login-requests", type=int, default=50, help="requests to the token endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at any time")
+    parser.add_argument("--classify", type=int, default=512, help="incidents classified, 0 to skip")
+    parser.add_argument("--batch-size", type=int, default=16, help="maximum incidents per classification batch")
+    parser.add_argument("--mode", default="pipeline", choices=["pipeline", "packed", "embedding"])
+    parser.add_argument("--model", help="model to classify with instead of the generated stand-in")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative deviation")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    session_factory = seed_database(url, args.incidents)
+    print(f"{args.incidents} incidents seeded, {args.concurrency} concurrent requests")
+
+    results = asyncio.run(benchmark_api(url, args.requests, args.login_requests, args.concurrency))
+    if args.classify:
+        try:
+            model_name = args.model or create_stand_in_model(os.path.join(directory, "model"))
+            results["classification"] = benchmark_classification(
+                session_factory, model_name, args.mode, min(args.classify, args.incidents), args.batch_size
+            )
+        except Exception as exc:
+            print(f"classification: skipped ({exc})")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+
+    print(f"{'benchmark':<15} {'metric':<22} {'value':>10} {'baseline':>10}")
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(name, {}).get(metric)
+            print(f"{name:<15} {metric:<22} {value!s:>10} {expected!s:>10}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+            handle.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS beyond {args.tolerance:.0%} of the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
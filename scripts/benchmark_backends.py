@@ -0,0 +1,126 @@
+"""
+Classifier backend comparison script.
+
+Loads the classification model through each inference backend, classifies a set of
+sample tickets one at a time, and reports for every backend its agreement with the
+fp32 "torch" baseline and its per-ticket p50/p99 latency.
+
+Usage:
+    python -m scripts.benchmark_backends
+    python -m scripts.benchmark_backends --backends torch torch-int8 onnx --threads 4
+    python -m scripts.benchmark_backends --input tickets.txt --mode packed
+"""
+
+import argparse
+import statistics
+import time
+from app.services.backends import BACKENDS
+from app.services.classifier import load_classifier
+
+SAMPLE_TICKETS = [
+    "The VPN keeps disconnecting every few minutes",
+    "Cannot reach the internal wiki, DNS resolution fails",
+    "Packet loss between the office and the data center",
+    "The database server is not responding",
+    "Production web server returns 502 errors",
+    "Disk is full on the file server",
+    "The mobile app crashes when opening the settings page",
+    "Excel freezes when opening large spreadsheets",
+    "A bug in the invoice module computes wrong totals",
+    "I can't log in, my password is rejected",
+    "Two-factor authentication code never arrives",
+    "Account locked after too many login attempts",
+    "The coffee machine on the second floor is broken",
+    "Request for a new office chair",
+    "A rede Wi-Fi do escritório está muito lenta",
+    "No puedo iniciar sesión en el portal",
+]
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Compute a percentile with linear interpolation.
+
+    Args:
+        values (list[float]): The sample values.
+        fraction (float): The percentile as a fraction, e.g. 0.99.
+
+    Returns:
+        float: The percentile value.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def run_backend(backend: str, mode: str, threads: int, tickets: list[str], warmup: int) -> dict:
+    """
+    Load a backend and classify every ticket individually.
+
+    Args:
+        backend (str): The backend name.
+        mode (str): The scoring mode.
+        threads (int): Number of intra-op threads.
+        tickets (list[str]): The ticket descriptions.
+        warmup (int): Number of untimed calls made before measuring.
+
+    Returns:
+        dict: The load time, the predicted labels and the per-ticket latencies.
+    """
+    started = time.perf_counter()
+    classifier = load_classifier(backend=backend, mode=mode, num_threads=threads)
+    load_seconds = time.perf_counter() - started
+
+    for ticket in tickets[:warmup]:
+        classifier.classify([ticket])
+
+    labels, latencies = [], []
+    for ticket in tickets:
+        started = time.perf_counter()
+        labels.extend(classifier.classify([ticket]))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"load_seconds": load_seconds, "labels": labels, "latencies": latencies}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--mode", default="pipeline", choices=["pipeline", "packed", "embedding"])
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads, 0 for the library default")
+    parser.add_argument("--input", help="file with one ticket description per line")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls before measuring")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as handle:
+            tickets = [line.strip() for line in handle if line.strip()]
+    else:
+        tickets = SAMPLE_TICKETS
+
+    backends = list(args.backends)
+    if "torch" not in backends:
+        backends.insert(0, "torch")
+
+    results = {}
+    for backend in backends:
+        try:
+            results[backend] = run_backend(backend, args.mode, args.threads, tickets, args.warmup)
+        except Exception as exc:
+            print(f"{backend}: skipped ({exc})")
+
+    baseline = results.get("torch")
+    if baseline is None:
+        raise SystemExit("The fp32 torch baseline could not be loaded")
+
+    print(f"{len(tickets)} tickets, mode={args.mode}, threads={args.threads or 'default'}")
+    print(f"{'backend':<12} {'load (s)':>9} {'agreement':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'mean (ms)':>10}")
+    for backend, result in results.items():
+        agreement = sum(a == b for a, b in zip(result["labels"], baseline["labels"])) / len(tickets)
+        latencies = result["latencies"]
+        print(
+            f"{backend:<12} {result['load_seconds']:>9.1f} {agreement:>10.1%} "
+            f"{percentile(latencies, 0.50):>9.1f} {percentile(latencies, 0.99):>9.1f} "
+            f"{statistics.fmean(latencies):>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
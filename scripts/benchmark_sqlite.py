@@ -0,0 +1,157 @@
+"""
+SQLite profile concurrency benchmark.
+
+Runs several processes of concurrent writer and reader threads against a temporary
+SQLite database for each connection profile, the way the API and the classification
+worker processes share the database: writers create incidents with their
+classification jobs, readers page through the incident listing. Reports throughput,
+p50/p99 latency and the number of failed operations (such as "database is locked")
+per profile.
+
+Usage:
+    python -m scripts.benchmark_sqlite
+    python -m scripts.benchmark_sqlite --processes 4 --writers 4 --readers 8 --duration 20
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+from app.db.crud import create_incident, list_incidents
+from app.db.engines import create_engines
+from app.db.routing import RoutingSession
+from app.schemas.incident import IncidentCreate
+from scripts.benchmark_backends import percentile
+
+def worker(session_factory, operation, deadline: float, results: list, errors: list):
+    """
+    Repeat an operation until the deadline, recording latencies and failures.
+
+    Args:
+        session_factory: Factory of the sessions used by the operation.
+        operation: Function called with a session.
+        deadline (float): `time.perf_counter()` value at which to stop.
+        results (list): Receives the latency of each successful operation, in ms.
+        errors (list): Receives the message of each failed operation.
+    """
+    while time.perf_counter() < deadline:
+        db = session_factory()
+        started = time.perf_counter()
+        try:
+            operation(db)
+            results.append((time.perf_counter() - started) * 1000)
+        except OperationalError as exc:
+            db.rollback()
+            errors.append(str(exc.orig))
+        finally:
+            db.close()
+
+def run_process(path: str, profile: str, writers: int, readers: int, deadline: float, results):
+    """
+    Run the writer and reader threads of one process until the deadline.
+
+    Args:
+        path (str): The database file.
+        profile (str): The SQLite profile, "default" or "wal".
+        writers (int): Number of writer threads.
+        readers (int): Number of reader threads.
+        deadline (float): `time.time()` value at which to stop.
+        results: Queue receiving the latencies and errors of the writes and the reads.
+    """
+    writer, reader = create_engines(f"sqlite:///{path}", profile)
+    session_factory = sessionmaker(class_=RoutingSession, writer=writer, readers=[reader], sticky=False, autoflush=False)
+    incident = IncidentCreate(title="Benchmark", description="The VPN keeps disconnecting")
+    stop = time.perf_counter() + deadline - time.time()
+
+    outcome = {"writes": ([], []), "reads": ([], [])}
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(session_factory, lambda db: create_incident(db, incident, classify=True), stop, *outcome["writes"]),
+        )
+        for _ in range(writers)
+    ] + [
+        threading.Thread(
+            target=worker,
+            args=(session_factory, lambda db: list_incidents(db, limit=50), stop, *outcome["reads"]),
+        )
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.dispose()
+    reader.dispose()
+    results.put(outcome)
+
+def run_profile(profile: str, processes: int, writers: int, readers: int, duration: float) -> dict:
+    """
+    Benchmark one connection profile on a fresh database.
+
+    Args:
+        profile (str): The SQLite profile, "default" or "wal".
+        processes (int): Number of processes.
+        writers (int): Number of writer threads per process.
+        readers (int): Number of reader threads per process.
+        duration (float): Duration of the run, in seconds.
+
+    Returns:
+        dict: Latencies and errors of the writes and the reads of all processes.
+    """
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    writer, _ = create_engines(f"sqlite:///{path}", profile)
+    Base.metadata.create_all(bind=writer)
+    writer.dispose()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    # Leave the processes time to start before the clock runs
+    deadline = time.time() + 2 + duration
+    workers = [
+        context.Process(target=run_process, args=(path, profile, writers, readers, deadline, results))
+        for _ in range(processes)
+    ]
+    for process in workers:
+        process.start()
+
+    merged = {"writes": ([], []), "reads": ([], [])}
+    for _ in workers:
+        for kind, (latencies, errors) in results.get().items():
+            merged[kind][0].extend(latencies)
+            merged[kind][1].extend(errors)
+    for process in workers:
+        process.join()
+    return merged
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["default", "wal"], choices=["default", "wal"])
+    parser.add_argument("--processes", type=int, default=4, help="processes sharing the database")
+    parser.add_argument("--writers", type=int, default=2, help="writer threads per process")
+    parser.add_argument("--readers", type=int, default=2, help="reader threads per process")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per profile")
+    args = parser.parse_args()
+
+    print(
+        f"{args.processes} processes x ({args.writers} writers, {args.readers} readers), "
+        f"{args.duration:g}s per profile"
+    )
+    print(f"{'profile':<8} {'kind':<7} {'ops/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    for profile in args.profiles:
+        results = run_profile(profile, args.processes, args.writers, args.readers, args.duration)
+        for kind, (latencies, errors) in results.items():
+            p50 = percentile(latencies, 0.50) if latencies else float("nan")
+            p99 = percentile(latencies, 0.99) if latencies else float("nan")
+            print(
+                f"{profile:<8} {kind:<7} {len(latencies) / args.duration:>8.0f} "
+                f"{p50:>9.1f} {p99:>9.1f} {len(errors):>7}"
+            )
+
+if __name__ == "__main__":
+    main()
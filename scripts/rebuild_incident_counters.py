@@ -0,0 +1,29 @@
+"""
+Incident counters rebuild command.
+
+Recomputes the materialized incident counters behind the /incidents/stats endpoint
+from the incidents table, in one transaction. The counters are maintained by the
+API and the classification workers; a rebuild is only needed if incidents were
+written by other means, such as manual SQL or a restored backup.
+
+Usage:
+    python -m scripts.rebuild_incident_counters
+"""
+
+import argparse
+import time
+from app.db.crud import rebuild_incident_counters
+from app.db.session import SessionLocal
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        buckets = rebuild_incident_counters(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {buckets} counter buckets in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Classification rescoring command.
+
+After the candidate labels (CLASSIFIER_LABELS) change, queues classification jobs for
+the incidents whose category may change, instead of reclassifying the whole history:
+
+- incidents whose category is not one of the labels anymore;
+- incidents classified with another label set whose stored top score is below the
+  margin (CLASSIFICATION_RESCORE_MARGIN by default). Incidents the model was confident
+  about keep their category.
+
+The jobs are processed by the classification workers, which store the new scores.
+Incidents without stored scores, such as categories served by the classification
+cache or set before scores were stored, are only rescored with --include-unscored.
+
+Usage:
+    python -m scripts.rescore_classifications
+    python -m scripts.rescore_classifications --margin 0.8 --chunk-size 2000
+    python -m scripts.rescore_classifications --dry-run
+"""
+
+import argparse
+from app.core.config import CLASSIFICATION_RESCORE_MARGIN
+from app.db.crud import enqueue_classification_jobs, get_rescore_incident_ids
+from app.db.session import SessionLocal
+from app.services.classifier import CANDIDATE_LABELS
+
+def rescore(margin: float, chunk_size: int, include_unscored: bool, dry_run: bool) -> int:
+    """
+    Queue classification jobs for the incidents to reclassify.
+
+    Args:
+        margin (float): Top score below which an incident is reclassified.
+        chunk_size (int): Number of jobs inserted per statement.
+        include_unscored (bool): Also reclassify incidents that have no stored scores.
+        dry_run (bool): Only count the incidents.
+
+    Returns:
+        int: The number of incidents to reclassify.
+    """
+    db = SessionLocal()
+    total = 0
+    after_id = 0
+    try:
+        while True:
+            incident_ids = get_rescore_incident_ids(
+                db, CANDIDATE_LABELS, margin, after_id=after_id, limit=chunk_size, include_unscored=include_unscored
+            )
+            if not incident_ids:
+                break
+            after_id = incident_ids[-1]
+            if not dry_run:
+                enqueue_classification_jobs(db, incident_ids)
+            total += len(incident_ids)
+    finally:
+        db.close()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--margin", type=float, default=CLASSIFICATION_RESCORE_MARGIN, help="top score below which incidents are reclassified")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="jobs inserted per statement")
+    parser.add_argument("--include-unscored", action="store_true", help="also reclassify incidents without stored scores")
+    parser.add_argument("--dry-run", action="store_true", help="only count the incidents to reclassify")
+    args = parser.parse_args()
+
+    total = rescore(args.margin, args.chunk_size, args.include_unscored, args.dry_run)
+    print(f"{total} incidents {'to reclassify' if args.dry_run else 'queued for reclassification'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Fast classifier training command.
+
+Trains the first stage of the classification cascade, a TF-IDF and logistic
+regression model, on the most recent incidents already categorized by the zero-shot
+model, and writes it to CASCADE_MODEL_PATH. A share of the incidents is held out to
+report the accuracy of the model and the fraction of incidents it would classify
+without escalating to the zero-shot model.
+
+The classification workers load the model when they start, so restart them after
+training. Retraining periodically keeps the model in line with new incidents.
+
+Usage:
+    python -m scripts.train_fast_classifier
+    python -m scripts.train_fast_classifier --limit 100000 --holdout 0.2 --output fast-classifier.npz
+"""
+
+import argparse
+import random
+import time
+from app.core.config import CASCADE_MODEL_PATH, CASCADE_THRESHOLD
+from app.db.crud import get_categorized_incidents
+from app.db.session import SessionLocal
+from app.services.classifier import CANDIDATE_LABELS
+from app.services.fast_classifier import TfidfLogisticClassifier
+
+def evaluate(model: TfidfLogisticClassifier, examples: list[tuple[str, str]], threshold: float) -> dict:
+    """
+    Measure a model on held-out incidents.
+
+    Args:
+        model (TfidfLogisticClassifier): The trained model.
+        examples (list[tuple[str, str]]): The (description, category) of each incident.
+        threshold (float): Probability from which the cascade accepts a classification.
+
+    Returns:
+        dict: The overall accuracy, the fraction of confident classifications and their accuracy.
+    """
+    predicted, probabilities = model.predict([description for description, _ in examples])
+    correct = [category == expected for category, (_, expected) in zip(predicted, examples)]
+    confident = [hit for hit, probability in zip(correct, probabilities) if probability >= threshold]
+    return {
+        "accuracy": sum(correct) / len(correct),
+        "coverage": len(confident) / len(correct),
+        "confident_accuracy": sum(confident) / len(confident) if confident else float("nan"),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=50000, help="most recent incidents to train on")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of the incidents held out for evaluation")
+    parser.add_argument("--threshold", type=float, default=CASCADE_THRESHOLD, help="cascade acceptance probability")
+    parser.add_argument("--output", default=CASCADE_MODEL_PATH)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        examples = get_categorized_incidents(db, CANDIDATE_LABELS, args.limit)
+    finally:
+        db.close()
+    if len({category for _, category in examples}) < 2:
+        parser.exit(1, "At least two categories of categorized incidents are needed to train\n")
+
+    random.Random(0).shuffle(examples)
+    held_out = int(len(examples) * args.holdout)
+    training, evaluation = examples[held_out:], examples[:held_out]
+    started = time.perf_counter()
+    model = TfidfLogisticClassifier.fit(
+        [description for description, _ in training], [category for _, category in training]
+    )
+    print(f"Trained on {len(training)} incidents, {len(model.vocabulary)} terms, in {time.perf_counter() - started:.1f}s")
+    if evaluation:
+        figures = evaluate(model, evaluation, args.threshold)
+        print(
+            f"Held-out accuracy {figures['accuracy']:.3f}; at threshold {args.threshold:g}, "
+            f"{figures['coverage']:.1%} classified without escalation "
+            f"with accuracy {figures['confident_accuracy']:.3f}"
+        )
+    model.save(args.output)
+    print(f"Saved to {args.output}")
+
+if __name__ == "__main__":
+    main()